@@ -0,0 +1,250 @@
+"""
+Microbenchmarks for pyrosper's hot paths.
+
+Covers Pyrosper.pick and has_pick with 1-500 experiments, Pick.__get__ through BaseContext, BaseContext
+enter/exit, validate and with_experiment registration, and set_for_user/complete_for_user against the mock
+adapters.
+Results are written as JSON and can be compared with a previous run to catch regressions.
+
+Usage:
+    python benchmarks/hot_path_benchmark.py --output results.json
+    python benchmarks/hot_path_benchmark.py --compare baseline.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import timeit
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pyrosper import BaseContext, Symbol, __version__
+from pyrosper.mock.mock_experiment import MockExperiment
+from pyrosper.mock.mock_pyrosper import MockPyrosper
+from pyrosper.mock.mock_user_variant import MockUserVariant
+from pyrosper.mock.mock_variant import MockVariant
+
+EXPERIMENT_COUNTS = (1, 10, 100, 500)
+
+
+def new_experiments(count: int) -> List[MockExperiment]:
+    experiments = []
+    for i in range(count):
+        symbol = Symbol(f"symbol_{i}")
+        experiments.append(MockExperiment(
+            id=f"id_{i}",
+            name=f"experiment_{i}",
+            variants=[MockVariant("a", {symbol: f"a_{i}"}), MockVariant("b", {symbol: f"b_{i}"})],
+            is_enabled=True,
+        ))
+    return experiments
+
+
+class StoringExperiment(MockExperiment):
+    """MockExperiment that keeps user variants in a dict, so complete_for_user finds and deletes them."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.user_variants: Dict[Any, MockUserVariant] = {}
+
+    async def get_user_variant(self, user_id: str, experiment_id: str) -> Optional[MockUserVariant]:
+        return self.user_variants.get((experiment_id, user_id))
+
+    async def upsert_user_variant(self, user_variant: MockUserVariant) -> None:
+        self.user_variants[(user_variant.experiment_id, user_variant.user_id)] = user_variant
+
+    async def delete_user_variant(self, user_variant: MockUserVariant) -> None:
+        self.user_variants.pop((user_variant.experiment_id, user_variant.user_id), None)
+
+
+def new_pyrosper(count: int) -> MockPyrosper:
+    pyrosper = MockPyrosper()
+    for experiment in new_experiments(count):
+        pyrosper.with_experiment(experiment)
+    return pyrosper
+
+
+def last_symbol(pyrosper: MockPyrosper) -> object:
+    return next(iter(pyrosper.experiments[-1].variants[0].picks))
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """Return the fastest time per call, in nanoseconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def measure_async(function: Callable[[], Awaitable[Any]], repeat: int) -> float:
+    """Return the fastest time per awaited call, in nanoseconds."""
+    async def run(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await function()
+        return time.perf_counter() - start
+
+    loop = asyncio.new_event_loop()
+    try:
+        number = 1
+        while loop.run_until_complete(run(number)) < 0.2:
+            number *= 2
+        return min(loop.run_until_complete(run(number)) for _ in range(repeat)) / number * 1e9
+    finally:
+        loop.close()
+
+
+def pick_benchmarks(repeat: int) -> Dict[str, float]:
+    results = {}
+    for count in EXPERIMENT_COUNTS:
+        pyrosper = new_pyrosper(count)
+        symbol = last_symbol(pyrosper)
+        missing = Symbol("missing")
+        results[f"pick[{count}]"] = measure(lambda: pyrosper.pick(symbol, str), repeat)
+        results[f"has_pick[{count}]"] = measure(lambda: pyrosper.has_pick(missing), repeat)
+    return results
+
+
+def context_benchmarks(repeat: int) -> Dict[str, float]:
+    pyrosper = new_pyrosper(100)
+    symbol = last_symbol(pyrosper)
+
+    class Context(BaseContext[MockPyrosper]):
+        def setup(self) -> MockPyrosper:
+            return pyrosper
+
+    class Page:
+        greeting = Context.pick(str, symbol)
+
+    page = Page()
+
+    def enter_exit() -> None:
+        with Context():
+            pass
+
+    def first_pick() -> None:
+        with Context():
+            page.greeting
+
+    results = {"context_enter_exit": measure(enter_exit, repeat), "context_first_pick": measure(first_pick, repeat)}
+    with Context():
+        results["context_pick"] = measure(lambda: page.greeting, repeat)
+    return results
+
+
+def registration_benchmarks(repeat: int) -> Dict[str, float]:
+    results = {}
+    for count in EXPERIMENT_COUNTS:
+        pyrosper = new_pyrosper(count)
+        symbol = Symbol("new_symbol")
+        experiment = MockExperiment(
+            id="new_id",
+            name="new_experiment",
+            variants=[MockVariant("a", {symbol: "a"}), MockVariant("b", {symbol: "b"})],
+        )
+        results[f"validate[{count}]"] = measure(lambda: pyrosper.validate(experiment), repeat)
+
+    for count in EXPERIMENT_COUNTS:
+        experiments = new_experiments(count)
+
+        def register() -> None:
+            pyrosper = MockPyrosper()
+            for experiment in experiments:
+                pyrosper.with_experiment(experiment)
+
+        results[f"with_experiment[{count}]"] = measure(register, repeat)
+    return results
+
+
+def resolution_benchmarks(repeat: int) -> Dict[str, float]:
+    results = {}
+    for count in (1, 10, 100):
+        pyrosper = new_pyrosper(count)
+        results[f"set_for_user[{count}]"] = measure_async(lambda: pyrosper.set_for_user("user_1"), repeat)
+        results[f"set_for_user_concurrent[{count}]"] = measure_async(
+            lambda: pyrosper.set_for_user("user_1", concurrency=8), repeat
+        )
+    experiment = StoringExperiment(
+        id="id", name="experiment", variants=[MockVariant("a", {}), MockVariant("b", {})], is_enabled=True
+    )
+    user_variant = MockUserVariant(experiment_id="id", user_id="user_1", index=1)
+
+    async def complete_for_user() -> None:
+        # The user variant is stored again before every call, so the lookup, delete and reward are all timed
+        experiment.user_variants[("id", "user_1")] = user_variant
+        await experiment.complete_for_user("user_1", 1.0)
+
+    results["complete_for_user"] = measure_async(complete_for_user, repeat)
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[int], Dict[str, float]]] = {
+    "pick": pick_benchmarks,
+    "context": context_benchmarks,
+    "registration": registration_benchmarks,
+    "resolution": resolution_benchmarks,
+}
+
+
+def run(groups: List[str], repeat: int) -> Dict[str, Any]:
+    results: Dict[str, float] = {}
+    for group in groups:
+        results.update(BENCHMARKS[group](repeat))
+    return {
+        "pyrosper": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "unit": "ns",
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return the benchmarks that got slower than the baseline by more than threshold."""
+    regressions = []
+    for name, value in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous and value > previous * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--group", action="append", choices=sorted(BENCHMARKS), help="run only these groups")
+    args = parser.parse_args(argv)
+
+    report = run(args.group or list(BENCHMARKS), args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    print(f"{'benchmark':<32} {'ns/op':>14} {'baseline':>14} {'change':>8}")
+    for name, value in report["results"].items():
+        previous = baseline.get("results", {}).get(name) if baseline else None
+        if previous:
+            print(f"{name:<32} {value:>14,.1f} {previous:>14,.1f} {value / previous - 1:>+8.1%}")
+        else:
+            print(f"{name:<32} {value:>14,.1f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"Slower than baseline by more than {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Memory benchmark for pyrosper's core value objects.
+
+Compares the slotted Symbol, Variant, UserVariant and Pick classes with dict-backed equivalents by
+allocating many instances under tracemalloc.
+
+Usage:
+    python benchmarks/memory_benchmark.py [--count 1000000]
+"""
+import argparse
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from pyrosper import Pick, Symbol, UserVariant, Variant
+
+
+class DictSymbol:
+    def __init__(self, description: str):
+        self.description = description
+        self.unique_id = id(self)
+
+
+class DictVariant:
+    def __init__(self, name: str, picks: Any):
+        self.name = name
+        self.picks = picks
+
+
+class DictUserVariant:
+    def __init__(self, experiment_id: Any, index: int, user_id: Any, id: Any = None):
+        self.id = id
+        self.experiment_id = experiment_id
+        self.user_id = user_id
+        self.index = index
+
+
+class DictPick:
+    def __init__(self, typ: type, symbol: Any, getter: Callable[[], Any], cached: bool = False, check_type: bool = True):
+        self.typ = typ
+        self.symbol = symbol
+        self.getter = getter
+        self.cached = cached
+        self.check_type = check_type
+
+
+class SlottedUserVariant(UserVariant):
+    __slots__ = ()
+
+
+def _getter() -> str:
+    return "value"
+
+
+def measure(factory: Callable[[int], Any], count: int) -> int:
+    """Return the bytes held by `count` objects built with factory."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objects
+    return after - before
+
+
+def run(count: int) -> List[Dict[str, Any]]:
+    picks: Dict[object, Any] = {}
+    cases: List[Tuple[str, Callable[[int], Any], Callable[[int], Any]]] = [
+        ("Symbol", lambda i: Symbol("symbol"), lambda i: DictSymbol("symbol")),
+        ("Variant", lambda i: Variant("variant", picks), lambda i: DictVariant("variant", picks)),
+        (
+            "UserVariant",
+            lambda i: SlottedUserVariant(experiment_id=1, index=0, user_id=i),
+            lambda i: DictUserVariant(experiment_id=1, index=0, user_id=i),
+        ),
+        ("Pick", lambda i: Pick(str, None, _getter), lambda i: DictPick(str, None, _getter)),
+    ]
+    results = []
+    for name, slotted, dict_backed in cases:
+        slotted_bytes = measure(slotted, count)
+        dict_bytes = measure(dict_backed, count)
+        results.append({
+            "name": name,
+            "count": count,
+            "slotted_bytes": slotted_bytes,
+            "dict_bytes": dict_bytes,
+            "saved": 1 - slotted_bytes / dict_bytes,
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+    print(f"{'class':<12} {'slotted B/obj':>14} {'dict B/obj':>11} {'saved':>7}")
+    for result in run(args.count):
+        print(
+            f"{result['name']:<12} {result['slotted_bytes'] / args.count:>14.1f} "
+            f"{result['dict_bytes'] / args.count:>11.1f} {result['saved']:>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark for the SQLite storage adapter.
+
+Times cohort assignment, per-user resolution, batch completion and chunked deletion against a temporary
+database, as a baseline for other storage adapters.
+
+Usage:
+    python benchmarks/sqlite_benchmark.py [--users 20000] [--pool-size 4] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from pyrosper import SQLiteExperiment, SQLiteStorage, Symbol, Variant
+
+greeting = Symbol("greeting")
+
+
+class RandomAlgorithm:
+    def __init__(self, variant_count: int):
+        self.scores: List[float] = [0.0] * variant_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"scores": self.scores}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RandomAlgorithm":
+        algorithm = cls(0)
+        algorithm.scores = data["scores"]
+        return algorithm
+
+
+class BenchmarkExperiment(SQLiteExperiment[RandomAlgorithm, Variant]):
+    def new_algorithm(self) -> RandomAlgorithm:
+        return RandomAlgorithm(len(self.variants))
+
+    async def get_variant_index(self, algorithm: RandomAlgorithm) -> int:
+        return random.randrange(len(algorithm.scores))
+
+    async def reward_algorithm(self, algorithm: RandomAlgorithm, user_variant_index: int, score: float) -> RandomAlgorithm:
+        algorithm.scores[user_variant_index] += score
+        return algorithm
+
+
+def new_experiment(storage: SQLiteStorage) -> BenchmarkExperiment:
+    variants = [Variant(name, {greeting: name}) for name in ("a", "b", "c")]
+    return BenchmarkExperiment("benchmark", variants, storage=storage)
+
+
+async def run(users: int, pool_size: int, concurrency: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"users": users, "pool_size": pool_size, "concurrency": concurrency}
+    with tempfile.TemporaryDirectory() as directory:
+        storage = SQLiteStorage(os.path.join(directory, "benchmark.db"), pool_size=pool_size)
+        try:
+            experiment = new_experiment(storage)
+            await experiment.enable()
+            user_ids = [f"user_{i}" for i in range(users)]
+
+            start = time.perf_counter()
+            async for _ in experiment.assign_users(user_ids):
+                pass
+            results["assign_users_per_second"] = users / (time.perf_counter() - start)
+
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def resolve(user_id: str) -> None:
+                async with semaphore:
+                    await new_experiment(storage).set_for_user(user_id)
+
+            sample = user_ids[:min(users, 5000)]
+            start = time.perf_counter()
+            await asyncio.gather(*(resolve(user_id) for user_id in sample))
+            results["set_for_user_per_second"] = len(sample) / (time.perf_counter() - start)
+
+            await experiment.set_for_user(user_ids[0])
+            completed = user_ids[:users // 2]
+            start = time.perf_counter()
+            await experiment.complete_for_users([(user_id, 1.0) for user_id in completed])
+            results["complete_for_users_per_second"] = len(completed) / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await experiment.delete_user_variants()
+            results["delete_user_variants_seconds"] = time.perf_counter() - start
+        finally:
+            storage.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    for name, value in asyncio.run(run(args.users, args.pool_size, args.concurrency)).items():
+        print(f"{name:<32} {value:,.2f}" if isinstance(value, float) else f"{name:<32} {value}")
+
+
+if __name__ == "__main__":
+    main()
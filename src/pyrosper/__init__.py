@@ -6,7 +6,21 @@ from .variant import Variant
 from .symbol import Symbol
 from .user_variant import UserVariant
 from .pick import Pick
+from .bucketing import Bucketing
+from .instrumentation import Instrumentation
+from .lru_cache import LRUCache
+from .resolution_memo import ResolutionMemo
+from .reward_buffer import RewardBuffer
+from .exposure_logger import ExposureEvent, ExposureLogger, ExposureSink
+from .serializable_algorithm import SerializableAlgorithm
+from .columnar_store import ColumnarAssignmentStore, ColumnarExperimentMixin
+from .assignment_snapshot import AssignmentSnapshot, SnapshotExperimentMixin
+from .sqlite_experiment import SQLiteExperiment, SQLiteStorage
+from .key_value_experiment import KeyValueClient, KeyValueExperiment, KeyValuePipeline
+from .assignment import Assignment
+from .experiment_registry import ExperimentRegistry
 from .pyrosper import Pyrosper, pick
+from .resolution import ExperimentResolutionError
 from .base_context import BaseContext
 
 __all__ = [
@@ -19,8 +33,31 @@ __all__ = [
     "Symbol",
     "UserVariant",
     "Pyrosper",
+    "ExperimentRegistry",
+    "Assignment",
     "BaseContext",
     "Pick",
+    "ResolutionMemo",
+    "LRUCache",
+    "Instrumentation",
+    "RewardBuffer",
+    "ExposureLogger",
+    "ExposureSink",
+    "ExposureEvent",
+    "Bucketing",
+    "SerializableAlgorithm",
+    "ColumnarAssignmentStore",
+    "ColumnarExperimentMixin",
+    "AssignmentSnapshot",
+    "SnapshotExperimentMixin",
+    "SQLiteExperiment",
+    "SQLiteStorage",
+    "KeyValueClient",
+    "KeyValueExperiment",
+    "KeyValuePipeline",
+    
+    # Errors
+    "ExperimentResolutionError",
     
     # Functions
     "pick",
@@ -0,0 +1,13 @@
+# Requires NumPy: pip install pyrosper[numpy]
+from .bandit import Bandit, BanditExperimentMixin
+from .epsilon_greedy import EpsilonGreedy
+from .thompson_sampling import ThompsonSampling
+from .ucb1 import UCB1
+
+__all__ = [
+    "Bandit",
+    "BanditExperimentMixin",
+    "EpsilonGreedy",
+    "ThompsonSampling",
+    "UCB1",
+]
@@ -0,0 +1,95 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
+
+import numpy as np
+
+BanditType = TypeVar('BanditType', bound='Bandit')
+
+
+class Bandit(ABC):
+    """
+    Base class for multi-armed bandits whose state is kept in NumPy arrays, one entry per variant.
+
+    select_many() draws variant indexes for many users in one vectorized call, and reward_many() applies
+    many rewards in one update. Batch selection sees the state as it was when the call started.
+    """
+    variant_count: int
+    rng: np.random.Generator
+
+    def __init__(self, variant_count: int, seed: Optional[int] = None):
+        if variant_count < 1:
+            raise ValueError("Empty variants")
+        self.variant_count = variant_count
+        self.rng = np.random.default_rng(seed)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+    def select(self) -> int:
+        return int(self.select_many(1)[0])
+
+    @abstractmethod
+    def select_many(self, count: int) -> np.ndarray:
+        pass
+
+    def reward(self, index: int, score: float) -> None:
+        self.reward_many([index], [score])
+
+    def reward_many(self, indexes: Sequence[int], scores: Sequence[float]) -> None:
+        index_array = np.asarray(indexes, dtype=np.intp)
+        score_array = np.asarray(scores, dtype=np.float64)
+        if index_array.shape != score_array.shape:
+            raise ValueError("indexes and scores must have the same length")
+        if index_array.size and (index_array.min() < 0 or index_array.max() >= self.variant_count):
+            raise ValueError(f"Variant index out of range for {self.variant_count} variants")
+        self._reward_many(index_array, score_array)
+
+    @abstractmethod
+    def _reward_many(self, indexes: np.ndarray, scores: np.ndarray) -> None:
+        pass
+
+    def _best(self, values: np.ndarray, count: int) -> np.ndarray:
+        """Return `count` indexes of the highest values, breaking ties at random."""
+        best = np.flatnonzero(values == values.max())
+        if best.size == 1:
+            return np.full(count, best[0], dtype=np.intp)
+        return self.rng.choice(best, size=count)
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls: Type[BanditType], data: Dict[str, Any]) -> BanditType:
+        pass
+
+
+class BanditExperimentMixin(Generic[BanditType]):
+    """
+    Implements BaseExperiment's get_variant_index, get_variant_indexes, reward_algorithm and
+    reward_algorithm_batch for Bandit algorithms. The adapter still implements storage, including
+    get_algorithm and upsert_algorithm. The mixin takes the experiment's algorithm type, so its methods have
+    BaseExperiment's signatures.
+
+    Usage:
+        class MyExperiment(BanditExperimentMixin[ThompsonSampling], BaseExperiment[ThompsonSampling, ...]):
+            async def get_algorithm(self) -> ThompsonSampling:
+                ...
+    """
+
+    async def get_variant_index(self, algorithm: BanditType) -> int:
+        return algorithm.select()
+
+    async def get_variant_indexes(self, algorithm: BanditType, count: int) -> List[int]:
+        return algorithm.select_many(count).tolist()
+
+    async def reward_algorithm(self, algorithm: BanditType, user_variant_index: int, score: float) -> BanditType:
+        algorithm.reward(user_variant_index, score)
+        return algorithm
+
+    async def reward_algorithm_batch(self, algorithm: BanditType, rewards: List[Tuple[int, float]]) -> BanditType:
+        if rewards:
+            indexes, scores = zip(*rewards)
+            algorithm.reward_many(indexes, scores)
+        return algorithm
@@ -0,0 +1,94 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..mock.mock_experiment import MockExperiment
+from ..mock.mock_variant import MockVariant
+from .bandit import BanditExperimentMixin
+from .epsilon_greedy import EpsilonGreedy
+from .thompson_sampling import ThompsonSampling
+from .ucb1 import UCB1
+
+
+class BanditExperiment(BanditExperimentMixin, MockExperiment):
+    pass
+
+
+class TestBandit:
+    """Tests shared by every Bandit"""
+
+    @pytest.fixture(params=[ThompsonSampling, UCB1, EpsilonGreedy])
+    def bandit(self, request):
+        return request.param(3, seed=1)
+
+    def test_select(self, bandit):
+        """Test select returns a valid index"""
+        assert bandit.select() in (0, 1, 2)
+
+    def test_select_many(self, bandit):
+        """Test select_many returns one valid index per user"""
+        indexes = bandit.select_many(1000)
+        assert indexes.shape == (1000,)
+        assert indexes.min() >= 0 and indexes.max() <= 2
+
+    def test_reward_many_validates(self, bandit):
+        """Test reward_many checks lengths and ranges"""
+        with pytest.raises(ValueError, match="same length"):
+            bandit.reward_many([0, 1], [1.0])
+        with pytest.raises(ValueError, match="out of range"):
+            bandit.reward_many([3], [1.0])
+
+    def test_round_trip(self, bandit):
+        """Test to_dict and from_dict keep the state"""
+        bandit.reward_many([0, 1, 1], [1.0, 0.0, 1.0])
+        restored = type(bandit).from_dict(bandit.to_dict())
+        assert restored.to_dict() == bandit.to_dict()
+
+    def test_converges_to_best_variant(self, bandit):
+        """Test batches of selections and rewards favour the best variant"""
+        rates = np.array([0.1, 0.2, 0.6])
+        rng = np.random.default_rng(2)
+        for _ in range(50):
+            indexes = bandit.select_many(200)
+            bandit.reward_many(indexes, (rng.random(indexes.size) < rates[indexes]).astype(float))
+        assert np.bincount(bandit.select_many(1000), minlength=3).argmax() == 2
+
+    def test_empty_variants(self):
+        """Test a bandit needs at least one variant"""
+        with pytest.raises(ValueError, match="Empty variants"):
+            UCB1(0)
+
+
+class TestBanditExperimentMixin:
+    """Tests for plugging bandits into BaseExperiment"""
+
+    @pytest.fixture
+    def experiment(self):
+        return BanditExperiment(id="id", name="bandit", variants=[MockVariant("a", {}), MockVariant("b", {})], is_enabled=True)
+
+    @pytest.mark.asyncio
+    async def test_get_variant_index(self, experiment):
+        """Test get_variant_index selects through the bandit"""
+        assert await experiment.get_variant_index(UCB1(2, seed=1)) == UCB1(2, seed=1).select()
+
+    @pytest.mark.asyncio
+    async def test_get_variant_indexes(self, experiment):
+        """Test get_variant_indexes selects a batch through the bandit"""
+        indexes = await experiment.get_variant_indexes(UCB1(2, seed=1), 3)
+        assert indexes == UCB1(2, seed=1).select_many(3).tolist()
+        assert indexes in ([0, 1, 0], [1, 0, 1])
+
+    @pytest.mark.asyncio
+    async def test_reward_algorithm(self, experiment):
+        """Test reward_algorithm updates the bandit in place"""
+        algorithm = UCB1(2)
+        assert await experiment.reward_algorithm(algorithm, 1, 1.0) is algorithm
+        assert algorithm.counts.tolist() == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_reward_algorithm_batch(self, experiment):
+        """Test reward_algorithm_batch applies all rewards in one update"""
+        algorithm = UCB1(2)
+        await experiment.reward_algorithm_batch(algorithm, [(0, 1.0), (1, 0.5), (0, 0.0)])
+        assert algorithm.counts.tolist() == [2, 1]
+        assert algorithm.sums.tolist() == [1.0, 0.5]
@@ -0,0 +1,40 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .bandit import Bandit
+
+
+class EpsilonGreedy(Bandit):
+    """Epsilon-greedy: a random variant with probability `epsilon`, otherwise the best mean score."""
+    epsilon: float
+    counts: np.ndarray
+    sums: np.ndarray
+
+    def __init__(self, variant_count: int, epsilon: float = 0.1, seed: Optional[int] = None):
+        super().__init__(variant_count, seed)
+        if not 0 <= epsilon <= 1:
+            raise ValueError("epsilon must be between 0 and 1")
+        self.epsilon = epsilon
+        self.counts = np.zeros(variant_count, dtype=np.float64)
+        self.sums = np.zeros(variant_count, dtype=np.float64)
+
+    def select_many(self, count: int) -> np.ndarray:
+        means = self.sums / np.maximum(self.counts, 1)
+        exploit = self._best(means, count)
+        explore = self.rng.integers(self.variant_count, size=count)
+        return np.where(self.rng.random(count) < self.epsilon, explore, exploit)
+
+    def _reward_many(self, indexes: np.ndarray, scores: np.ndarray) -> None:
+        np.add.at(self.counts, indexes, 1)
+        np.add.at(self.sums, indexes, scores)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"epsilon": self.epsilon, "counts": self.counts.tolist(), "sums": self.sums.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EpsilonGreedy":
+        bandit = cls(len(data["counts"]), epsilon=data["epsilon"])
+        bandit.counts = np.asarray(data["counts"], dtype=np.float64)
+        bandit.sums = np.asarray(data["sums"], dtype=np.float64)
+        return bandit
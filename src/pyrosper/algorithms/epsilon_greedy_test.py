@@ -0,0 +1,27 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from .epsilon_greedy import EpsilonGreedy
+
+
+class TestEpsilonGreedy:
+    """Tests for the EpsilonGreedy class"""
+
+    def test_greedy_without_exploration(self):
+        """Test epsilon 0 always exploits the best mean"""
+        bandit = EpsilonGreedy(3, epsilon=0)
+        bandit.reward_many([0, 1, 2], [0.1, 0.9, 0.5])
+        assert bandit.select_many(10).tolist() == [1] * 10
+
+    def test_explores_at_rate(self):
+        """Test roughly epsilon of selections explore"""
+        bandit = EpsilonGreedy(2, epsilon=0.5, seed=3)
+        bandit.reward(0, 1.0)
+        share = (bandit.select_many(10000) == 1).mean()
+        assert 0.2 < share < 0.3
+
+    def test_epsilon_range(self):
+        """Test epsilon is validated"""
+        with pytest.raises(ValueError, match="epsilon must be between 0 and 1"):
+            EpsilonGreedy(2, epsilon=1.5)
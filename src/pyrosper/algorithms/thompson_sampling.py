@@ -0,0 +1,38 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .bandit import Bandit
+
+
+class ThompsonSampling(Bandit):
+    """Beta-Bernoulli Thompson sampling. Scores must be between 0 and 1."""
+    alpha: np.ndarray
+    beta: np.ndarray
+
+    def __init__(self, variant_count: int, prior_alpha: float = 1.0, prior_beta: float = 1.0, seed: Optional[int] = None):
+        super().__init__(variant_count, seed)
+        if prior_alpha <= 0 or prior_beta <= 0:
+            raise ValueError("priors must be positive")
+        self.alpha = np.full(variant_count, prior_alpha, dtype=np.float64)
+        self.beta = np.full(variant_count, prior_beta, dtype=np.float64)
+
+    def select_many(self, count: int) -> np.ndarray:
+        samples = self.rng.beta(self.alpha, self.beta, size=(count, self.variant_count))
+        return samples.argmax(axis=1)
+
+    def _reward_many(self, indexes: np.ndarray, scores: np.ndarray) -> None:
+        if scores.size and (scores.min() < 0 or scores.max() > 1):
+            raise ValueError("ThompsonSampling scores must be between 0 and 1")
+        np.add.at(self.alpha, indexes, scores)
+        np.add.at(self.beta, indexes, 1 - scores)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha.tolist(), "beta": self.beta.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ThompsonSampling":
+        bandit = cls(len(data["alpha"]))
+        bandit.alpha = np.asarray(data["alpha"], dtype=np.float64)
+        bandit.beta = np.asarray(data["beta"], dtype=np.float64)
+        return bandit
@@ -0,0 +1,26 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from .thompson_sampling import ThompsonSampling
+
+
+class TestThompsonSampling:
+    """Tests for the ThompsonSampling class"""
+
+    def test_reward_many(self):
+        """Test rewards update alpha and beta, including repeated indexes"""
+        bandit = ThompsonSampling(2)
+        bandit.reward_many([0, 0, 1], [1.0, 1.0, 0.0])
+        assert bandit.alpha.tolist() == [3.0, 1.0]
+        assert bandit.beta.tolist() == [1.0, 2.0]
+
+    def test_scores_must_be_probabilities(self):
+        """Test scores outside [0, 1] are rejected"""
+        with pytest.raises(ValueError, match="between 0 and 1"):
+            ThompsonSampling(2).reward(0, 2.0)
+
+    def test_priors_must_be_positive(self):
+        """Test priors are validated"""
+        with pytest.raises(ValueError, match="priors must be positive"):
+            ThompsonSampling(2, prior_alpha=0)
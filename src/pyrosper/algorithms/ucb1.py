@@ -0,0 +1,70 @@
+import heapq
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .bandit import Bandit
+
+
+class UCB1(Bandit):
+    """
+    Upper confidence bound (UCB1). Variants that were never rewarded are selected first, in turn, continuing
+    from the previous call. Once all were, each selection in a batch counts towards its variant's bound before
+    the next one is made, so a cohort is spread instead of all going to the current best variant.
+    """
+    counts: np.ndarray
+    sums: np.ndarray
+    # Position in the rotation of untried variants; starts at random so fresh copies don't all begin at 0
+    _turn: int
+
+    def __init__(self, variant_count: int, seed: Optional[int] = None):
+        super().__init__(variant_count, seed)
+        self.counts = np.zeros(variant_count, dtype=np.float64)
+        self.sums = np.zeros(variant_count, dtype=np.float64)
+        self._turn = int(self.rng.integers(variant_count))
+
+    def select_many(self, count: int) -> np.ndarray:
+        untried = np.flatnonzero(self.counts == 0)
+        if untried.size:
+            indexes = untried[(self._turn + np.arange(count)) % untried.size]
+            self._turn = (self._turn + count) % untried.size
+            return indexes
+        if count == 1:
+            means = self.sums / self.counts
+            return self._best(means + np.sqrt(2 * np.log(self.counts.sum()) / self.counts), 1)
+        return self._spread(count)
+
+    def _spread(self, count: int) -> np.ndarray:
+        """Select `count` variants one at a time, counting each selection towards its variant's bound."""
+        means = (self.sums / self.counts).tolist()
+        exploration = 2 * np.log(self.counts.sum())
+        counts = self.counts.tolist()
+        # Random tie-breakers, so variants with equal bounds share the batch
+        ties = self.rng.random(self.variant_count).tolist()
+        heap = [(-self._bound(means[i], exploration, counts[i]), ties[i], i) for i in range(self.variant_count)]
+        heapq.heapify(heap)
+        indexes = np.empty(count, dtype=np.intp)
+        for position in range(count):
+            _, tie, index = heap[0]
+            indexes[position] = index
+            counts[index] += 1
+            heapq.heapreplace(heap, (-self._bound(means[index], exploration, counts[index]), tie, index))
+        return indexes
+
+    @staticmethod
+    def _bound(mean: float, exploration: float, count: float) -> float:
+        return mean + (exploration / count) ** 0.5
+
+    def _reward_many(self, indexes: np.ndarray, scores: np.ndarray) -> None:
+        np.add.at(self.counts, indexes, 1)
+        np.add.at(self.sums, indexes, scores)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": self.counts.tolist(), "sums": self.sums.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UCB1":
+        bandit = cls(len(data["counts"]))
+        bandit.counts = np.asarray(data["counts"], dtype=np.float64)
+        bandit.sums = np.asarray(data["sums"], dtype=np.float64)
+        return bandit
@@ -0,0 +1,39 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from .ucb1 import UCB1
+
+
+class TestUCB1:
+    """Tests for the UCB1 class"""
+
+    def test_untried_variants_first(self):
+        """Test variants without rewards are selected in turn"""
+        bandit = UCB1(3)
+        bandit.reward(1, 1.0)
+        indexes = bandit.select_many(4).tolist()
+        assert indexes in ([0, 2, 0, 2], [2, 0, 2, 0])
+
+    def test_untried_variants_rotate_across_calls(self):
+        """Test single selections continue the rotation instead of always returning the first untried variant"""
+        bandit = UCB1(3, seed=1)
+        indexes = [bandit.select() for _ in range(6)]
+        assert sorted(indexes[:3]) == [0, 1, 2]
+        assert indexes[3:] == indexes[:3]
+
+    def test_batch_is_spread(self):
+        """Test a batch counts each selection, so it isn't all assigned to the current best variant"""
+        bandit = UCB1(3, seed=1)
+        bandit.reward_many([0, 1, 2], [0.5, 0.6, 0.4])
+        counts = np.bincount(bandit.select_many(1000), minlength=3)
+        assert counts.sum() == 1000
+        assert (counts > 0).all()
+        assert counts.argmax() == 1
+        assert bandit.counts.tolist() == [1, 1, 1]
+
+    def test_selects_highest_bound(self):
+        """Test the highest upper confidence bound wins"""
+        bandit = UCB1(2)
+        bandit.reward_many([0] * 100 + [1] * 100, [0.1] * 100 + [0.9] * 100)
+        assert bandit.select_many(5).tolist() == [1] * 5
@@ -0,0 +1,88 @@
+from typing import TYPE_CHECKING, Any, FrozenSet, Iterable, List, Optional, Sequence, Set, Type, TypeVar
+
+from .pick import Pick
+
+if TYPE_CHECKING:
+    from .experiment_registry import ExperimentRegistry
+
+PickType = TypeVar("PickType")
+
+
+class Assignment:
+    """
+    Per-request assignment of variants for an ExperimentRegistry: one variant index per experiment slot.
+
+    It offers the same request-facing methods as Pyrosper (set_for_user, has_pick, pick, pick_many), so a
+    BaseContext.setup() can return `registry.assignment()` instead of building a new Pyrosper.
+    """
+    __slots__ = ("registry", "variant_indexes", "user_id", "_enabled_slots", "_unexposed_slots")
+
+    registry: "ExperimentRegistry"
+    variant_indexes: List[int]
+    user_id: Optional[Any]
+    # Slots of enabled experiments, set when resolved for a user; only these are logged as exposures
+    _enabled_slots: FrozenSet[int]
+    # Enabled slots whose first pick since set_for_user, or use_variant, wasn't logged yet
+    _unexposed_slots: Set[int]
+
+    def __init__(self, registry: "ExperimentRegistry", variant_indexes: Optional[Sequence[int]] = None):
+        self.registry = registry
+        if variant_indexes is None:
+            self.variant_indexes = [0] * len(registry)
+        else:
+            if len(variant_indexes) != len(registry):
+                raise ValueError(f"Expected {len(registry)} variant indexes, got {len(variant_indexes)}")
+            self.variant_indexes = list(variant_indexes)
+        self.user_id = None
+        self._enabled_slots = frozenset()
+        self._unexposed_slots = set()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(user_id={self.user_id!r}, variant_indexes={self.variant_indexes})"
+
+    async def set_for_user(self, user_id: Optional[Any] = None, concurrency: Optional[int] = None) -> None:
+        self.variant_indexes, enabled = await self.registry._resolve(user_id, concurrency)
+        self.user_id = user_id
+        # Without a user there is nobody to log an exposure for
+        self._enabled_slots = frozenset(slot for slot, is_enabled in enumerate(enabled) if is_enabled and user_id)
+        self._unexposed_slots = set(self._enabled_slots)
+        Pick.clear_cache()
+
+    def use_variant(self, experiment_name: str, variant_name: str) -> None:
+        slot = self.registry.slots_by_name.get(experiment_name)
+        if slot is None:
+            raise ValueError(f'Experiment "{experiment_name}" not found')
+        index = self.registry.variant_slots[slot].get(variant_name)
+        if index is None:
+            raise ValueError(f'Variant with name "{variant_name}" not found')
+        self.variant_indexes[slot] = index
+        if slot in self._enabled_slots:
+            self._unexposed_slots.add(slot)
+        Pick.clear_cache()
+
+    def has_pick(self, symbol: object) -> bool:
+        return symbol in self.registry.slots_by_symbol
+
+    def pick(self, symbol: object, type_of_pick: Optional[Type[PickType]] = None) -> PickType:
+        slot = self.registry.slots_by_symbol.get(symbol)
+        if slot is None:
+            raise ValueError(f"Unable to find {symbol}")
+        value = self.registry.pick_tables[slot][self.variant_indexes[slot]].get(symbol)
+        if value is None:
+            raise RuntimeError(f"`unable to find {symbol}")
+        if (
+            type_of_pick
+            and (self.registry.experiments[slot].debug or self.registry.verified_pick_types.get(symbol) is not type_of_pick)
+            and not isinstance(value, type_of_pick)
+        ):
+            raise TypeError(f"Expected type {type_of_pick}, but got {value} for symbol {symbol}")
+        unexposed_slots = self._unexposed_slots
+        if slot in unexposed_slots:
+            unexposed_slots.discard(slot)
+            experiment = self.registry.experiments[slot]
+            if experiment.exposure_logger is not None:
+                experiment.exposure_logger.log(experiment, self.user_id, self.variant_indexes[slot])
+        return value
+
+    def pick_many(self, symbols: Iterable[object], type_of_pick: Optional[Type[PickType]] = None) -> List[PickType]:
+        return [self.pick(symbol, type_of_pick) for symbol in symbols]
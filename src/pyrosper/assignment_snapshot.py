@@ -0,0 +1,273 @@
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from concurrent.futures import Executor
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .bucketing import Bucketing
+from .columnar_store import ColumnarAssignmentStore, _EMPTY, _MAX_LOAD, _ExperimentBase, _hash_user_id, _probe
+
+_MAGIC = b"PYRSNAP1"
+# Written in native byte order, so a reader on a machine with the other order fails instead of misreading
+_BYTE_ORDER_MARK = 0x0102030405060708
+_HEADER = struct.Struct("=8sQQQ")
+
+PathType = Union[str, "os.PathLike[str]"]
+
+
+def write_snapshot(path: PathType, store: ColumnarAssignmentStore) -> None:
+    """
+    Write a store's table to a snapshot file. The file is written next to `path`, synced and then renamed
+    over it, so readers see either the old or the new snapshot, never a partial one.
+    """
+    path = os.fspath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    with store._lock:
+        header = _HEADER.pack(_MAGIC, _BYTE_ORDER_MARK, store.capacity, len(store))
+        keys = store._keys.tobytes()
+        indexes = store._indexes.tobytes()
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".pyrosper-snapshot-")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(header)
+            file.write(keys)
+            file.write(indexes)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        directory_descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_descriptor)
+        finally:
+            os.close(directory_descriptor)
+
+
+def export_snapshot(path: PathType, assignments: Iterable[Tuple[Any, int]], capacity: int = 1024) -> int:
+    """Write (user id, variant index) assignments, e.g. read from a database, to a snapshot file."""
+    store = ColumnarAssignmentStore(capacity)
+    store.set_many(assignments)
+    write_snapshot(path, store)
+    return len(store)
+
+
+def _bucket_chunk(experiment_name: str, variant_count: int, bucketing: Bucketing, user_ids: List[Any]) -> Tuple[bytes, bytes]:
+    keys = array("Q", (_hash_user_id(user_id) for user_id in user_ids))
+    indexes = array("B", (bucketing.index_for(experiment_name, user_id, variant_count) for user_id in user_ids))
+    return keys.tobytes(), indexes.tobytes()
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def export_bucketed_snapshot(
+    path: PathType,
+    experiment_name: str,
+    variant_count: int,
+    user_ids: Iterable[Any],
+    bucketing: Bucketing,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 10000,
+) -> int:
+    """
+    Precompute the bucketed assignment of every user and write them to a snapshot file, returning how many
+    were written. With an executor, e.g. a ProcessPoolExecutor, chunks of users are hashed in parallel.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    store = ColumnarAssignmentStore()
+    bucket_chunk = partial(_bucket_chunk, experiment_name, variant_count, bucketing)
+    chunks = _chunks(user_ids, chunk_size)
+    results = map(bucket_chunk, chunks) if executor is None else executor.map(bucket_chunk, chunks)
+    for key_bytes, index_bytes in results:
+        keys = array("Q")
+        keys.frombytes(key_bytes)
+        store._set_hashed_many(keys, index_bytes)
+    write_snapshot(path, store)
+    return len(store)
+
+
+class AssignmentSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file written by write_snapshot().
+
+    Lookups read the mapped table directly, so every worker process mapping the same file shares one copy
+    in the page cache. Call refresh() to pick up a snapshot that was swapped in since the file was opened.
+    Users passed to remove() are hidden until then, so the new snapshot should be exported after removing them.
+
+    Usage:
+        snapshot = AssignmentSnapshot("/var/lib/app/greeting.snapshot")
+        index = snapshot.get(user_id)
+    """
+    path: str
+
+    def __init__(self, path: PathType):
+        self.path = os.fspath(path)
+        self._table: Optional[Tuple[mmap.mmap, memoryview, memoryview, int, int]] = None
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._removed: Set[Any] = set()
+        self._removed_all = False
+        self.refresh()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.path!r}, size={len(self)})"
+
+    def __len__(self) -> int:
+        return self._open_table()[4]
+
+    def __contains__(self, user_id: Any) -> bool:
+        return self.get(user_id) is not None
+
+    @staticmethod
+    def _file_stat(stat: os.stat_result) -> Tuple[int, int, int]:
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _open_table(self) -> Tuple[mmap.mmap, memoryview, memoryview, int, int]:
+        if self._table is None:
+            raise ValueError("Snapshot is closed")
+        return self._table
+
+    def refresh(self) -> bool:
+        """Map the file again if it was replaced since it was opened, returning whether it was."""
+        with open(self.path, "rb") as file:
+            stat = self._file_stat(os.fstat(file.fileno()))
+            if self._table is not None and stat == self._stat:
+                return False
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        if len(view) < _HEADER.size:
+            raise ValueError(f"{self.path} is not a pyrosper snapshot")
+        magic, byte_order_mark, capacity, size = _HEADER.unpack_from(view)
+        if magic != _MAGIC:
+            raise ValueError(f"{self.path} is not a pyrosper snapshot")
+        if byte_order_mark != _BYTE_ORDER_MARK:
+            raise ValueError(f"{self.path} was written with a different byte order")
+        # Lookups probe until an empty slot, so a table that is full, or isn't a power of two, would never end
+        if capacity < 1 or capacity & (capacity - 1):
+            raise ValueError(f"{self.path} has an invalid capacity {capacity}")
+        if size > capacity * _MAX_LOAD:
+            raise ValueError(f"{self.path} has {size} assignments, too many for capacity {capacity}")
+        keys_end = _HEADER.size + 8 * capacity
+        if len(view) != keys_end + capacity:
+            raise ValueError(f"{self.path} is truncated")
+        keys = view[_HEADER.size:keys_end].cast("Q")
+        indexes = view[keys_end:]
+        # The previous mapping is released once no lookup holds it any more
+        self._table = (mapped, keys, indexes, capacity - 1, size)
+        self._stat = stat
+        self._removed = set()
+        self._removed_all = False
+        return True
+
+    def get(self, user_id: Any) -> Optional[int]:
+        _, keys, indexes, mask, _ = self._open_table()
+        if self._removed_all or user_id in self._removed:
+            return None
+        slot = _probe(keys, mask, _hash_user_id(user_id))
+        if keys[slot] == _EMPTY:
+            return None
+        return indexes[slot]
+
+    def get_many(self, user_ids: Iterable[Any]) -> Dict[Any, int]:
+        """Return the variant index of every user in the snapshot, keyed by user id. Missing users are left out."""
+        _, keys, indexes, mask, _ = self._open_table()
+        if self._removed_all:
+            return {}
+        removed = self._removed
+        found = {}
+        for user_id in user_ids:
+            if user_id in removed:
+                continue
+            slot = _probe(keys, mask, _hash_user_id(user_id))
+            if keys[slot] != _EMPTY:
+                found[user_id] = indexes[slot]
+        return found
+
+    def remove(self, user_ids: Iterable[Any]) -> None:
+        """Hide users whose assignment was deleted since the export, until refresh() maps a new snapshot."""
+        self._removed.update(user_ids)
+
+    def remove_all(self) -> None:
+        """Hide every user, e.g. once all assignments of the experiment were deleted, until refresh() maps a new one."""
+        self._removed_all = True
+
+    def close(self) -> None:
+        if self._table is not None:
+            mapped, keys, indexes, _, _ = self._table
+            self._table = None
+            keys.release()
+            indexes.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # A concurrent lookup still holds the mapping; it is closed when released
+                pass
+
+    def __enter__(self) -> "AssignmentSnapshot":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.close()
+        return False
+
+
+class SnapshotExperimentMixin(_ExperimentBase):
+    """
+    Serves BaseExperiment's user variant lookups from an AssignmentSnapshot, falling back to the adapter's
+    own get_user_variant for users missing from it. Writes still go to the adapter's storage. Deletes, e.g.
+    on completion, also remove the users from the snapshot, so a completed user isn't found and rewarded again.
+
+    Usage:
+        class MyExperiment(SnapshotExperimentMixin, MyDatabaseExperiment):
+            pass
+
+        experiment.assignment_snapshot = AssignmentSnapshot(path)
+    """
+    assignment_snapshot: Optional[AssignmentSnapshot] = None
+
+    async def get_user_variant(self, user_id: Any, experiment_id: Any) -> Optional[Any]:
+        snapshot = self.assignment_snapshot
+        if snapshot is not None:
+            index = snapshot.get(user_id)
+            if index is not None:
+                return self.new_user_variant(user_id, experiment_id, index)
+        return await super().get_user_variant(user_id, experiment_id)
+
+    async def get_user_variants_for_users(self, user_ids: List[Any], experiment_id: Any) -> Dict[Any, Any]:
+        snapshot = self.assignment_snapshot
+        if snapshot is None:
+            return await super().get_user_variants_for_users(user_ids, experiment_id)
+        user_variants = {
+            user_id: self.new_user_variant(user_id, experiment_id, index)
+            for user_id, index in snapshot.get_many(user_ids).items()
+        }
+        missing = [user_id for user_id in user_ids if user_id not in user_variants]
+        if missing:
+            user_variants.update(await super().get_user_variants_for_users(missing, experiment_id))
+        return user_variants
+
+    async def delete_user_variant(self, user_variant: Any) -> None:
+        if self.assignment_snapshot is not None:
+            self.assignment_snapshot.remove([user_variant.user_id])
+        await super().delete_user_variant(user_variant)
+
+    async def delete_user_variants_for_users(self, user_variants: List[Any]) -> None:
+        if self.assignment_snapshot is not None:
+            self.assignment_snapshot.remove(user_variant.user_id for user_variant in user_variants)
+        await super().delete_user_variants_for_users(user_variants)
+
+    async def delete_user_variants(self) -> None:
+        if self.assignment_snapshot is not None:
+            self.assignment_snapshot.remove_all()
+        await super().delete_user_variants()
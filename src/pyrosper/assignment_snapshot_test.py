@@ -0,0 +1,168 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from .assignment_snapshot import (
+    _BYTE_ORDER_MARK,
+    _HEADER,
+    _MAGIC,
+    AssignmentSnapshot,
+    SnapshotExperimentMixin,
+    export_bucketed_snapshot,
+    export_snapshot,
+    write_snapshot,
+)
+from .bucketing import Bucketing
+from .columnar_store import ColumnarAssignmentStore
+from .mock.mock_experiment import MockExperiment
+from .mock.mock_user_variant import MockUserVariant
+from .mock.mock_variant import MockVariant
+from .symbol import Symbol
+
+
+class SnapshotMockExperiment(SnapshotExperimentMixin, MockExperiment):
+    pass
+
+
+class TestAssignmentSnapshot:
+    """Tests for snapshot export and the AssignmentSnapshot reader"""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return tmp_path / "experiment.snapshot"
+
+    def test_export_and_read(self, path):
+        """Test exported assignments are read back from the mapped file"""
+        assert export_snapshot(path, [("user_1", 0), ("user_2", 3), ("user_1", 1)]) == 2
+        with AssignmentSnapshot(path) as snapshot:
+            assert len(snapshot) == 2
+            assert snapshot.get("user_1") == 1
+            assert snapshot.get("user_2") == 3
+            assert snapshot.get("user_3") is None
+            assert "user_2" in snapshot
+            assert snapshot.get_many(["user_1", "user_3"]) == {"user_1": 1}
+        with pytest.raises(ValueError, match="Snapshot is closed"):
+            snapshot.get("user_1")
+
+    def test_write_store_matches(self, path):
+        """Test a snapshot of a store answers every lookup like the store"""
+        store = ColumnarAssignmentStore()
+        store.set_many((user_id, user_id % 7) for user_id in range(3000))
+        store.delete_many(range(0, 3000, 3))
+        write_snapshot(path, store)
+        with AssignmentSnapshot(path) as snapshot:
+            assert len(snapshot) == len(store)
+            for user_id in range(3000):
+                assert snapshot.get(user_id) == store.get(user_id)
+
+    def test_refresh_after_swap(self, path):
+        """Test refresh maps a replaced snapshot and leaves no temporary files"""
+        export_snapshot(path, [("user_1", 0)])
+        snapshot = AssignmentSnapshot(path)
+        assert snapshot.refresh() is False
+        export_snapshot(path, [("user_1", 2), ("user_2", 1)])
+        assert snapshot.get("user_1") == 0
+        assert snapshot.refresh() is True
+        assert snapshot.get("user_1") == 2
+        assert len(snapshot) == 2
+        assert os.listdir(path.parent) == [path.name]
+        snapshot.close()
+
+    def test_invalid_file(self, path):
+        """Test files that are not snapshots are rejected"""
+        path.write_bytes(b"not a snapshot at all, but long enough")
+        with pytest.raises(ValueError, match="is not a pyrosper snapshot"):
+            AssignmentSnapshot(path)
+
+    @pytest.mark.parametrize("capacity, size, message", [
+        (0, 0, "invalid capacity 0"),
+        (12, 1, "invalid capacity 12"),
+        (8, 8, "8 assignments, too many for capacity 8"),
+    ])
+    def test_invalid_header(self, path, capacity, size, message):
+        """Test headers that would make lookups probe forever are rejected"""
+        header = _HEADER.pack(_MAGIC, _BYTE_ORDER_MARK, capacity, size)
+        path.write_bytes(header + b"\xff" * (9 * capacity))
+        with pytest.raises(ValueError, match=message):
+            AssignmentSnapshot(path)
+
+    def test_export_bucketed_with_process_pool(self, path):
+        """Test bucketed assignments computed in worker processes match Bucketing"""
+        bucketing = Bucketing(weights=[1, 2, 1], salt="salt")
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            count = export_bucketed_snapshot(path, "experiment", 3, range(1000), bucketing, executor, chunk_size=100)
+        assert count == 1000
+        with AssignmentSnapshot(path) as snapshot:
+            for user_id in range(1000):
+                assert snapshot.get(user_id) == bucketing.index_for("experiment", user_id, 3)
+
+
+class TestSnapshotExperimentMixin:
+    """Tests for the SnapshotExperimentMixin class"""
+
+    @pytest.fixture
+    def experiment(self, tmp_path):
+        path = tmp_path / "experiment.snapshot"
+        export_snapshot(path, [("user_1", 1)])
+        experiment = SnapshotMockExperiment(
+            id="experiment_1",
+            name="snapshot",
+            variants=[MockVariant("a", {Symbol("s"): 1}), MockVariant("b", {Symbol("s"): 2})],
+            is_enabled=True,
+        )
+        experiment.assignment_snapshot = AssignmentSnapshot(path)
+        yield experiment
+        experiment.assignment_snapshot.close()
+
+    @pytest.mark.asyncio
+    async def test_get_user_variant(self, experiment, mocker):
+        """Test lookups are served from the snapshot, falling back to the adapter"""
+        fallback = MockUserVariant(experiment_id="experiment_1", user_id="user_2", index=0)
+        get_user_variant = mocker.patch.object(MockExperiment, 'get_user_variant', mocker.AsyncMock(return_value=fallback))
+        user_variant = await experiment.get_user_variant("user_1", "experiment_1")
+        assert isinstance(user_variant, MockUserVariant)
+        assert user_variant.index == 1
+        get_user_variant.assert_not_called()
+        assert await experiment.get_user_variant("user_2", "experiment_1") is fallback
+
+    @pytest.mark.asyncio
+    async def test_get_user_variants_for_users(self, experiment, mocker):
+        """Test bulk lookups only ask the adapter for users missing from the snapshot"""
+        fallback = MockUserVariant(experiment_id="experiment_1", user_id="user_2", index=0)
+        get_user_variants = mocker.patch.object(
+            MockExperiment, 'get_user_variants_for_users', mocker.AsyncMock(return_value={"user_2": fallback})
+        )
+        user_variants = await experiment.get_user_variants_for_users(["user_1", "user_2"], "experiment_1")
+        get_user_variants.assert_called_once_with(["user_2"], "experiment_1")
+        assert user_variants["user_1"].index == 1
+        assert user_variants["user_2"] is fallback
+
+    @pytest.mark.asyncio
+    async def test_complete_for_user_rewards_once(self, experiment, mocker):
+        """Test a user completing again isn't found in the snapshot and rewarded again"""
+        reward_algorithm = mocker.patch.object(experiment, 'reward_algorithm', mocker.AsyncMock())
+        for _ in range(3):
+            await experiment.complete_for_user("user_1", 1.0)
+        reward_algorithm.assert_called_once()
+        assert reward_algorithm.call_args.args[1] == 1
+        assert experiment.assignment_snapshot.get("user_1") is None
+
+    @pytest.mark.asyncio
+    async def test_complete_for_users_rewards_once(self, experiment, mocker):
+        """Test bulk completions remove the completed users from the snapshot"""
+        reward_algorithm = mocker.patch.object(experiment, 'reward_algorithm', mocker.AsyncMock())
+        await experiment.complete_for_users([("user_1", 1.0)])
+        await experiment.complete_for_users([("user_1", 1.0)])
+        reward_algorithm.assert_called_once()
+        assert await experiment.get_user_variants_for_users(["user_1"], "experiment_1") == {}
+
+    @pytest.mark.asyncio
+    async def test_delete_user_variants_hides_snapshot(self, experiment):
+        """Test deleting every assignment hides the snapshot until a new one is mapped"""
+        snapshot = experiment.assignment_snapshot
+        await experiment.delete_user_variants()
+        assert await experiment.get_user_variant("user_1", "experiment_1") is None
+        export_snapshot(snapshot.path, [("user_1", 0)])
+        assert snapshot.refresh()
+        assert snapshot.get("user_1") == 0
@@ -0,0 +1,135 @@
+import pytest
+
+from .assignment import Assignment
+from .exposure_logger import ExposureLogger
+from .mock.mock_experiment import MockExperiment
+from .mock.mock_exposure_sink import MockExposureSink
+from .mock.mock_pyrosper import MockPyrosper
+from .mock.mock_variant import MockVariant
+from .symbol import Symbol
+
+
+class TestAssignment:
+    """Tests for the Assignment class"""
+
+    @pytest.fixture
+    def greeting(self):
+        return Symbol("greeting")
+
+    @pytest.fixture
+    def registry(self, greeting):
+        return MockPyrosper().with_experiment(MockExperiment(
+            name="greeting_experiment",
+            variants=[MockVariant("control", {greeting: "Hello!"}), MockVariant("friendly", {greeting: "Hi there!"})],
+            is_enabled=True,
+        )).compile()
+
+    def test_init_with_variant_indexes(self, registry, greeting):
+        """Test an assignment can be created with known variant indexes"""
+        assignment = Assignment(registry, [1])
+        assert assignment.pick(greeting, str) == "Hi there!"
+
+    def test_init_with_wrong_number_of_variant_indexes(self, registry):
+        """Test variant indexes must match the registry's experiments"""
+        with pytest.raises(ValueError, match="Expected 1 variant indexes, got 2"):
+            Assignment(registry, [0, 1])
+
+    def test_has_pick(self, registry, greeting):
+        """Test has_pick reads the registry's symbols"""
+        assignment = registry.assignment()
+        assert assignment.has_pick(greeting) is True
+        assert assignment.has_pick(Symbol("missing")) is False
+
+    def test_pick_not_found(self, registry):
+        """Test pick raises ValueError for unknown symbols"""
+        with pytest.raises(ValueError, match="Unable to find"):
+            registry.assignment().pick(Symbol("missing"), str)
+
+    def test_pick_wrong_type(self, registry, greeting):
+        """Test pick raises TypeError when the value has the wrong type"""
+        with pytest.raises(TypeError, match="Expected type <class 'int'>, but got"):
+            registry.assignment().pick(greeting, int)
+
+    def test_pick_many(self, registry, greeting):
+        """Test pick_many resolves symbols in order"""
+        assert registry.assignment([1]).pick_many([greeting, greeting], str) == ["Hi there!", "Hi there!"]
+
+    def test_use_variant(self, registry, greeting):
+        """Test use_variant switches a single experiment's variant"""
+        assignment = registry.assignment()
+        assignment.use_variant("greeting_experiment", "friendly")
+        assert assignment.pick(greeting, str) == "Hi there!"
+
+    def test_use_variant_not_found(self, registry):
+        """Test use_variant raises ValueError for unknown names"""
+        assignment = registry.assignment()
+        with pytest.raises(ValueError, match='Experiment "missing" not found'):
+            assignment.use_variant("missing", "friendly")
+        with pytest.raises(ValueError, match='Variant with name "missing" not found'):
+            assignment.use_variant("greeting_experiment", "missing")
+
+    @pytest.mark.asyncio
+    async def test_set_for_user(self, registry):
+        """Test set_for_user records the user and resolved indexes"""
+        assignment = registry.assignment()
+        await assignment.set_for_user("user123")
+        assert assignment.user_id == "user123"
+        assert assignment.variant_indexes == [0]
+
+    def test_pick_verified_type(self, greeting):
+        """Test picks with a declared, verified type skip the per-access type check"""
+        experiment = MockExperiment(
+            name="greeting_experiment",
+            variants=[MockVariant("control", {greeting: "Hello!"})],
+            is_enabled=True,
+        )
+        experiment.pick_types = {greeting: str}
+        registry = MockPyrosper().with_experiment(experiment).compile()
+        assert registry.verified_pick_types == {greeting: str}
+        assert registry.assignment().pick(greeting, str) == "Hello!"
+        with pytest.raises(TypeError):
+            registry.assignment().pick(greeting, int)
+
+    @pytest.mark.asyncio
+    async def test_pick_logs_exposure(self, registry, greeting, mocker):
+        """Test the first pick from an experiment after set_for_user, and after use_variant, is logged"""
+        logger = ExposureLogger(MockExposureSink())
+        mocker.patch.object(MockExperiment, 'exposure_logger', logger)
+        assignment = registry.assignment()
+        assignment.pick(greeting, str)
+        assert len(logger) == 0
+        await assignment.set_for_user("user123")
+        assignment.pick(greeting, str)
+        assignment.pick(greeting, str)
+        assignment.use_variant("greeting_experiment", "friendly")
+        assignment.pick(greeting, str)
+        assert [entry[:3] for entry in logger._queue] == [
+            ("user123", registry.experiments[0], 0),
+            ("user123", registry.experiments[0], 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_pick_does_not_log_exposure_for_disabled_experiment_or_without_user(self, greeting, mocker):
+        """Test exposures are only logged for enabled experiments of a user"""
+        farewell = Symbol("farewell")
+        registry = MockPyrosper().with_experiment(MockExperiment(
+            name="greeting_experiment",
+            variants=[MockVariant("control", {greeting: "Hello!"})],
+            is_enabled=True,
+        )).with_experiment(MockExperiment(
+            name="farewell_experiment",
+            variants=[MockVariant("control", {farewell: "Bye!"}), MockVariant("friendly", {farewell: "See you!"})],
+            is_enabled=False,
+        )).compile()
+        logger = ExposureLogger(MockExposureSink())
+        mocker.patch.object(MockExperiment, 'exposure_logger', logger)
+        assignment = registry.assignment()
+        await assignment.set_for_user(None)
+        assignment.pick(greeting, str)
+        assert len(logger) == 0
+        await assignment.set_for_user("user123")
+        assignment.pick(greeting, str)
+        assignment.pick(farewell, str)
+        assignment.use_variant("farewell_experiment", "friendly")
+        assignment.pick(farewell, str)
+        assert [entry[:2] for entry in logger._queue] == [("user123", registry.experiments[0])]
@@ -1,4 +1,7 @@
-from abc import ABC, abstractmethod, ABCMeta
+import copy
+import functools
+import inspect
+from abc import ABC, ABCMeta
 from contextlib import ContextDecorator
 from contextvars import ContextVar
 from typing import Optional, Generic, TypeVar, Type
@@ -35,6 +38,12 @@ class BaseContext(ABC, ContextDecorator, Generic[PyrosperType], metaclass=BaseMe
             pyrosper = get_current()
             # Use pyrosper instance
             pass
+
+    Usage as async context manager, awaiting setup_async():
+        async with BaseContext() as pyrosper:
+            pass
+
+    Decorated coroutine functions keep the context active until they return.
     """
 
     def __repr__(self):
@@ -43,10 +52,14 @@ class BaseContext(ABC, ContextDecorator, Generic[PyrosperType], metaclass=BaseMe
     
     def __init__(self):
         """Initialize the context."""
+        # One of setup() and setup_async() is required, checked here so intermediate base classes can omit both
+        cls = type(self)
+        if cls.setup is BaseContext.setup and cls.setup_async is BaseContext.setup_async:
+            raise TypeError(f"{cls.__name__} must implement setup() or setup_async()")
         self.instance_token = None
+        self.pick_cache_token = None
         self.pyrosper_instance: Optional[PyrosperType] = None
 
-    @abstractmethod
     def setup(self) -> PyrosperType:
         """
         Setup and return pyrosper. Override this method in subclasses to provide custom setup.
@@ -63,26 +76,83 @@ class BaseContext(ABC, ContextDecorator, Generic[PyrosperType], metaclass=BaseMe
         """
         # Default implementation - subclasses can override
         pass
+
+    async def setup_async(self) -> PyrosperType:
+        """
+        Setup and return pyrosper when entered with `async with`. Override this method in subclasses that need
+        to await, e.g. to call set_for_user() as part of entering the context.
+
+        Returns:
+            The pyrosper instance to use in this context.
+        """
+        # Default implementation - falls back to the sync setup
+        return self.setup()
+
+    async def teardown_context_async(self) -> None:
+        """
+        Teardown the context when exited with `async with`. Override this method in subclasses to provide
+        custom async cleanup.
+        """
+        # Default implementation - falls back to the sync teardown
+        self.teardown_context()
         
     def __enter__(self) -> PyrosperType:
         # Setup context - call the setup method to create/get the pyrosper instance
         self.pyrosper_instance = self.setup()
 
-        # Store pyrosper instance
+        # Store pyrosper instance, with a fresh pick cache for this scope
         self.instance_token = self.__class__.typed_instance_storage.set(self.pyrosper_instance)
+        self.pick_cache_token = Pick.cache_storage.set({})
         
         return self.pyrosper_instance
         
     def __exit__(self, exc_type, exc_val, exc_tb):
-        # Teardown context
-        self.teardown_context()
-        
-        # Reset context variables
+        # Teardown context, resetting the context variables even if it raises
+        try:
+            self.teardown_context()
+        finally:
+            self._reset_storage()
+
+        return False
+
+    async def __aenter__(self) -> PyrosperType:
+        self.pyrosper_instance = await self.setup_async()
+        self.instance_token = self.__class__.typed_instance_storage.set(self.pyrosper_instance)
+        self.pick_cache_token = Pick.cache_storage.set({})
+        return self.pyrosper_instance
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await self.teardown_context_async()
+        finally:
+            self._reset_storage()
+        return False
+
+    def _reset_storage(self) -> None:
+        if self.pick_cache_token is not None:
+            Pick.cache_storage.reset(self.pick_cache_token)
+            self.pick_cache_token = None
         if self.instance_token is not None:
             self.__class__.typed_instance_storage.reset(self.instance_token)
+            self.instance_token = None
 
-        return False
+    def _recreate_cm(self):
+        # Each decorated call gets its own copy, so concurrent calls don't share the context token
+        context = copy.copy(self)
+        context.instance_token = None
+        context.pick_cache_token = None
+        context.pyrosper_instance = None
+        return context
+
+    def __call__(self, func):
+        if not inspect.iscoroutinefunction(func):
+            return super().__call__(func)
 
+        @functools.wraps(func)
+        async def inner(*args, **kwargs):
+            async with self._recreate_cm():
+                return await func(*args, **kwargs)
+        return inner
 
     @classmethod
     def get_current(cls) -> PyrosperType:
@@ -97,6 +167,7 @@ class BaseContext(ABC, ContextDecorator, Generic[PyrosperType], metaclass=BaseMe
     @classmethod
     def pick(cls, typ: Type[T], symbol: Symbol) -> Pick[T]:
         """
-        Get a pick from the current pyrosper instance.
+        Get a pick from the current pyrosper instance, resolved once per context scope. The type is checked by
+        the pyrosper instance.
         """
-        return Pick(typ, symbol, lambda: cls.get_current().pick(symbol, typ))
+        return Pick(typ, symbol, lambda: cls.get_current().pick(symbol, typ), cached=True, check_type=False)
@@ -4,11 +4,13 @@ Tests for PyrosperContext with strong typing.
 
 import asyncio
 import pytest
+from .base_context import BaseContext
+from .pick import Pick
 from .symbol import Symbol
 from .mock.mock_experiment import MockExperiment
 from .mock.mock_pyrosper import MockPyrosper
 from .mock.mock_variant import MockVariant
-from .mock.mock_context import MockContext
+from .mock.mock_context import MockContext, mock_symbol
 
 
 class TestStronglyTypedContext:
@@ -124,3 +126,102 @@ class TestStronglyTypedContext:
 
         assert results[0] == f"{user_1} {value_a}"
         assert results[1] == f"{user_2} {value_b}"
+
+    def test_subclass_must_implement_setup(self):
+        """Test a context without setup() or setup_async() is rejected when instantiated"""
+        class AppContext(BaseContext[MockPyrosper]):
+            def teardown_context(self) -> None:
+                pass
+
+        class AppAsyncContext(AppContext):
+            async def setup_async(self) -> MockPyrosper:
+                return MockPyrosper()
+
+        with pytest.raises(TypeError, match="AppContext must implement setup\\(\\) or setup_async\\(\\)"):
+            AppContext()
+        assert AppAsyncContext() is not None
+
+    def test_failing_teardown_resets_context(self):
+        """Test the context variables are reset when teardown_context raises"""
+        class FailingTeardownContext(MockContext):
+            def teardown_context(self):
+                raise RuntimeError("teardown failed")
+
+        with pytest.raises(RuntimeError, match="teardown failed"):
+            with FailingTeardownContext():
+                pass
+        with pytest.raises(RuntimeError, match="No pyrosper instance found in context"):
+            MockContext.get_current()
+        assert Pick.cache_storage.get() is None
+
+    @pytest.mark.asyncio
+    async def test_context_as_async_context_manager(self):
+        """Test Context as async context manager awaits setup_async and teardown_context_async"""
+        calls = []
+
+        class AsyncContext(MockContext):
+            async def setup_async(self) -> MockPyrosper:
+                pyrosper = self.setup()
+                await pyrosper.set_for_user("user_1")
+                calls.append("setup")
+                return pyrosper
+
+            async def teardown_context_async(self):
+                calls.append("teardown")
+
+        async with AsyncContext() as pyrosper:
+            assert AsyncContext.get_current() is pyrosper
+            assert pyrosper.pick(mock_symbol, str) == "expected_result"
+        assert calls == ["setup", "teardown"]
+        with pytest.raises(RuntimeError, match="No pyrosper instance found in context"):
+            MockContext.get_current()
+
+    @pytest.mark.asyncio
+    async def test_async_context_defaults_to_sync_setup(self):
+        """Test that setup_async and teardown_context_async fall back to the sync methods"""
+        teardown_called = False
+
+        class SyncContext(MockContext):
+            def teardown_context(self):
+                nonlocal teardown_called
+                teardown_called = True
+
+        async with SyncContext() as pyrosper:
+            assert isinstance(pyrosper, MockPyrosper)
+        assert teardown_called
+
+    @pytest.mark.asyncio
+    async def test_async_context_resets_on_exception(self):
+        """Test that the async context resets the context variable when the body raises"""
+        with pytest.raises(ValueError):
+            async with MockContext():
+                raise ValueError("test exception")
+        with pytest.raises(RuntimeError, match="No pyrosper instance found in context"):
+            MockContext.get_current()
+
+    @pytest.mark.asyncio
+    async def test_decorator_on_coroutine_function(self):
+        """Test the context stays active for the whole coroutine, including across awaits"""
+        @MockContext()
+        async def handler(delay):
+            pyrosper = MockContext.get_current()
+            await asyncio.sleep(delay)
+            assert MockContext.get_current() is pyrosper
+            return pyrosper
+
+        assert asyncio.iscoroutinefunction(handler)
+        first, second = await asyncio.gather(handler(0.02), handler(0.01))
+        assert isinstance(first, MockPyrosper)
+        assert first is not second
+        with pytest.raises(RuntimeError, match="No pyrosper instance found in context"):
+            MockContext.get_current()
+
+    def test_decorator_on_function(self):
+        """Test the context is active inside a decorated sync function"""
+        @MockContext()
+        def handler():
+            return MockContext.get_current()
+
+        assert isinstance(handler(), MockPyrosper)
+        with pytest.raises(RuntimeError, match="No pyrosper instance found in context"):
+            MockContext.get_current()
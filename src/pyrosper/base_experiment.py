@@ -1,7 +1,16 @@
+import functools
 from abc import ABC, abstractmethod
-from typing import List, Optional, TypeVar, Generic, Self, Type, Any
+from itertools import islice
+from typing import AsyncIterator, ClassVar, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar, Generic, Self, Type, Any
 from .variant import Variant
 from .user_variant import UserVariant
+from .bucketing import Bucketing
+from .exposure_logger import ExposureLogger
+from .instrumentation import INSTRUMENTED_METHODS, Instrumentation, instrument_method
+from .lru_cache import LRUCache
+from .pick import Pick
+from .resolution_memo import ResolutionMemo
+from .reward_buffer import RewardBuffer
 
 AlgorithmType = TypeVar('AlgorithmType')
 UserVariantType = TypeVar('UserVariantType', bound='UserVariant')
@@ -11,19 +20,99 @@ ExperimentIdType = TypeVar('ExperimentIdType')
 UserIdType = TypeVar('UserIdType')
 UserVariantIdType = TypeVar('UserVariantIdType')
 PickType = TypeVar('PickType')
+# Exposure user id of an experiment that was not set for a user yet
+_UNSET = object()
+ItemType = TypeVar('ItemType')
+
+
+def _invalidating_delete_user_variants(call: Any) -> Any:
+    """Wrap an adapter's delete_user_variants so cached assignments of the experiment are dropped with them."""
+    @functools.wraps(call)
+    async def delete_user_variants(self: "BaseExperiment") -> None:
+        experiment_id = self.id
+        if experiment_id is None and self.assignment_cache is not None:
+            experiment = await self._fetch_experiment()
+            experiment_id = experiment.id if experiment else None
+        await call(self)
+        if experiment_id is not None:
+            self.invalidate_assignment_cache(experiment_id)
+    setattr(delete_user_variants, "__pyrosper_invalidates__", True)
+    return delete_user_variants
+
+
+def _chunked(items: Iterable[ItemType], size: int) -> Iterator[List[ItemType]]:
+    if size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
 
 class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, ExperimentIdType, UserIdType, UserVariantIdType]):
     variant_index: int
     name: str
-    variants: List[VariantType]
+    _variants: List[VariantType]
+    _variant_indexes: Dict[str, int]
     _is_enabled: bool
     id: Optional[ExperimentIdType]
-
-    def __init__(self, name: str, variants: List[VariantType], id: Optional[ExperimentIdType] = None, *args: Any, **kwargs: Any):
+    # When set, variant indexes come from a stable hash of the user id and user variants are never stored.
+    bucketing: Optional[Bucketing]
+    # Process-wide cache of experiment records keyed by class, storage and experiment name, e.g.
+    # LRUCache(max_size=256, ttl=60).
+    experiment_cache: ClassVar[Optional[LRUCache[Tuple[Any, ...], Any]]] = None
+    # Process-wide cache of (algorithm version, algorithm) snapshots used to choose variants for new users,
+    # keyed like experiment_cache.
+    algorithm_cache: ClassVar[Optional[LRUCache[Tuple[Any, ...], Tuple[Any, Any]]]] = None
+    # When set, complete_for_user buffers rewards here and they are applied in batches.
+    reward_buffer: ClassVar[Optional[RewardBuffer]] = None
+    # Process-wide cache of stored variant indexes keyed by class, storage, experiment id and user id.
+    assignment_cache: ClassVar[Optional[LRUCache[Tuple[Any, ...], int]]] = None
+    # Declared type of each pick symbol, checked against every variant when the experiment is registered.
+    pick_types: Dict[object, type]
+    _verified_pick_types: Dict[object, type]
+    # When True, picks are type checked on every access even if their declared type was verified.
+    debug: ClassVar[bool] = False
+    # When set, calls to the storage and algorithm methods are counted and timed per experiment.
+    instrumentation: ClassVar[Optional[Instrumentation]] = None
+    # When set, the first pick after set_for_user, and after use_variant, is logged as an exposure.
+    exposure_logger: ClassVar[Optional[ExposureLogger]] = None
+    _exposure_user_id: Any = _UNSET
+    _exposure_pending: bool = False
+    # Set by ExperimentRegistry, whose experiments keep no per-user state
+    _shared: bool = False
+    # When True, set_for_user stores the variant chosen for a new user, built with new_user_variant.
+    store_new_user_variants: ClassVar[bool] = False
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        call = cls.delete_user_variants
+        if not getattr(call, "__isabstractmethod__", False) and not getattr(call, "__pyrosper_invalidates__", False):
+            cls.delete_user_variants = _invalidating_delete_user_variants(call)
+        for method in INSTRUMENTED_METHODS:
+            call = getattr(cls, method, None)
+            if call is None or getattr(call, "__isabstractmethod__", False) or getattr(call, "__pyrosper_instrumented__", False):
+                continue
+            setattr(cls, method, instrument_method(method, call))
+
+    def __init__(self, name: str, variants: List[VariantType], id: Optional[ExperimentIdType] = None, *args: Any, bucketing: Optional[Bucketing] = None, pick_types: Optional[Mapping[object, type]] = None, **kwargs: Any):
         self.variant_index = 0
         self.name = name
+        self.pick_types = dict(pick_types or {})
         self.variants = variants
         self.id = id
+        self.bucketing = bucketing
+
+    @property
+    def variants(self) -> List[VariantType]:
+        return self._variants
+
+    @variants.setter
+    def variants(self, variants: List[VariantType]) -> None:
+        self._variants = variants
+        self._variant_indexes = {}
+        self._verified_pick_types = {}
+        for index, variant in enumerate(variants):
+            self._variant_indexes.setdefault(variant.name, index)
 
     @property
     @abstractmethod
@@ -35,34 +124,177 @@ class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, E
     def is_enabled(self, value: bool) -> None:
         self._is_enabled = value
 
-    async def _get_user_variant_index(self, user_id: "UserIdType") -> Optional[int]:
-        experiment = await self.get_experiment()
-        if experiment and experiment.id:
-            user_variant = await self.get_user_variant(user_id, experiment.id)
-            if user_variant:
-                return user_variant.index
+    async def _fetch_experiment(self) -> Optional['Self']:
+        memo = ResolutionMemo.current()
+        if memo is None:
+            return await self._get_cached_experiment()
+        return await memo.fetch((self, "experiment"), self._get_cached_experiment)
+
+    async def _get_cached_experiment(self) -> Optional['Self']:
+        cache = self.experiment_cache
+        if cache is None:
+            return await self.get_experiment()
+        key = self._cache_key(self.name)
+        experiment = cache.get(key)
+        if experiment is None:
+            experiment = await self.get_experiment()
+            if experiment is not None:
+                cache.set(key, experiment)
+        return experiment
+
+    def invalidate_experiment_cache(self) -> None:
+        if self.experiment_cache is not None:
+            self.experiment_cache.invalidate(self._cache_key(self.name))
+
+    def storage_key(self) -> Any:
+        """
+        Identity of the storage this experiment reads, such as its connection or client. It is part of the
+        keys of the process-wide caches, so experiments of different storages that share names or ids
+        never read each other's entries. The default, None, leaves only the experiment's class in the keys.
+        """
         return None
 
+    def _cache_key(self, *key: Any) -> Tuple[Any, ...]:
+        return (type(self), self.storage_key(), *key)
+
+    async def _fetch_algorithm(self) -> AlgorithmType:
+        memo = ResolutionMemo.current()
+        if memo is None:
+            return await self._get_cached_algorithm()
+        return await memo.fetch((self, "algorithm"), self._get_cached_algorithm)
+
+    async def _get_cached_algorithm(self) -> AlgorithmType:
+        cache = self.algorithm_cache
+        if cache is None:
+            return await self.get_algorithm()
+        version = await self.get_algorithm_version()
+        key = self._cache_key(self.name)
+        snapshot = cache.get(key)
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1]
+        algorithm = await self.get_algorithm()
+        cache.set(key, (version, algorithm))
+        return algorithm
+
+    def invalidate_algorithm_cache(self) -> None:
+        if self.algorithm_cache is not None:
+            self.algorithm_cache.invalidate(self._cache_key(self.name))
+
+    async def _fetch_user_variant(self, user_id: "UserIdType", experiment_id: "ExperimentIdType") -> Optional["UserVariantType"]:
+        memo = ResolutionMemo.current()
+        if memo is None:
+            return await self.get_user_variant(user_id=user_id, experiment_id=experiment_id)
+        return await memo.fetch(
+            (self, "user_variant", user_id, experiment_id),
+            lambda: self.get_user_variant(user_id=user_id, experiment_id=experiment_id),
+        )
+
+    def _remember(self, key: tuple, value: Any) -> None:
+        memo = ResolutionMemo.current()
+        if memo is not None:
+            memo.prime((self, *key), value)
+
+    def _prime_user_variant(self, user_id: "UserIdType", experiment_id: "ExperimentIdType", user_variant: Optional["UserVariantType"]) -> None:
+        self._remember(("user_variant", user_id, experiment_id), user_variant)
+
+    def _forget(self) -> None:
+        memo = ResolutionMemo.current()
+        if memo is not None:
+            memo.forget(self)
+
+    async def _get_user_variant_index(self, user_id: "UserIdType", cached: bool = True) -> Optional[int]:
+        """
+        Return the user's stored variant index. With `cached=False` the user's assignment_cache entry is dropped
+        and storage is read, for completions, which must not reward an assignment deleted elsewhere.
+        """
+        experiment = await self._fetch_experiment()
+        if not experiment or not experiment.id:
+            return None
+        cache = self.assignment_cache
+        if cache is None:
+            user_variant = await self._fetch_user_variant(user_id, experiment.id)
+            return user_variant.index if user_variant else None
+        key = self._cache_key(experiment.id, user_id)
+        if not cached:
+            cache.invalidate(key)
+        elif (index := cache.get(key)) is not None:
+            return index
+        user_variant = await self._fetch_user_variant(user_id, experiment.id)
+        if not user_variant:
+            return None
+        if cached:
+            cache.set(key, user_variant.index)
+        return user_variant.index
+
     async def _upsert_user_variant_index(self, user_id: "UserIdType", index: int) -> None:
-        experiment = await self.get_experiment()
+        experiment = await self._fetch_experiment()
         if not experiment or not experiment.id:
             return
-        user_variant = await self.get_user_variant(user_id=user_id, experiment_id=experiment.id)
-        if user_variant:
-            await self.upsert_user_variant(user_variant=user_variant)
+        user_variant = await self._fetch_user_variant(user_id, experiment.id)
+        if not user_variant:
+            if self.store_new_user_variants:
+                await self._store_new_user_variant(user_id, experiment.id, index)
+            return
+        await self.upsert_user_variant(user_variant=user_variant)
+        self._prime_user_variant(user_id, experiment.id, user_variant)
+        if self.assignment_cache is not None:
+            self.assignment_cache.set(self._cache_key(experiment.id, user_id), user_variant.index)
+
+    async def _store_new_user_variant(self, user_id: "UserIdType", experiment_id: "ExperimentIdType", index: int) -> None:
+        """Store the variant chosen for a user who had none, so later requests of the user get the same one."""
+        user_variant = self.new_user_variant(user_id, experiment_id, index)
+        await self.upsert_user_variant(user_variant=user_variant)
+        self._prime_user_variant(user_id, experiment_id, user_variant)
+        if self.assignment_cache is not None:
+            self.assignment_cache.set(self._cache_key(experiment_id, user_id), index)
 
     async def _remove_index(self, user_id: "UserIdType") -> None:
-        experiment = await self.get_experiment()
+        experiment = await self._fetch_experiment()
         if not experiment or not experiment.id:
             raise ValueError("Experiment not found")
-        user_variant = await self.get_user_variant(user_id=user_id, experiment_id=experiment.id)
+        self.invalidate_assignment_cache(experiment.id, user_id)
+        user_variant = await self._fetch_user_variant(user_id, experiment.id)
         if user_variant:
             await self.delete_user_variant(user_variant=user_variant)
+            self._prime_user_variant(user_id, experiment.id, None)
+
+    def invalidate_assignment_cache(self, experiment_id: Optional["ExperimentIdType"] = None, user_id: Optional["UserIdType"] = None) -> None:
+        """
+        Drop cached assignments of this experiment, or of a single user. delete_user_variants calls this
+        itself; adapters that delete user variants some other way should call it.
+        """
+        cache = self.assignment_cache
+        if cache is None:
+            return
+        if experiment_id is None:
+            experiment_id = self.id
+        if user_id is not None:
+            cache.invalidate(self._cache_key(experiment_id, user_id))
+        else:
+            prefix = self._cache_key(experiment_id)
+            cache.invalidate_where(lambda key: key[:-1] == prefix)
 
     def _check_variants(self) -> None:
         if len(self.variants) < 1:
             raise ValueError("Empty variants")
 
+    def check_pick_types(self) -> None:
+        """
+        Check every variant's picks against the declared pick_types, raising TypeError on a mismatch. Once
+        checked, picks requested with their declared type skip the per-access isinstance check.
+        """
+        symbols = set(self.variants[0].picks.keys()) if self.variants else set()
+        for symbol, type_of_pick in self.pick_types.items():
+            if symbol not in symbols:
+                raise ValueError(f"Pick type declared for unknown symbol {symbol}")
+            for variant in self.variants:
+                value = variant.picks.get(symbol)
+                if not isinstance(value, type_of_pick):
+                    raise TypeError(
+                        f'Expected type {type_of_pick}, but got {value} for symbol {symbol} in variant "{variant.name}"'
+                    )
+        self._verified_pick_types = dict(self.pick_types)
+
     @abstractmethod
     async def get_experiment(self) -> Optional['Self']:
         pass
@@ -79,14 +311,61 @@ class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, E
     async def get_user_variant(self, user_id: "UserIdType", experiment_id: "ExperimentIdType") -> Optional["UserVariantType"]:
         pass
 
+    async def get_user_variants_for_user(
+        self,
+        user_id: "UserIdType",
+        experiment_ids: List["ExperimentIdType"],
+    ) -> Optional[Dict["ExperimentIdType", "UserVariantType"]]:
+        """
+        Optional bulk lookup of a user's variants across several experiments, keyed by experiment id.
+
+        Pyrosper.set_for_user calls this once per experiment class instead of calling get_user_variant once
+        per experiment. Experiment ids missing from the result have no user variant. Return None, as this
+        default does, to fall back to get_user_variant.
+        """
+        return None
+
+    def new_user_variant(self, user_id: "UserIdType", experiment_id: "ExperimentIdType", index: int) -> "UserVariantType":
+        """
+        Create the adapter's user variant for a new assignment. assign_users needs it, and so does set_for_user
+        when store_new_user_variants is set.
+        """
+        raise NotImplementedError(f"{type(self).__name__} must implement new_user_variant to store new assignments")
+
     @abstractmethod
     async def upsert_user_variant(self, user_variant: UserVariantType) -> None:
         pass
 
+    async def upsert_user_variants(self, user_variants: List[UserVariantType]) -> None:
+        """Optional bulk upsert used by assign_users. The default calls upsert_user_variant for each."""
+        for user_variant in user_variants:
+            await self.upsert_user_variant(user_variant=user_variant)
+
     @abstractmethod
     async def delete_user_variant(self, user_variant: UserVariantType) -> None:
         pass
 
+    async def get_user_variants_for_users(
+        self,
+        user_ids: List["UserIdType"],
+        experiment_id: "ExperimentIdType",
+    ) -> Dict["UserIdType", "UserVariantType"]:
+        """
+        Optional bulk lookup of several users' variants in one experiment, keyed by user id, used by
+        complete_for_users. Users without a variant are left out. The default calls get_user_variant for each.
+        """
+        user_variants = {}
+        for user_id in user_ids:
+            user_variant = await self.get_user_variant(user_id=user_id, experiment_id=experiment_id)
+            if user_variant:
+                user_variants[user_id] = user_variant
+        return user_variants
+
+    async def delete_user_variants_for_users(self, user_variants: List[UserVariantType]) -> None:
+        """Optional bulk delete used by complete_for_users. The default calls delete_user_variant for each."""
+        for user_variant in user_variants:
+            await self.delete_user_variant(user_variant=user_variant)
+
     @abstractmethod
     async def delete_user_variants(self) -> None:
         pass
@@ -95,6 +374,19 @@ class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, E
     async def get_algorithm(self) -> AlgorithmType:
         pass
 
+    async def get_variant_indexes(self, algorithm: AlgorithmType, count: int) -> List[int]:
+        """Choose variant indexes for `count` new users. The default calls get_variant_index for each."""
+        return [await self.get_variant_index(algorithm) for _ in range(count)]
+
+    async def get_algorithm_version(self) -> Optional[Any]:
+        """
+        Optional cheap version token of the stored algorithm, such as a row version or update timestamp.
+
+        When algorithm_cache is set, a cached snapshot is reused only while this value is unchanged. The
+        default returns None, so snapshots are refreshed by the cache's ttl alone.
+        """
+        return None
+
     @abstractmethod
     async def get_variant_index(self, algorithm: AlgorithmType) -> int:
         pass
@@ -103,6 +395,15 @@ class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, E
     async def reward_algorithm(self, algorithm: AlgorithmType, user_variant_index: int, score: float) -> AlgorithmType:
         pass
 
+    async def reward_algorithm_batch(self, algorithm: AlgorithmType, rewards: List[Tuple[int, float]]) -> AlgorithmType:
+        """
+        Apply several (variant index, score) rewards to an algorithm. The default calls reward_algorithm for
+        each reward in order; override it when the algorithm can take them all at once.
+        """
+        for user_variant_index, score in rewards:
+            algorithm = await self.reward_algorithm(algorithm, user_variant_index, score)
+        return algorithm
+
     @abstractmethod
     async def upsert_algorithm(self, algorithm: AlgorithmType) -> None:
         pass
@@ -115,32 +416,155 @@ class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, E
         self.variant_index = 0
         self.is_enabled = False
         self.id = None
+        self._exposure_user_id = _UNSET
+        self._exposure_pending = False
+        Pick.clear_cache()
 
     async def complete_for_user(self, user_id: "UserIdType", score: float) -> None:
-        if not self.is_enabled:
+        with ResolutionMemo.scope():
+            if not await self._is_enabled_for_completion():
+                return
+            if self.bucketing is not None:
+                user_variant_index = self.bucketing.index_for(self.name, user_id, len(self.variants))
+            else:
+                user_variant_index = await self._get_user_variant_index(user_id, cached=False)
+                if user_variant_index is None:
+                    return
+                # Room is reserved before the user variant is deleted, so a full buffer can't lose the reward
+                if self.reward_buffer is not None:
+                    await self.reward_buffer.reserve()
+                try:
+                    await self._remove_index(user_id)
+                except BaseException:
+                    if self.reward_buffer is not None:
+                        self.reward_buffer.release()
+                    raise
+            if self.reward_buffer is not None:
+                await self.reward_buffer.add(self, user_variant_index, score, reserved=self.bucketing is None)
+                return
+            algorithm = await self.get_algorithm()
+            updated_algorithm = await self.reward_algorithm(algorithm, user_variant_index, score)
+            await self.upsert_algorithm(updated_algorithm)
+            self.invalidate_algorithm_cache()
+            self._remember(("algorithm",), updated_algorithm)
+
+    async def assign_users(self, user_ids: Iterable["UserIdType"], chunk_size: int = 1000) -> AsyncIterator[int]:
+        """
+        Assign variants to a cohort of users ahead of time, yielding how many users are assigned after each
+        chunk.
+
+        The algorithm is fetched once. Indexes are chosen with get_variant_indexes and written with
+        upsert_user_variants, `chunk_size` users at a time, built with new_user_variant. Existing assignments
+        of these users are overwritten. With bucketing nothing needs to be stored, so users are only counted.
+        """
+        experiment = await self._fetch_experiment()
+        if not experiment or not experiment.id:
+            raise ValueError("Experiment not found")
+        algorithm = None if self.bucketing is not None else await self._fetch_algorithm()
+        assigned = 0
+        for chunk in _chunked(user_ids, chunk_size):
+            if algorithm is not None:
+                indexes = await self.get_variant_indexes(algorithm, len(chunk))
+                await self.upsert_user_variants([
+                    self.new_user_variant(user_id, experiment.id, index) for user_id, index in zip(chunk, indexes)
+                ])
+                if self.assignment_cache is not None:
+                    for user_id, index in zip(chunk, indexes):
+                        self.assignment_cache.set(self._cache_key(experiment.id, user_id), index)
+            assigned += len(chunk)
+            yield assigned
+
+    async def complete_for_users(self, completions: Iterable[Tuple["UserIdType", float]]) -> None:
+        """
+        Reward a batch of (user id, score) completions with one bulk lookup, one bulk delete and a single
+        algorithm update. Like complete_for_user, only a user's first completion is rewarded. With bucketing
+        no assignment is deleted, so that only holds within the batch.
+        """
+        first_scores: Dict["UserIdType", float] = {}
+        for user_id, score in completions:
+            first_scores.setdefault(user_id, score)
+        if not first_scores:
             return
-        user_variant_index = await self._get_user_variant_index(user_id)
-        if user_variant_index is None:
+        with ResolutionMemo.scope():
+            if not await self._is_enabled_for_completion():
+                return
+            if self.bucketing is not None:
+                rewards = [
+                    (self.bucketing.index_for(self.name, user_id, len(self.variants)), score)
+                    for user_id, score in first_scores.items()
+                ]
+            else:
+                experiment = await self._fetch_experiment()
+                if not experiment or not experiment.id:
+                    return
+                user_variants = await self.get_user_variants_for_users(list(first_scores), experiment.id)
+                if not user_variants:
+                    return
+                rewards = [
+                    (user_variants[user_id].index, score)
+                    for user_id, score in first_scores.items()
+                    if user_id in user_variants
+                ]
+                if self.reward_buffer is not None:
+                    await self.reward_buffer.reserve(len(rewards))
+                try:
+                    await self.delete_user_variants_for_users(list(user_variants.values()))
+                except BaseException:
+                    if self.reward_buffer is not None:
+                        self.reward_buffer.release(len(rewards))
+                    raise
+                for user_id in user_variants:
+                    self.invalidate_assignment_cache(experiment.id, user_id)
+                    self._prime_user_variant(user_id, experiment.id, None)
+            if self.reward_buffer is not None:
+                await self.reward_buffer.add_many(self, rewards, reserved=self.bucketing is None)
+                return
+            await self.apply_rewards(rewards)
+
+    async def _is_enabled_for_completion(self) -> bool:
+        """
+        Experiments shared by an ExperimentRegistry are never set for a user, so their is_enabled stays at its
+        constructor value and the stored record decides instead.
+        """
+        if not self._shared:
+            return self.is_enabled
+        experiment = await self._fetch_experiment()
+        return bool(experiment and experiment.is_enabled)
+
+    async def apply_rewards(self, rewards: List[Tuple[int, float]]) -> None:
+        """Apply (variant index, score) rewards with a single algorithm read and write."""
+        if not rewards:
             return
-        await self._remove_index(user_id)
         algorithm = await self.get_algorithm()
-        updated_algorithm = await self.reward_algorithm(algorithm, user_variant_index, score)
+        updated_algorithm = await self.reward_algorithm_batch(algorithm, rewards)
         await self.upsert_algorithm(updated_algorithm)
+        self.invalidate_algorithm_cache()
+        self._remember(("algorithm",), updated_algorithm)
 
     async def set_for_user(self, user_id: Optional["UserIdType"] = None) -> None:
-        experiment = await self.get_experiment()
-        if experiment:
-            self.is_enabled = bool(experiment.is_enabled)
-            self.id = experiment.id
-            await self.set_variant_index_for_user(user_id)
-            return
-        self.reset()
+        with ResolutionMemo.scope():
+            experiment = await self._fetch_experiment()
+            if experiment:
+                self.is_enabled = bool(experiment.is_enabled)
+                self.id = experiment.id
+                await self.set_variant_index_for_user(user_id)
+                # Only users who entered a running experiment were exposed to it
+                self._exposure_user_id = user_id if user_id and self.is_enabled else _UNSET
+                self._exposure_pending = self._exposure_user_id is not _UNSET and self.exposure_logger is not None
+            else:
+                self.reset()
+        Pick.clear_cache()
+
+    def has_variant(self, variant_name: str) -> bool:
+        return variant_name in self._variant_indexes
 
     def use_variant(self, variant_name: str) -> None:
-        variant = next((v for v in self.variants if v.name == variant_name), None)
-        if not variant:
+        index = self._variant_indexes.get(variant_name)
+        if index is None:
             raise ValueError(f'Variant with name "{variant_name}" not found')
-        self.variant_index = self.variants.index(variant)
+        self.variant_index = index
+        self._exposure_pending = self._exposure_user_id is not _UNSET and self.exposure_logger is not None
+        Pick.clear_cache()
 
     def safe_enable(self) -> None:
         self.is_enabled = True
@@ -149,24 +573,46 @@ class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, E
         self.is_enabled = False
 
     async def set_variant_index_for_user(self, user_id: Optional["UserIdType"] = None) -> None:
-        algorithm = await self.get_algorithm()
+        self.variant_index = await self.select_variant_index(user_id)
+        Pick.clear_cache()
+
+    async def select_variant_index(self, user_id: Optional["UserIdType"] = None) -> int:
+        """Look up or choose the user's variant index without changing this experiment's state."""
         if not user_id:
-            self.variant_index = await self.get_variant_index(algorithm)
-            return
+            return await self.get_variant_index(await self._fetch_algorithm())
+
+        if self.bucketing is not None:
+            return self.bucketing.index_for(self.name, user_id, len(self.variants))
 
         existing_user_variant_index = await self._get_user_variant_index(user_id)
         if isinstance(existing_user_variant_index, int):
-            self.variant_index = existing_user_variant_index
-            return
-
-        self.variant_index = await self.get_variant_index(algorithm)
-        await self._upsert_user_variant_index(user_id, self.variant_index)
+            return existing_user_variant_index
+
+        variant_index = await self.get_variant_index(await self._fetch_algorithm())
+        await self._upsert_user_variant_index(user_id, variant_index)
+        return variant_index
+
+    async def resolve_for_user(self, user_id: Optional["UserIdType"] = None) -> int:
+        """
+        Return the variant index set_for_user would use, without changing this experiment's state, so a
+        single experiment can be shared by concurrent requests.
+        """
+        return (await self._resolve_for_user(user_id))[0]
+
+    async def _resolve_for_user(self, user_id: Optional["UserIdType"] = None) -> Tuple[int, bool]:
+        """Return resolve_for_user's variant index and whether the stored experiment is enabled."""
+        with ResolutionMemo.scope():
+            experiment = await self._fetch_experiment()
+            if not experiment:
+                return 0, False
+            return await self.select_variant_index(user_id), bool(experiment.is_enabled)
 
     async def get_variant(self, user_id: "UserIdType") -> Optional[Variant]:
         self._check_variants()
         if not self.is_enabled:
             return None
-        await self.set_variant_index_for_user(user_id)
+        with ResolutionMemo.scope():
+            await self.set_variant_index_for_user(user_id)
         return self.variants[self.variant_index]
 
     def has_pick(self, symbol: object) -> bool:
@@ -179,10 +625,22 @@ class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, E
         value = self.variants[variant_index].get_pick(symbol)
         if value is None:
             raise RuntimeError(f"`unable to find {symbol}")
-        if type_of_pick and not isinstance(value, type_of_pick):
+        if (
+            type_of_pick
+            and (self.debug or self._verified_pick_types.get(symbol) is not type_of_pick)
+            and not isinstance(value, type_of_pick)
+        ):
             raise TypeError(f"Expected type {type_of_pick}, but got {value} for symbol {symbol}")
+        if self._exposure_pending:
+            self._log_exposure(variant_index)
         return value
 
+    def _log_exposure(self, variant_index: int) -> None:
+        self._exposure_pending = False
+        logger = self.exposure_logger
+        if logger is not None and self.is_enabled:
+            logger.log(self, self._exposure_user_id, variant_index)
+
     async def enable(self) -> None:
         experiment = await self.get_experiment()
         if not experiment:
@@ -191,12 +649,19 @@ class BaseExperiment(ABC, Generic[AlgorithmType, VariantType, UserVariantType, E
         await self.upsert_algorithm(new_algorithm)
         experiment.is_enabled = True
         await self.upsert_experiment(experiment)
+        self.invalidate_experiment_cache()
+        self.invalidate_algorithm_cache()
+        self._forget()
 
     async def disable(self) -> None:
         experiment = await self.get_experiment()
         if not experiment:
             raise ValueError("Experiment not found")
         await self.delete_user_variants()
+        self.invalidate_assignment_cache(experiment.id)
         await self.delete_experiment(self)
         await self.delete_algorithm()
+        self.invalidate_experiment_cache()
+        self.invalidate_algorithm_cache()
+        self._forget()
         self.reset()
\ No newline at end of file
@@ -3,8 +3,15 @@ from unittest.mock import AsyncMock, MagicMock
 from typing import List
 from .mock.mock_algorithm import MockAlgorithm
 from .mock.mock_experiment import MockExperiment
+from .mock.mock_exposure_sink import MockExposureSink
 from .mock.mock_variant import MockVariant
 from .mock.mock_user_variant import MockUserVariant
+from .base_experiment import BaseExperiment
+from .bucketing import Bucketing
+from .exposure_logger import ExposureLogger
+from .lru_cache import LRUCache
+from .resolution_memo import ResolutionMemo
+from .symbol import Symbol
 
 
 id: str
@@ -88,6 +95,14 @@ def test_use_variant_when_variant_found():
     mock_experiment.use_variant("b")
     assert mock_experiment.variant_index == 1
 
+def test_use_variant_after_variants_replaced():
+    global mock_experiment
+    mock_experiment.variants = [MockVariant("c", {"foo": MagicMock()}), MockVariant("d", {"foo": MagicMock()})]
+    assert mock_experiment.has_variant("d")
+    assert not mock_experiment.has_variant("b")
+    mock_experiment.use_variant("d")
+    assert mock_experiment.variant_index == 1
+
 def test_safe_enable():
     global mock_experiment
     mock_experiment.safe_enable()
@@ -174,3 +189,470 @@ async def test_get_variant_when_enabled():
     mock_experiment.variant_index = 0
     result = await mock_experiment.get_variant(user_id)
     assert result == variant1
+
+
+@pytest.mark.asyncio
+async def test_set_for_user_reads_each_record_once(mocker):
+    global mock_experiment, user_id, mock_algorithm
+    mock_get_experiment = mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=mock_experiment))
+    mock_get_algorithm = mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    mock_get_user_variant = mocker.patch.object(mock_experiment, 'get_user_variant', AsyncMock(return_value=None))
+    mocker.patch.object(mock_experiment, 'get_variant_index', AsyncMock(return_value=1))
+    with ResolutionMemo.scope() as memo:
+        await mock_experiment.set_for_user(user_id)
+    mock_get_experiment.assert_called_once()
+    mock_get_algorithm.assert_called_once()
+    mock_get_user_variant.assert_called_once_with(user_id=user_id, experiment_id=id)
+    assert memo.storage_calls == 3
+    assert memo.saved_calls == 3
+    assert mock_experiment.variant_index == 1
+
+@pytest.mark.asyncio
+async def test_set_for_user_without_outer_scope_still_memoizes(mocker):
+    global mock_experiment, user_id
+    mock_get_experiment = mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=mock_experiment))
+    await mock_experiment.set_for_user(user_id)
+    mock_get_experiment.assert_called_once()
+    assert ResolutionMemo.current() is None
+
+@pytest.mark.asyncio
+async def test_complete_for_user_reads_each_record_once(mocker):
+    global mock_experiment, user_id, mock_algorithm
+    existing = MockUserVariant(experiment_id=id, user_id=user_id, index=1)
+    mock_get_experiment = mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=mock_experiment))
+    mock_get_user_variant = mocker.patch.object(mock_experiment, 'get_user_variant', AsyncMock(return_value=existing))
+    mock_delete_user_variant = mocker.patch.object(mock_experiment, 'delete_user_variant', AsyncMock(return_value=None))
+    mock_reward_algorithm = mocker.patch.object(mock_experiment, 'reward_algorithm', AsyncMock(return_value=mock_algorithm))
+    await mock_experiment.complete_for_user(user_id, 1)
+    mock_get_experiment.assert_called_once()
+    mock_get_user_variant.assert_called_once()
+    mock_delete_user_variant.assert_called_once_with(user_variant=existing)
+    mock_reward_algorithm.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_resolve_for_user_does_not_change_state(mocker):
+    global mock_experiment, user_id
+    mock_experiment.variant_index = 0
+    mocker.patch.object(mock_experiment, 'get_variant_index', AsyncMock(return_value=1))
+    assert await mock_experiment.resolve_for_user(user_id) == 1
+    assert mock_experiment.variant_index == 0
+
+@pytest.mark.asyncio
+async def test_resolve_for_user_without_experiment(mocker):
+    global mock_experiment, user_id
+    mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=None))
+    mock_get_variant_index = mocker.patch.object(mock_experiment, 'get_variant_index', AsyncMock(return_value=1))
+    assert await mock_experiment.resolve_for_user(user_id) == 0
+    mock_get_variant_index.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_set_for_user_uses_experiment_cache(mocker):
+    global mock_experiment, user_id
+    cache = LRUCache(max_size=10, ttl=60)
+    mocker.patch.object(mock_experiment, 'experiment_cache', cache)
+    mock_get_experiment = mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=mock_experiment))
+    await mock_experiment.set_for_user(user_id)
+    await mock_experiment.set_for_user(user_id)
+    mock_get_experiment.assert_called_once()
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+@pytest.mark.asyncio
+async def test_experiment_cache_does_not_keep_missing_experiments(mocker):
+    global mock_experiment, user_id
+    mocker.patch.object(mock_experiment, 'experiment_cache', LRUCache(max_size=10, ttl=60))
+    mock_get_experiment = mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=None))
+    await mock_experiment.set_for_user(user_id)
+    await mock_experiment.set_for_user(user_id)
+    assert mock_get_experiment.call_count == 2
+
+@pytest.mark.asyncio
+async def test_enable_and_disable_invalidate_experiment_cache(mocker):
+    global mock_experiment
+    cache = LRUCache(max_size=10, ttl=60)
+    mocker.patch.object(mock_experiment, 'experiment_cache', cache)
+    key = mock_experiment._cache_key(mock_experiment.name)
+    cache.set(key, mock_experiment)
+    await mock_experiment.enable()
+    assert cache.get(key) is None
+    cache.set(key, mock_experiment)
+    await mock_experiment.disable()
+    assert cache.get(key) is None
+
+@pytest.mark.asyncio
+async def test_experiment_cache_keeps_experiments_of_other_classes_apart(mocker):
+    global mock_experiment, user_id
+
+    class OtherStorageExperiment(MockExperiment):
+        pass
+
+    mocker.patch.object(MockExperiment, 'experiment_cache', LRUCache(max_size=10, ttl=60))
+    other = OtherStorageExperiment(id="other_id", name=name, variants=variants, is_enabled=False)
+    await mock_experiment.set_for_user(user_id)
+    await other.set_for_user(user_id)
+    assert (mock_experiment.id, other.id) == (id, "other_id")
+    assert (mock_experiment.is_enabled, other.is_enabled) == (True, False)
+
+@pytest.mark.asyncio
+async def test_set_for_user_skips_algorithm_for_assigned_user(mocker):
+    global mock_experiment, user_id
+    existing = MockUserVariant(experiment_id=id, user_id=user_id, index=1)
+    mocker.patch.object(mock_experiment, 'get_user_variant', AsyncMock(return_value=existing))
+    mock_get_algorithm = mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    await mock_experiment.set_for_user(user_id)
+    mock_get_algorithm.assert_not_called()
+    assert mock_experiment.variant_index == 1
+
+@pytest.mark.asyncio
+async def test_algorithm_cache_reuses_snapshot_until_version_changes(mocker):
+    global mock_experiment, user_id, mock_algorithm
+    cache = LRUCache(max_size=10, ttl=60)
+    mocker.patch.object(mock_experiment, 'algorithm_cache', cache)
+    mock_get_algorithm = mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    mock_get_algorithm_version = mocker.patch.object(mock_experiment, 'get_algorithm_version', AsyncMock(return_value=1))
+    await mock_experiment.set_for_user("new_user_1")
+    await mock_experiment.set_for_user("new_user_2")
+    assert mock_get_algorithm.call_count == 1
+    mock_get_algorithm_version.return_value = 2
+    await mock_experiment.set_for_user("new_user_3")
+    assert mock_get_algorithm.call_count == 2
+
+@pytest.mark.asyncio
+async def test_algorithm_cache_keeps_algorithms_of_other_classes_apart(mocker):
+    global mock_experiment
+
+    class OtherStorageExperiment(MockExperiment):
+        async def get_algorithm(self):
+            return other_algorithm
+
+    other_algorithm = MockAlgorithm()
+    mocker.patch.object(MockExperiment, 'algorithm_cache', LRUCache(max_size=10, ttl=60))
+    other = OtherStorageExperiment(id=id, name=name, variants=variants, is_enabled=True)
+    assert await other._fetch_algorithm() is other_algorithm
+    assert await mock_experiment._fetch_algorithm() is not other_algorithm
+
+@pytest.mark.asyncio
+async def test_complete_for_user_reads_fresh_algorithm_and_invalidates_cache(mocker):
+    global mock_experiment, user_id, mock_algorithm
+    cache = LRUCache(max_size=10, ttl=60)
+    key = mock_experiment._cache_key(mock_experiment.name)
+    cache.set(key, (None, MockAlgorithm()))
+    mocker.patch.object(mock_experiment, 'algorithm_cache', cache)
+    mocker.patch.object(mock_experiment, '_get_user_variant_index', AsyncMock(return_value=1))
+    mocker.patch.object(mock_experiment, '_remove_index', AsyncMock(return_value=None))
+    mock_get_algorithm = mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    mock_reward_algorithm = mocker.patch.object(mock_experiment, 'reward_algorithm', AsyncMock(return_value=mock_algorithm))
+    await mock_experiment.complete_for_user(user_id, 1)
+    mock_get_algorithm.assert_called_once()
+    mock_reward_algorithm.assert_called_once_with(mock_algorithm, 1, 1)
+    assert cache.get(key) is None
+
+@pytest.mark.asyncio
+async def test_set_for_user_with_bucketing_skips_user_variant_storage(mocker):
+    global mock_experiment, user_id
+    mock_experiment.bucketing = Bucketing(weights=[0, 1])
+    mock_get_user_variant = mocker.patch.object(mock_experiment, 'get_user_variant', AsyncMock(return_value=None))
+    mock_upsert_user_variant = mocker.patch.object(mock_experiment, 'upsert_user_variant', AsyncMock(return_value=None))
+    mock_get_algorithm = mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    await mock_experiment.set_for_user(user_id)
+    assert mock_experiment.variant_index == 1
+    mock_get_user_variant.assert_not_called()
+    mock_upsert_user_variant.assert_not_called()
+    mock_get_algorithm.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_complete_for_user_with_bucketing_rewards_derived_index(mocker):
+    global mock_experiment, user_id, mock_algorithm
+    mock_experiment.bucketing = Bucketing(weights=[0, 1])
+    mock_get_user_variant = mocker.patch.object(mock_experiment, 'get_user_variant', AsyncMock(return_value=None))
+    mock_delete_user_variant = mocker.patch.object(mock_experiment, 'delete_user_variant', AsyncMock(return_value=None))
+    mock_reward_algorithm = mocker.patch.object(mock_experiment, 'reward_algorithm', AsyncMock(return_value=mock_algorithm))
+    mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    await mock_experiment.complete_for_user(user_id, 1)
+    mock_reward_algorithm.assert_called_once_with(mock_algorithm, 1, 1)
+    mock_get_user_variant.assert_not_called()
+    mock_delete_user_variant.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_complete_with_bucketing_rewards_every_call(mocker):
+    global mock_experiment, user_id, mock_algorithm
+    mock_experiment.bucketing = Bucketing(weights=[0, 1])
+    mock_reward_algorithm = mocker.patch.object(mock_experiment, 'reward_algorithm', AsyncMock(return_value=mock_algorithm))
+    mock_apply_rewards = mocker.patch.object(mock_experiment, 'apply_rewards', AsyncMock())
+    await mock_experiment.complete_for_user(user_id, 1)
+    await mock_experiment.complete_for_user(user_id, 1)
+    assert mock_reward_algorithm.call_count == 2
+    await mock_experiment.complete_for_users([(user_id, 1.0), (user_id, 2.0)])
+    await mock_experiment.complete_for_users([(user_id, 3.0)])
+    assert mock_apply_rewards.call_args_list == [mocker.call([(1, 1.0)]), mocker.call([(1, 3.0)])]
+
+@pytest.mark.asyncio
+async def test_assignment_cache_serves_returning_users(mocker):
+    global mock_experiment, user_id
+    cache = LRUCache(max_size=10)
+    mocker.patch.object(mock_experiment, 'assignment_cache', cache)
+    existing = MockUserVariant(experiment_id=id, user_id=user_id, index=1)
+    mock_get_user_variant = mocker.patch.object(mock_experiment, 'get_user_variant', AsyncMock(return_value=existing))
+    await mock_experiment.set_for_user(user_id)
+    await mock_experiment.set_for_user(user_id)
+    mock_get_user_variant.assert_called_once()
+    assert mock_experiment.variant_index == 1
+    assert cache.get(mock_experiment._cache_key(id, user_id)) == 1
+
+@pytest.mark.asyncio
+async def test_assignment_cache_keeps_assignments_of_other_classes_apart(mocker):
+    global mock_experiment, user_id
+
+    class OtherStorageExperiment(MockExperiment):
+        pass
+
+    cache = LRUCache(max_size=10)
+    mocker.patch.object(MockExperiment, 'assignment_cache', cache)
+    other = OtherStorageExperiment(id=id, name=name, variants=variants, is_enabled=True)
+    cache.set(other._cache_key(id, user_id), 1)
+    mocker.patch.object(mock_experiment, 'get_variant_index', AsyncMock(return_value=0))
+    await mock_experiment.set_for_user(user_id)
+    assert mock_experiment.variant_index == 0
+    mock_experiment.invalidate_assignment_cache(id)
+    assert cache.get(other._cache_key(id, user_id)) == 1
+
+@pytest.mark.asyncio
+async def test_complete_for_user_skips_cached_assignment_deleted_from_storage(mocker):
+    global mock_experiment, user_id
+    cache = LRUCache(max_size=10)
+    cache.set(mock_experiment._cache_key(id, user_id), 1)
+    mocker.patch.object(mock_experiment, 'assignment_cache', cache)
+    mock_reward_algorithm = mocker.patch.object(mock_experiment, 'reward_algorithm', AsyncMock(return_value=mock_algorithm))
+    await mock_experiment.complete_for_user(user_id, 1)
+    mock_reward_algorithm.assert_not_called()
+    assert cache.get(mock_experiment._cache_key(id, user_id)) is None
+
+@pytest.mark.asyncio
+async def test_remove_index_invalidates_assignment_cache(mocker):
+    global mock_experiment, user_id
+    cache = LRUCache(max_size=10)
+    cache.set(mock_experiment._cache_key(id, user_id), 1)
+    cache.set(mock_experiment._cache_key(id, "other_user"), 0)
+    mocker.patch.object(mock_experiment, 'assignment_cache', cache)
+    await mock_experiment._remove_index(user_id)
+    assert cache.get(mock_experiment._cache_key(id, user_id)) is None
+    assert cache.get(mock_experiment._cache_key(id, "other_user")) == 0
+
+@pytest.mark.asyncio
+async def test_disable_invalidates_assignment_cache(mocker):
+    global mock_experiment, user_id
+    cache = LRUCache(max_size=10)
+    cache.set(mock_experiment._cache_key(id, user_id), 1)
+    cache.set(mock_experiment._cache_key("other_experiment", user_id), 0)
+    mocker.patch.object(mock_experiment, 'assignment_cache', cache)
+    await mock_experiment.disable()
+    assert cache.get(mock_experiment._cache_key(id, user_id)) is None
+    assert cache.get(mock_experiment._cache_key("other_experiment", user_id)) == 0
+
+@pytest.mark.asyncio
+async def test_delete_user_variants_invalidates_assignment_cache(mocker):
+    global mock_experiment, user_id
+    cache = LRUCache(max_size=10)
+    cache.set(mock_experiment._cache_key(id, user_id), 1)
+    cache.set(mock_experiment._cache_key("other_experiment", user_id), 0)
+    mocker.patch.object(mock_experiment, 'assignment_cache', cache)
+    await mock_experiment.delete_user_variants()
+    assert cache.get(mock_experiment._cache_key(id, user_id)) is None
+    assert cache.get(mock_experiment._cache_key("other_experiment", user_id)) == 0
+
+@pytest.mark.asyncio
+async def test_delete_user_variants_without_id_invalidates_stored_experiment(mocker):
+    global mock_experiment, user_id
+    cache = LRUCache(max_size=10)
+    cache.set(mock_experiment._cache_key(id, user_id), 1)
+    mocker.patch.object(mock_experiment, 'assignment_cache', cache)
+    stored = MockExperiment(id=id, name=name, variants=variants, is_enabled=True)
+    mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=stored))
+    mock_experiment.id = None
+    await mock_experiment.delete_user_variants()
+    assert cache.get(mock_experiment._cache_key(id, user_id)) is None
+
+@pytest.mark.asyncio
+async def test_set_for_user_stores_new_assignment(mocker):
+    global mock_experiment, user_id
+    mocker.patch.object(mock_experiment, 'store_new_user_variants', True)
+    mocker.patch.object(mock_experiment, 'get_variant_index', AsyncMock(return_value=1))
+    mock_upsert_user_variant = mocker.patch.object(mock_experiment, 'upsert_user_variant', AsyncMock(return_value=None))
+    await mock_experiment.set_for_user(user_id)
+    stored = mock_upsert_user_variant.call_args.kwargs["user_variant"]
+    assert isinstance(stored, MockUserVariant)
+    assert (stored.experiment_id, stored.user_id, stored.index) == (id, user_id, 1)
+
+@pytest.mark.asyncio
+async def test_set_for_user_does_not_store_new_assignment_by_default(mocker):
+    global mock_experiment, user_id
+    mock_upsert_user_variant = mocker.patch.object(mock_experiment, 'upsert_user_variant', AsyncMock(return_value=None))
+    await mock_experiment.set_for_user(user_id)
+    mock_upsert_user_variant.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_assign_users_requires_new_user_variant(mocker):
+    global mock_experiment
+    mocker.patch.object(MockExperiment, 'new_user_variant', BaseExperiment.new_user_variant)
+    with pytest.raises(NotImplementedError, match="MockExperiment must implement new_user_variant"):
+        [assigned async for assigned in mock_experiment.assign_users(["a"])]
+
+@pytest.mark.asyncio
+async def test_upsert_user_variant_index_keeps_existing_assignment(mocker):
+    global mock_experiment, user_id
+    existing = MockUserVariant(experiment_id=id, user_id=user_id, index=1)
+    mocker.patch.object(mock_experiment, 'get_user_variant', AsyncMock(return_value=existing))
+    mock_upsert_user_variant = mocker.patch.object(mock_experiment, 'upsert_user_variant', AsyncMock(return_value=None))
+    mock_store_new = mocker.patch.object(mock_experiment, '_store_new_user_variant', AsyncMock())
+    await mock_experiment._upsert_user_variant_index(user_id, 0)
+    mock_upsert_user_variant.assert_called_once_with(user_variant=existing)
+    assert existing.index == 1
+    mock_store_new.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_assign_users_in_chunks(mocker):
+    global mock_experiment, mock_algorithm
+    mock_get_algorithm = mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    mock_get_variant_indexes = mocker.patch.object(mock_experiment, 'get_variant_indexes', AsyncMock(
+        side_effect=lambda algorithm, count: [1] * count
+    ))
+    mock_upsert_user_variants = mocker.patch.object(mock_experiment, 'upsert_user_variants', AsyncMock(return_value=None))
+    user_ids = (f"user_{i}" for i in range(5))
+    progress = [assigned async for assigned in mock_experiment.assign_users(user_ids, chunk_size=2)]
+    assert progress == [2, 4, 5]
+    mock_get_algorithm.assert_called_once()
+    assert [call.args[1] for call in mock_get_variant_indexes.call_args_list] == [2, 2, 1]
+    written = [user_variant for call in mock_upsert_user_variants.call_args_list for user_variant in call.args[0]]
+    assert [(uv.user_id, uv.experiment_id, uv.index) for uv in written] == [(f"user_{i}", id, 1) for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_assign_users_default_hooks(mocker):
+    global mock_experiment
+    mocker.patch.object(mock_experiment, 'get_variant_index', AsyncMock(return_value=1))
+    mock_upsert_user_variant = mocker.patch.object(mock_experiment, 'upsert_user_variant', AsyncMock(return_value=None))
+    progress = [assigned async for assigned in mock_experiment.assign_users(["a", "b", "c"])]
+    assert progress == [3]
+    assert mock_upsert_user_variant.call_count == 3
+
+@pytest.mark.asyncio
+async def test_assign_users_without_experiment(mocker):
+    global mock_experiment
+    mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=None))
+    with pytest.raises(ValueError, match="Experiment not found"):
+        [assigned async for assigned in mock_experiment.assign_users(["a"])]
+
+@pytest.mark.asyncio
+async def test_complete_for_users_in_bulk(mocker):
+    global mock_experiment, mock_algorithm
+    stored = {
+        "user_1": MockUserVariant(experiment_id=id, user_id="user_1", index=0),
+        "user_2": MockUserVariant(experiment_id=id, user_id="user_2", index=1),
+    }
+    mock_get_user_variants = mocker.patch.object(mock_experiment, 'get_user_variants_for_users', AsyncMock(return_value=stored))
+    mock_delete_user_variants = mocker.patch.object(mock_experiment, 'delete_user_variants_for_users', AsyncMock(return_value=None))
+    mock_get_algorithm = mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    mock_reward_algorithm_batch = mocker.patch.object(mock_experiment, 'reward_algorithm_batch', AsyncMock(return_value=mock_algorithm))
+    mock_upsert_algorithm = mocker.patch.object(mock_experiment, 'upsert_algorithm', AsyncMock(return_value=None))
+    await mock_experiment.complete_for_users([("user_1", 1.0), ("user_3", 0.5), ("user_2", 0.0), ("user_1", 0.25)])
+    mock_get_user_variants.assert_called_once_with(["user_1", "user_3", "user_2"], id)
+    mock_delete_user_variants.assert_called_once_with(list(stored.values()))
+    mock_get_algorithm.assert_called_once()
+    mock_reward_algorithm_batch.assert_called_once_with(mock_algorithm, [(0, 1.0), (1, 0.0)])
+    mock_upsert_algorithm.assert_called_once_with(mock_algorithm)
+
+@pytest.mark.asyncio
+async def test_complete_for_users_default_hooks(mocker):
+    global mock_experiment, mock_algorithm
+    mocker.patch.object(mock_experiment, 'get_user_variant', AsyncMock(
+        side_effect=lambda user_id, experiment_id: MockUserVariant(experiment_id=experiment_id, user_id=user_id, index=1)
+    ))
+    mock_delete_user_variant = mocker.patch.object(mock_experiment, 'delete_user_variant', AsyncMock(return_value=None))
+    mock_reward_algorithm = mocker.patch.object(mock_experiment, 'reward_algorithm', AsyncMock(return_value=mock_algorithm))
+    await mock_experiment.complete_for_users([("user_1", 1.0), ("user_2", 0.5)])
+    assert mock_delete_user_variant.call_count == 2
+    assert [call.args[1:] for call in mock_reward_algorithm.call_args_list] == [(1, 1.0), (1, 0.5)]
+
+@pytest.mark.asyncio
+async def test_complete_for_users_when_disabled(mocker):
+    global mock_experiment
+    mock_experiment.is_enabled = False
+    mock_get_experiment = mocker.patch.object(mock_experiment, 'get_experiment', AsyncMock(return_value=mock_experiment))
+    await mock_experiment.complete_for_users([("user_1", 1.0)])
+    mock_get_experiment.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_complete_for_users_without_assignments(mocker):
+    global mock_experiment
+    mocker.patch.object(mock_experiment, 'get_user_variants_for_users', AsyncMock(return_value={}))
+    mock_get_algorithm = mocker.patch.object(mock_experiment, 'get_algorithm', AsyncMock(return_value=mock_algorithm))
+    await mock_experiment.complete_for_users([("user_1", 1.0)])
+    mock_get_algorithm.assert_not_called()
+
+def test_pick_skips_type_check_for_verified_pick_types():
+    global mock_experiment
+    symbol = Symbol("typed")
+    mock_experiment.variants = [MockVariant(name="variant", picks={symbol: "value"})]
+    mock_experiment.pick_types = {symbol: str}
+    mock_experiment.check_pick_types()
+    mock_experiment.variants[0].picks[symbol] = 1
+    assert mock_experiment.pick(symbol, str) == 1
+    with pytest.raises(TypeError):
+        mock_experiment.pick(symbol, bytes)
+
+def test_pick_type_checks_in_debug_mode(mocker):
+    global mock_experiment
+    symbol = Symbol("typed")
+    mock_experiment.variants = [MockVariant(name="variant", picks={symbol: "value"})]
+    mock_experiment.pick_types = {symbol: str}
+    mock_experiment.check_pick_types()
+    mock_experiment.variants[0].picks[symbol] = 1
+    mocker.patch.object(MockExperiment, 'debug', True)
+    with pytest.raises(TypeError, match="Expected type <class 'str'>, but got 1"):
+        mock_experiment.pick(symbol, str)
+
+def test_setting_variants_clears_verified_pick_types():
+    global mock_experiment
+    symbol = Symbol("typed")
+    mock_experiment.variants = [MockVariant(name="variant", picks={symbol: "value"})]
+    mock_experiment.pick_types = {symbol: str}
+    mock_experiment.check_pick_types()
+    mock_experiment.variants = [MockVariant(name="variant", picks={symbol: 1})]
+    with pytest.raises(TypeError):
+        mock_experiment.pick(symbol, str)
+
+@pytest.mark.asyncio
+async def test_pick_logs_exposure_once_after_set_for_user(mocker):
+    global mock_experiment
+    symbol = Symbol("exposed")
+    mock_experiment.variants = [MockVariant(name="a", picks={symbol: "a"}), MockVariant(name="b", picks={symbol: "b"})]
+    logger = ExposureLogger(MockExposureSink())
+    mocker.patch.object(MockExperiment, 'exposure_logger', logger)
+    mock_experiment.pick(symbol, str)
+    assert len(logger) == 0
+    await mock_experiment.set_for_user(user_id)
+    mock_experiment.pick(symbol, str)
+    mock_experiment.pick(symbol, str)
+    assert [entry[:3] for entry in logger._queue] == [(user_id, mock_experiment, 0)]
+    mock_experiment.use_variant("b")
+    mock_experiment.pick(symbol, str)
+    assert [entry[2] for entry in logger._queue] == [0, 1]
+
+@pytest.mark.asyncio
+async def test_pick_does_not_log_exposure_without_logger():
+    global mock_experiment
+    await mock_experiment.set_for_user(user_id)
+    assert mock_experiment._exposure_pending is False
+
+@pytest.mark.asyncio
+async def test_pick_does_not_log_exposure_for_disabled_experiment(mocker):
+    global mock_experiment
+    symbol = Symbol("exposed")
+    mock_experiment.variants = [MockVariant(name="a", picks={symbol: "a"})]
+    logger = ExposureLogger(MockExposureSink())
+    mocker.patch.object(MockExperiment, 'exposure_logger', logger)
+    mock_experiment.is_enabled = False
+    await mock_experiment.set_for_user(user_id)
+    mock_experiment.pick(symbol, str)
+    mock_experiment.use_variant("a")
+    mock_experiment.pick(symbol, str)
+    assert len(logger) == 0
@@ -0,0 +1,54 @@
+import hashlib
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Optional, Sequence, Tuple
+
+
+class Bucketing:
+    """
+    Stateless, deterministic variant assignment.
+
+    The variant index is derived from a stable hash of (experiment name, salt, user id), so assignments stay
+    sticky across processes and nodes without reading or writing user variants. Variants are weighted
+    equally unless `weights` are given, one per variant. Changing the salt reshuffles every user.
+
+    Completions aren't recorded either, so every complete_for_user call rewards the user's variant again:
+    deduplicate completions before reporting them.
+    """
+    __slots__ = ("weights", "salt", "_thresholds")
+
+    weights: Optional[Tuple[float, ...]]
+    salt: str
+
+    def __init__(self, weights: Optional[Sequence[float]] = None, salt: str = ""):
+        self.salt = salt
+        if weights is None:
+            self.weights = None
+            self._thresholds: Tuple[float, ...] = ()
+            return
+        if any(weight < 0 for weight in weights):
+            raise ValueError("weights must not be negative")
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("weights must add up to more than 0")
+        self.weights = tuple(weights)
+        self._thresholds = tuple(cumulative / total for cumulative in accumulate(self.weights))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(weights={self.weights}, salt={self.salt!r})"
+
+    def position(self, experiment_name: str, user_id: Any) -> float:
+        """Return the user's stable position in [0, 1) for an experiment."""
+        key = f"{experiment_name}\x00{self.salt}\x00{user_id}".encode()
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2 ** 64
+
+    def index_for(self, experiment_name: str, user_id: Any, variant_count: int) -> int:
+        if variant_count < 1:
+            raise ValueError("Empty variants")
+        position = self.position(experiment_name, user_id)
+        if self.weights is None:
+            return int(position * variant_count)
+        if len(self.weights) != variant_count:
+            raise ValueError(f"Expected {variant_count} weights, got {len(self.weights)}")
+        return min(bisect_right(self._thresholds, position), variant_count - 1)
@@ -0,0 +1,56 @@
+import pytest
+
+from .bucketing import Bucketing
+
+
+class TestBucketing:
+    """Tests for the Bucketing class"""
+
+    def test_index_is_deterministic(self):
+        """Test the same user always lands in the same variant"""
+        assert [Bucketing().index_for("experiment", f"user_{i}", 3) for i in range(100)] == [
+            Bucketing().index_for("experiment", f"user_{i}", 3) for i in range(100)
+        ]
+
+    def test_position_range(self):
+        """Test positions fall in [0, 1)"""
+        positions = [Bucketing().position("experiment", user_id) for user_id in range(1000)]
+        assert all(0 <= position < 1 for position in positions)
+
+    def test_salt_and_experiment_reshuffle(self):
+        """Test the salt and experiment name change assignments"""
+        users = [f"user_{i}" for i in range(200)]
+        unsalted = [Bucketing().index_for("experiment", user, 2) for user in users]
+        salted = [Bucketing(salt="v2").index_for("experiment", user, 2) for user in users]
+        other = [Bucketing().index_for("other", user, 2) for user in users]
+        assert unsalted != salted
+        assert unsalted != other
+
+    def test_equal_split(self):
+        """Test unweighted bucketing spreads users evenly"""
+        counts = [0, 0, 0, 0]
+        for user_id in range(20000):
+            counts[Bucketing().index_for("experiment", user_id, 4)] += 1
+        assert all(4500 < count < 5500 for count in counts)
+
+    def test_weighted_split(self):
+        """Test weights shape the split and zero weights get no users"""
+        bucketing = Bucketing(weights=[1, 0, 3])
+        counts = [0, 0, 0]
+        for user_id in range(20000):
+            counts[bucketing.index_for("experiment", user_id, 3)] += 1
+        assert counts[1] == 0
+        assert 4500 < counts[0] < 5500
+        assert 14500 < counts[2] < 15500
+
+    def test_weights_must_match_variants(self):
+        """Test the number of weights is checked"""
+        with pytest.raises(ValueError, match="Expected 3 weights, got 2"):
+            Bucketing(weights=[1, 1]).index_for("experiment", "user", 3)
+
+    def test_invalid_weights(self):
+        """Test weights are validated"""
+        with pytest.raises(ValueError, match="weights must not be negative"):
+            Bucketing(weights=[1, -1])
+        with pytest.raises(ValueError, match="weights must add up to more than 0"):
+            Bucketing(weights=[0, 0])
@@ -0,0 +1,280 @@
+import hashlib
+import threading
+from array import array
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_EMPTY = 0
+_MAX_LOAD = 0.75
+
+
+def _hash_user_id(user_id: Any) -> int:
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+    # 0 marks an empty slot
+    return int.from_bytes(digest, "big") or 1
+
+
+def _probe(keys: Sequence[int], mask: int, key: int) -> int:
+    """Return the slot holding key, or the empty slot where it would go."""
+    slot = key & mask
+    while True:
+        stored = keys[slot]
+        if stored == key or stored == _EMPTY:
+            return slot
+        slot = (slot + 1) & mask
+
+
+class ColumnarAssignmentStore:
+    """
+    Compact in-memory map of user id to variant index.
+
+    Assignments are kept in two parallel arrays instead of dicts of UserVariant objects: an open-addressing
+    table of 64-bit user id hashes (array 'Q') and the variant index of each slot (array 'B', so indexes
+    are 0-255). That is 9 bytes per slot, with the table kept at most 75% full. Lookups, inserts and
+    deletes are O(1) on average, using linear probing and backward-shift deletion.
+
+    User ids are compared by the blake2b hash of str(user_id), so 1 and "1" are the same user, and two
+    ids can collide with a probability of about n²/2^65 for n stored users.
+    """
+    capacity: int
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._lock = threading.Lock()
+        self._size = 0
+        self._allocate(self._capacity_for(capacity))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(size={self._size}, capacity={self.capacity})"
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, user_id: Any) -> bool:
+        return self.get(user_id) is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the table's arrays."""
+        return self._keys.itemsize * len(self._keys) + self._indexes.itemsize * len(self._indexes)
+
+    @staticmethod
+    def _capacity_for(count: int) -> int:
+        capacity = 8
+        while capacity * _MAX_LOAD < count:
+            capacity *= 2
+        return capacity
+
+    def _allocate(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._keys = array("Q", bytes(8 * capacity))
+        self._indexes = array("B", bytes(capacity))
+
+    def _find(self, key: int) -> int:
+        return _probe(self._keys, self._mask, key)
+
+    def _grow(self) -> None:
+        keys, indexes = self._keys, self._indexes
+        self._allocate(self.capacity * 2)
+        for slot, key in enumerate(keys):
+            if key != _EMPTY:
+                new_slot = self._find(key)
+                self._keys[new_slot] = key
+                self._indexes[new_slot] = indexes[slot]
+
+    def _set(self, key: int, index: int) -> None:
+        if not 0 <= index <= 255:
+            raise ValueError(f"Variant index {index} does not fit in 0-255")
+        slot = self._find(key)
+        if self._keys[slot] == _EMPTY:
+            if (self._size + 1) > self.capacity * _MAX_LOAD:
+                self._grow()
+                slot = self._find(key)
+            self._keys[slot] = key
+            self._size += 1
+        self._indexes[slot] = index
+
+    def _delete(self, key: int) -> bool:
+        keys, indexes, mask = self._keys, self._indexes, self._mask
+        hole = self._find(key)
+        if keys[hole] == _EMPTY:
+            return False
+        # Shift later entries of the probe run back into the hole, so lookups never stop early
+        slot = hole
+        while True:
+            slot = (slot + 1) & mask
+            stored = keys[slot]
+            if stored == _EMPTY:
+                break
+            home = stored & mask
+            if (slot - home) & mask >= (slot - hole) & mask:
+                keys[hole] = stored
+                indexes[hole] = indexes[slot]
+                hole = slot
+        keys[hole] = _EMPTY
+        indexes[hole] = 0
+        self._size -= 1
+        return True
+
+    def get(self, user_id: Any) -> Optional[int]:
+        key = _hash_user_id(user_id)
+        with self._lock:
+            slot = self._find(key)
+            if self._keys[slot] == _EMPTY:
+                return None
+            return self._indexes[slot]
+
+    def get_many(self, user_ids: Iterable[Any]) -> Dict[Any, int]:
+        """Return the variant index of every stored user, keyed by user id. Missing users are left out."""
+        found = {}
+        with self._lock:
+            for user_id in user_ids:
+                slot = self._find(_hash_user_id(user_id))
+                if self._keys[slot] != _EMPTY:
+                    found[user_id] = self._indexes[slot]
+        return found
+
+    def set(self, user_id: Any, index: int) -> None:
+        key = _hash_user_id(user_id)
+        with self._lock:
+            self._set(key, index)
+
+    def set_many(self, assignments: Iterable[Tuple[Any, int]]) -> None:
+        with self._lock:
+            for user_id, index in assignments:
+                self._set(_hash_user_id(user_id), index)
+
+    def _set_hashed_many(self, keys: Iterable[int], indexes: Iterable[int]) -> None:
+        with self._lock:
+            for key, index in zip(keys, indexes):
+                self._set(key, index)
+
+    def delete(self, user_id: Any) -> bool:
+        """Remove a user's assignment, returning whether there was one."""
+        key = _hash_user_id(user_id)
+        with self._lock:
+            return self._delete(key)
+
+    def delete_many(self, user_ids: Iterable[Any]) -> int:
+        """Remove several users' assignments, returning how many there were."""
+        with self._lock:
+            return sum(self._delete(_hash_user_id(user_id)) for user_id in user_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._size = 0
+            self._allocate(8)
+
+
+if TYPE_CHECKING:
+    class _ExperimentBase:
+        """
+        The BaseExperiment members that the storage mixins use, declared for type checkers. Not a Protocol,
+        which would make experiments using a mixin abstract, as the mixin comes before BaseExperiment.
+        """
+        id: Any
+
+        def new_user_variant(self, user_id: Any, experiment_id: Any, index: int) -> Any: ...
+
+        async def _fetch_experiment(self) -> Optional[Any]: ...
+
+        async def get_user_variant(self, user_id: Any, experiment_id: Any) -> Optional[Any]: ...
+
+        async def get_user_variants_for_users(self, user_ids: List[Any], experiment_id: Any) -> Dict[Any, Any]: ...  # pytype: disable=bad-return-type
+
+        async def delete_user_variant(self, user_variant: Any) -> None: ...
+
+        async def delete_user_variants_for_users(self, user_variants: List[Any]) -> None: ...
+
+        async def delete_user_variants(self) -> None: ...
+else:
+    # At runtime the mixins must not shadow BaseExperiment's methods
+    _ExperimentBase = object
+
+
+class ColumnarExperimentMixin(_ExperimentBase):
+    """
+    Implements BaseExperiment's user variant storage, including the bulk hooks, with one
+    ColumnarAssignmentStore per experiment id. The adapter still implements experiment and algorithm
+    storage. Indexes must fit in 0-255.
+
+    Stores live in the `assignment_stores` dict that each subclass gets, shared by every instance of that
+    experiment class, so experiment classes with the same ids don't share stores. Override
+    assignment_store() to keep them elsewhere, e.g. to use the store as a near cache in front of a database.
+
+    Usage:
+        class MyExperiment(ColumnarExperimentMixin, BaseExperiment[MyAlgorithm, ...]):
+            async def get_experiment(self) -> Optional[Self]:
+                ...
+    """
+    assignment_stores: ClassVar[Dict[Any, ColumnarAssignmentStore]] = {}
+    # Initial capacity of a new experiment's store
+    assignment_store_capacity: ClassVar[int] = 1024
+    store_new_user_variants: ClassVar[bool] = True
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        if "assignment_stores" not in cls.__dict__:
+            cls.assignment_stores = {}
+
+    def assignment_store(self, experiment_id: Any) -> ColumnarAssignmentStore:
+        store = self.assignment_stores.get(experiment_id)
+        if store is None:
+            store = self.assignment_stores.setdefault(
+                experiment_id, ColumnarAssignmentStore(self.assignment_store_capacity)
+            )
+        return store
+
+    async def get_user_variant(self, user_id: Any, experiment_id: Any) -> Optional[Any]:
+        index = self.assignment_store(experiment_id).get(user_id)
+        if index is None:
+            return None
+        return self.new_user_variant(user_id, experiment_id, index)
+
+    async def get_user_variants_for_user(self, user_id: Any, experiment_ids: List[Any]) -> Dict[Any, Any]:
+        user_variants = {}
+        for experiment_id in experiment_ids:
+            index = self.assignment_store(experiment_id).get(user_id)
+            if index is not None:
+                user_variants[experiment_id] = self.new_user_variant(user_id, experiment_id, index)
+        return user_variants
+
+    async def get_user_variants_for_users(self, user_ids: List[Any], experiment_id: Any) -> Dict[Any, Any]:
+        indexes = self.assignment_store(experiment_id).get_many(user_ids)
+        return {
+            user_id: self.new_user_variant(user_id, experiment_id, index)
+            for user_id, index in indexes.items()
+        }
+
+    async def upsert_user_variant(self, user_variant: Any) -> None:
+        self.assignment_store(user_variant.experiment_id).set(user_variant.user_id, user_variant.index)
+
+    async def upsert_user_variants(self, user_variants: List[Any]) -> None:
+        by_experiment: Dict[Any, List[Tuple[Any, int]]] = {}
+        for user_variant in user_variants:
+            by_experiment.setdefault(user_variant.experiment_id, []).append((user_variant.user_id, user_variant.index))
+        for experiment_id, assignments in by_experiment.items():
+            self.assignment_store(experiment_id).set_many(assignments)
+
+    async def delete_user_variant(self, user_variant: Any) -> None:
+        self.assignment_store(user_variant.experiment_id).delete(user_variant.user_id)
+
+    async def delete_user_variants_for_users(self, user_variants: List[Any]) -> None:
+        by_experiment: Dict[Any, List[Any]] = {}
+        for user_variant in user_variants:
+            by_experiment.setdefault(user_variant.experiment_id, []).append(user_variant.user_id)
+        for experiment_id, user_ids in by_experiment.items():
+            self.assignment_store(experiment_id).delete_many(user_ids)
+
+    async def delete_user_variants(self) -> None:
+        """Remove every assignment of this experiment, found by its id."""
+        experiment_id = self.id
+        if experiment_id is None:
+            experiment = await self._fetch_experiment()
+            if not experiment or experiment.id is None:
+                return
+            experiment_id = experiment.id
+        store = self.assignment_stores.get(experiment_id)
+        if store is not None:
+            store.clear()
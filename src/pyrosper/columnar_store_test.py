@@ -0,0 +1,152 @@
+import random
+
+import pytest
+
+from .columnar_store import ColumnarAssignmentStore, ColumnarExperimentMixin
+from .mock.mock_experiment import MockExperiment
+from .mock.mock_user_variant import MockUserVariant
+from .mock.mock_variant import MockVariant
+from .symbol import Symbol
+
+
+class ColumnarMockExperiment(ColumnarExperimentMixin, MockExperiment):
+    pass
+
+
+class TestColumnarAssignmentStore:
+    """Tests for the ColumnarAssignmentStore class"""
+
+    def test_set_get_delete(self):
+        """Test a user's index can be stored, read, overwritten and removed"""
+        store = ColumnarAssignmentStore()
+        assert store.get("user_1") is None
+        store.set("user_1", 2)
+        assert store.get("user_1") == 2
+        assert "user_1" in store
+        store.set("user_1", 3)
+        assert store.get("user_1") == 3
+        assert len(store) == 1
+        assert store.delete("user_1") is True
+        assert store.delete("user_1") is False
+        assert store.get("user_1") is None
+        assert len(store) == 0
+
+    def test_index_out_of_range(self):
+        """Test indexes must fit in a byte"""
+        store = ColumnarAssignmentStore()
+        with pytest.raises(ValueError, match="Variant index 256 does not fit in 0-255"):
+            store.set("user_1", 256)
+        with pytest.raises(ValueError):
+            store.set("user_1", -1)
+
+    def test_invalid_capacity(self):
+        """Test capacity must be at least 1"""
+        with pytest.raises(ValueError, match="capacity must be at least 1"):
+            ColumnarAssignmentStore(capacity=0)
+
+    def test_grows_and_matches_dict(self):
+        """Test random inserts and deletes, with the table growing, agree with a dict"""
+        rng = random.Random(7)
+        store = ColumnarAssignmentStore(capacity=1)
+        expected = {}
+        for _ in range(5000):
+            user_id = rng.randrange(2000)
+            if rng.random() < 0.3:
+                assert store.delete(user_id) == (expected.pop(user_id, None) is not None)
+            else:
+                index = rng.randrange(256)
+                store.set(user_id, index)
+                expected[user_id] = index
+        assert len(store) == len(expected)
+        assert store.capacity * 0.75 >= len(store)
+        for user_id in range(2000):
+            assert store.get(user_id) == expected.get(user_id)
+
+    def test_bulk_methods(self):
+        """Test set_many, get_many and delete_many"""
+        store = ColumnarAssignmentStore()
+        store.set_many([("user_1", 0), ("user_2", 1)])
+        assert store.get_many(["user_1", "user_2", "user_3"]) == {"user_1": 0, "user_2": 1}
+        assert store.delete_many(["user_1", "user_3"]) == 1
+        assert store.get_many(["user_1", "user_2"]) == {"user_2": 1}
+
+    def test_nbytes_and_clear(self):
+        """Test the table holds 9 bytes per slot and clear empties it"""
+        store = ColumnarAssignmentStore(capacity=1000)
+        assert store.nbytes == store.capacity * 9
+        store.set("user_1", 1)
+        store.clear()
+        assert len(store) == 0
+        assert store.get("user_1") is None
+
+
+class TestColumnarExperimentMixin:
+    """Tests for the ColumnarExperimentMixin class"""
+
+    @pytest.fixture
+    def experiment(self):
+        ColumnarMockExperiment.assignment_stores = {}
+        return ColumnarMockExperiment(
+            id="experiment_1",
+            name="columnar",
+            variants=[MockVariant("a", {Symbol("s"): 1}), MockVariant("b", {Symbol("s"): 2})],
+            is_enabled=True,
+        )
+
+    @pytest.mark.asyncio
+    async def test_user_variant_storage(self, experiment):
+        """Test user variants are stored in the experiment's columnar store"""
+        await experiment.upsert_user_variant(MockUserVariant(experiment_id="experiment_1", user_id="user_1", index=1))
+        user_variant = await experiment.get_user_variant("user_1", "experiment_1")
+        assert isinstance(user_variant, MockUserVariant)
+        assert (user_variant.user_id, user_variant.index) == ("user_1", 1)
+        assert await experiment.get_user_variant("user_1", "experiment_2") is None
+        await experiment.delete_user_variant(user_variant)
+        assert await experiment.get_user_variant("user_1", "experiment_1") is None
+
+    @pytest.mark.asyncio
+    async def test_bulk_hooks(self, experiment):
+        """Test the bulk hooks read and write many assignments at once"""
+        await experiment.upsert_user_variants([
+            MockUserVariant(experiment_id="experiment_1", user_id="user_1", index=0),
+            MockUserVariant(experiment_id="experiment_1", user_id="user_2", index=1),
+            MockUserVariant(experiment_id="experiment_2", user_id="user_1", index=1),
+        ])
+        by_user = await experiment.get_user_variants_for_users(["user_1", "user_2", "user_3"], "experiment_1")
+        assert {user_id: user_variant.index for user_id, user_variant in by_user.items()} == {"user_1": 0, "user_2": 1}
+        by_experiment = await experiment.get_user_variants_for_user("user_1", ["experiment_1", "experiment_2"])
+        assert {experiment_id: user_variant.index for experiment_id, user_variant in by_experiment.items()} == {
+            "experiment_1": 0,
+            "experiment_2": 1,
+        }
+        await experiment.delete_user_variants_for_users(list(by_user.values()))
+        assert await experiment.get_user_variants_for_users(["user_1", "user_2"], "experiment_1") == {}
+        await experiment.delete_user_variants()
+        assert len(experiment.assignment_store("experiment_2")) == 1
+
+    def test_stores_are_per_class(self, experiment):
+        """Test experiment classes with the same experiment ids don't share stores"""
+        class OtherColumnarExperiment(ColumnarExperimentMixin, MockExperiment):
+            pass
+
+        other = OtherColumnarExperiment(id="experiment_1", name="other", variants=experiment.variants, is_enabled=True)
+        experiment.assignment_store("experiment_1").set("user_1", 1)
+        assert other.assignment_store("experiment_1").get("user_1") is None
+        assert ColumnarExperimentMixin.assignment_stores == {}
+
+    @pytest.mark.asyncio
+    async def test_delete_user_variants_without_id(self, experiment):
+        """Test deleting without a known experiment id leaves the stores alone"""
+        experiment.assignment_store("experiment_1").set("user_1", 1)
+        experiment.id = None
+        await experiment.delete_user_variants()
+        assert None not in ColumnarMockExperiment.assignment_stores
+        assert len(experiment.assignment_store("experiment_1")) == 1
+
+    @pytest.mark.asyncio
+    async def test_set_for_user_and_complete(self, experiment):
+        """Test an experiment assigns, keeps and completes users through the store"""
+        await experiment.set_for_user("user_1")
+        assert experiment.assignment_store("experiment_1").get("user_1") == experiment.variant_index
+        await experiment.complete_for_user("user_1", 1.0)
+        assert "user_1" not in experiment.assignment_store("experiment_1")
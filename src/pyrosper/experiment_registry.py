@@ -0,0 +1,93 @@
+from types import MappingProxyType
+from typing import Any, Generic, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from .assignment import Assignment
+from .base_experiment import BaseExperiment
+from .resolution import for_each_experiment, prefetch_user_variants, supports_prefetch
+from .resolution_memo import ResolutionMemo
+
+ExperimentType = TypeVar('ExperimentType', bound='BaseExperiment')
+
+
+class ExperimentRegistry(Generic[ExperimentType]):
+    """
+    Read-only, process-wide view of a set of validated experiments.
+
+    Compile it once at startup with Pyrosper.compile(), then create a lightweight Assignment per request.
+    The registry never changes after it is built, so it can be shared by every request and task. All
+    per-user state lives on the Assignment.
+
+    Usage:
+        registry = Pyrosper().with_experiment(experiment).compile()
+
+        assignment = registry.assignment()
+        await assignment.set_for_user(user_id)
+        value = assignment.pick(symbol, str)
+    """
+    experiments: Tuple[ExperimentType, ...]
+    slots_by_name: Mapping[str, int]
+    slots_by_symbol: Mapping[object, int]
+    variant_slots: Tuple[Mapping[str, int], ...]
+    pick_tables: Tuple[Tuple[Mapping[object, Any], ...], ...]
+    verified_pick_types: Mapping[object, type]
+
+    def __init__(self, experiments: Sequence[ExperimentType]):
+        """Experiments must already be validated, see Pyrosper.compile()."""
+        self.experiments = tuple(experiments)
+        for experiment in self.experiments:
+            experiment._shared = True
+        slots_by_name = {}
+        slots_by_symbol = {}
+        for slot, experiment in enumerate(self.experiments):
+            slots_by_name.setdefault(experiment.name, slot)
+            if experiment.variants:
+                for symbol in experiment.variants[0].picks:
+                    slots_by_symbol.setdefault(symbol, slot)
+        self.slots_by_name = MappingProxyType(slots_by_name)
+        self.slots_by_symbol = MappingProxyType(slots_by_symbol)
+        self.variant_slots = tuple(
+            MappingProxyType(dict(experiment._variant_indexes)) for experiment in self.experiments
+        )
+        self.pick_tables = tuple(
+            tuple(MappingProxyType(dict(variant.picks)) for variant in experiment.variants)
+            for experiment in self.experiments
+        )
+        verified_pick_types = {}
+        for experiment in self.experiments:
+            for symbol, type_of_pick in experiment._verified_pick_types.items():
+                verified_pick_types.setdefault(symbol, type_of_pick)
+        self.verified_pick_types = MappingProxyType(verified_pick_types)
+        self._prefetches = any(supports_prefetch(experiment) for experiment in self.experiments)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({[experiment.name for experiment in self.experiments]})"
+
+    def __len__(self) -> int:
+        return len(self.experiments)
+
+    def assignment(self, variant_indexes: Optional[Sequence[int]] = None) -> Assignment:
+        """Create an assignment, every experiment starting at its first variant unless given indexes."""
+        return Assignment(self, variant_indexes)
+
+    async def resolve(self, user_id: Optional[Any] = None, concurrency: Optional[int] = None) -> List[int]:
+        """Resolve the variant index of every experiment for a user, in slot order."""
+        return (await self._resolve(user_id, concurrency))[0]
+
+    async def _resolve(self, user_id: Optional[Any] = None, concurrency: Optional[int] = None) -> Tuple[List[int], List[bool]]:
+        """Resolve like resolve(), also returning whether each experiment is enabled, in slot order."""
+        variant_indexes = [0] * len(self.experiments)
+        enabled = [False] * len(self.experiments)
+
+        async def resolve_slot(experiment: ExperimentType) -> None:
+            slot = self.slots_by_name[experiment.name]
+            variant_indexes[slot], enabled[slot] = await experiment._resolve_for_user(user_id)
+
+        if concurrency is None and not (user_id and self._prefetches):
+            for experiment in self.experiments:
+                await resolve_slot(experiment)
+            return variant_indexes, enabled
+        with ResolutionMemo.scope():
+            if user_id:
+                await prefetch_user_variants(self.experiments, user_id, concurrency)
+            await for_each_experiment(self.experiments, resolve_slot, concurrency)
+        return variant_indexes, enabled
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from .assignment import Assignment
+from .experiment_registry import ExperimentRegistry
+from .mock.mock_experiment import MockExperiment
+from .mock.mock_pyrosper import MockPyrosper
+from .mock.mock_user_variant import MockUserVariant
+from .mock.mock_variant import MockVariant
+from .symbol import Symbol
+
+
+class StoredExperiment(MockExperiment):
+    """Mock experiment returning a stored variant index per user"""
+    stored_indexes = {"user_a": 0, "user_b": 1}
+
+    async def get_user_variant(self, user_id, experiment_id):
+        await asyncio.sleep(0)
+        return MockUserVariant(experiment_id=experiment_id, user_id=user_id, index=self.stored_indexes[user_id])
+
+
+class EnabledInStorageExperiment(StoredExperiment):
+    """Mock experiment whose stored record is enabled while the instance is not"""
+
+    async def get_experiment(self):
+        return StoredExperiment(id=self.id, name=self.name, variants=self.variants, is_enabled=True)
+
+
+class TestExperimentRegistry:
+    """Tests for the ExperimentRegistry class"""
+
+    @pytest.fixture
+    def greeting(self):
+        return Symbol("greeting")
+
+    @pytest.fixture
+    def color(self):
+        return Symbol("color")
+
+    @pytest.fixture
+    def registry(self, greeting, color):
+        return MockPyrosper().with_experiment(StoredExperiment(
+            id="greeting_id",
+            name="greeting_experiment",
+            variants=[MockVariant("control", {greeting: "Hello!"}), MockVariant("friendly", {greeting: "Hi there!"})],
+            is_enabled=True,
+        )).with_experiment(MockExperiment(
+            name="color_experiment",
+            variants=[MockVariant("control", {color: "red"}), MockVariant("blue", {color: "blue"})],
+            is_enabled=True,
+        )).compile()
+
+    def test_compile(self, registry, greeting, color):
+        """Test compile builds the slot tables"""
+        assert isinstance(registry, ExperimentRegistry)
+        assert len(registry) == 2
+        assert registry.slots_by_name == {"greeting_experiment": 0, "color_experiment": 1}
+        assert registry.slots_by_symbol == {greeting: 0, color: 1}
+        assert registry.variant_slots[1] == {"control": 0, "blue": 1}
+
+    def test_tables_are_read_only(self, registry, greeting):
+        """Test the compiled tables cannot be changed"""
+        with pytest.raises(TypeError):
+            registry.slots_by_symbol[greeting] = 1
+        with pytest.raises(TypeError):
+            registry.pick_tables[0][0][greeting] = "changed"
+
+    def test_assignment_defaults_to_first_variant(self, registry, greeting):
+        """Test a new assignment picks from each experiment's first variant"""
+        assignment = registry.assignment()
+        assert isinstance(assignment, Assignment)
+        assert assignment.variant_indexes == [0, 0]
+        assert assignment.pick(greeting, str) == "Hello!"
+
+    @pytest.mark.asyncio
+    async def test_resolve(self, registry):
+        """Test resolve returns stored variant indexes in slot order"""
+        assert await registry.resolve("user_b") == [1, 0]
+
+    @pytest.mark.asyncio
+    async def test_resolve_does_not_change_experiments(self, registry):
+        """Test resolving leaves the shared experiments untouched"""
+        await registry.resolve("user_b")
+        assert [experiment.variant_index for experiment in registry.experiments] == [0, 0]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_assignments_share_registry(self, registry, greeting):
+        """Test concurrent requests get independent assignments from one registry"""
+        async def request(user_id):
+            assignment = registry.assignment()
+            await assignment.set_for_user(user_id, concurrency=2)
+            await asyncio.sleep(0)
+            return assignment.pick(greeting, str)
+
+        assert await asyncio.gather(request("user_a"), request("user_b"), request("user_a")) == [
+            "Hello!",
+            "Hi there!",
+            "Hello!",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_complete_uses_stored_enabled_state(self, greeting, mocker):
+        """Test completions of registry experiments follow the stored record, as the instance is never set for a user"""
+        experiment = EnabledInStorageExperiment(
+            id="greeting_id",
+            name="greeting_experiment",
+            variants=[MockVariant("control", {greeting: "Hello!"}), MockVariant("friendly", {greeting: "Hi there!"})],
+        )
+        registry = MockPyrosper().with_experiment(experiment).compile()
+        assignment = registry.assignment()
+        await assignment.set_for_user("user_b")
+        assert assignment.pick(greeting, str) == "Hi there!"
+        apply_rewards = mocker.patch.object(experiment, 'apply_rewards', mocker.AsyncMock())
+        reward_algorithm = mocker.patch.object(experiment, 'reward_algorithm', mocker.AsyncMock())
+        await experiment.complete_for_user("user_b", 1.0)
+        await experiment.complete_for_users([("user_a", 0.5)])
+        reward_algorithm.assert_called_once_with(mocker.ANY, 1, 1.0)
+        apply_rewards.assert_called_once_with([(0, 0.5)])
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .base_experiment import BaseExperiment
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest")
+
+
+class ExposureEvent:
+    """A user was shown a variant of an experiment: the first pick from it after the user's variants were set."""
+    __slots__ = ("user_id", "experiment_name", "variant_name", "variant_index", "timestamp")
+
+    user_id: Any
+    experiment_name: str
+    variant_name: str
+    variant_index: int
+    timestamp: float
+
+    def __init__(self, user_id: Any, experiment_name: str, variant_name: str, variant_index: int, timestamp: float):
+        self.user_id = user_id
+        self.experiment_name = experiment_name
+        self.variant_name = variant_name
+        self.variant_index = variant_index
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(user_id={self.user_id!r}, experiment_name={self.experiment_name!r}, "
+            f"variant_name={self.variant_name!r})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExposureEvent):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "experiment_name": self.experiment_name,
+            "variant_name": self.variant_name,
+            "variant_index": self.variant_index,
+            "timestamp": self.timestamp,
+        }
+
+
+class ExposureSink(ABC):
+    """
+    Destination of exposure events, e.g. an analytics pipeline or a database table. write() receives one
+    batch at a time and may raise to have the batch retried on the next flush.
+
+    Usage:
+        class WarehouseSink(ExposureSink):
+            async def write(self, events):
+                await warehouse.insert("exposures", [event.to_dict() for event in events])
+    """
+
+    @abstractmethod
+    async def write(self, events: Sequence[ExposureEvent]) -> None:
+        pass
+
+
+class ExposureLogger:
+    """
+    Non-blocking log of the variants users were shown.
+
+    BaseExperiment.pick and Assignment.pick call log() for the first pick from an enabled experiment after
+    set_for_user with a user id, and again after use_variant. log() only appends to a bounded in-memory queue, so no I/O
+    happens on the render path. A background task started with start() writes the queue to the sink in batches
+    of `flush_size`, every `flush_interval` seconds or as soon as a batch is full, and close() writes what is left.
+
+    At most `max_size` events are queued. When full, `overflow="drop_newest"` drops the new event and
+    `overflow="drop_oldest"` drops the oldest queued one; either way `dropped` is counted. log() must be called
+    from the event loop's thread.
+
+    Usage:
+        logger = ExposureLogger(WarehouseSink(), flush_size=500)
+        BaseExperiment.exposure_logger = logger
+        logger.start()
+        ...
+        await logger.close()  # on shutdown
+    """
+    sink: ExposureSink
+    flush_size: int
+    flush_interval: Optional[float]
+    max_size: int
+    overflow: str
+    logged: int
+    dropped: int
+    flushes: int
+    flushed_events: int
+    errors: int
+
+    def __init__(
+        self,
+        sink: ExposureSink,
+        flush_size: int = 100,
+        flush_interval: Optional[float] = 1.0,
+        max_size: Optional[int] = None,
+        overflow: str = "drop_newest",
+    ):
+        if flush_size < 1:
+            raise ValueError("flush_size must be at least 1")
+        if max_size is None:
+            max_size = flush_size * 100
+        if max_size < flush_size:
+            raise ValueError("max_size must be at least flush_size")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}")
+        self.sink = sink
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.overflow = overflow
+        self.logged = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flushed_events = 0
+        self.errors = 0
+        # (user id, experiment, variant index, timestamp); events are built when flushed, off the render path
+        self._queue: Deque[Tuple[Any, "BaseExperiment", int, float]] = deque()
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(flush_size={self.flush_size}, pending={len(self._queue)}, dropped={self.dropped})"
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def log(self, experiment: "BaseExperiment", user_id: Any, variant_index: int) -> None:
+        queue = self._queue
+        if len(queue) >= self.max_size:
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return
+            queue.popleft()
+        queue.append((user_id, experiment, variant_index, time.time()))
+        self.logged += 1
+        if len(queue) >= self.flush_size and self._task is not None:
+            self._wake.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._queue),
+            "logged": self.logged,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "flushed_events": self.flushed_events,
+            "errors": self.errors,
+        }
+
+    @staticmethod
+    def _event(user_id: Any, experiment: "BaseExperiment", variant_index: int, timestamp: float) -> ExposureEvent:
+        return ExposureEvent(user_id, experiment.name, experiment.variants[variant_index].name, variant_index, timestamp)
+
+    async def flush(self) -> int:
+        """Write every queued event to the sink, returning how many were written. A failed batch is queued again."""
+        async with self._lock:
+            written = 0
+            queue = self._queue
+            while queue:
+                batch = [queue.popleft() for _ in range(min(self.flush_size, len(queue)))]
+                try:
+                    await self.sink.write([self._event(*entry) for entry in batch])
+                except BaseException:
+                    self.errors += 1
+                    self._requeue(batch)
+                    raise
+                self.flushes += 1
+                self.flushed_events += len(batch)
+                written += len(batch)
+            return written
+
+    def _requeue(self, batch: List[Tuple[Any, "BaseExperiment", int, float]]) -> None:
+        queue = self._queue
+        queue.extendleft(reversed(batch))
+        overflow = len(queue) - self.max_size
+        if overflow > 0:
+            self.dropped += overflow
+            for _ in range(overflow):
+                if self.overflow == "drop_newest":
+                    queue.pop()
+                else:
+                    queue.popleft()
+
+    def start(self) -> None:
+        """Start writing queued events in the background on the running event loop."""
+        flush_interval = self.flush_interval
+        if flush_interval is None:
+            raise ValueError("flush_interval is not set")
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically(flush_interval))
+
+    async def _flush_periodically(self, flush_interval: float) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Events stay queued and are retried after flush_interval; failures are counted in `errors`.
+                await asyncio.sleep(flush_interval)
+
+    async def close(self) -> None:
+        """Stop the background task and write what is queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def __aenter__(self) -> "ExposureLogger":
+        if self.flush_interval is not None:
+            self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
+        await self.close()
+        return False
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from .exposure_logger import ExposureEvent, ExposureLogger
+from .mock.mock_experiment import MockExperiment
+from .mock.mock_exposure_sink import MockExposureSink
+from .mock.mock_variant import MockVariant
+
+
+def make_experiment(name="experiment"):
+    return MockExperiment(id=f"{name}_id", name=name, variants=[MockVariant("a", {}), MockVariant("b", {})], is_enabled=True)
+
+
+class TestExposureLogger:
+    """Tests for the ExposureLogger class"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_batches(self):
+        """Test flush writes queued events to the sink in batches of flush_size"""
+        experiment = make_experiment()
+        sink = MockExposureSink()
+        logger = ExposureLogger(sink, flush_size=2)
+        logger.log(experiment, "user_1", 1)
+        logger.log(experiment, "user_2", 0)
+        logger.log(experiment, "user_3", 1)
+        assert len(logger) == 3
+        assert await logger.flush() == 3
+        assert [len(batch) for batch in sink.batches] == [2, 1]
+        event = sink.events[0]
+        assert isinstance(event, ExposureEvent)
+        assert (event.user_id, event.experiment_name, event.variant_name, event.variant_index) == ("user_1", "experiment", "b", 1)
+        assert len(logger) == 0
+        assert logger.stats() == {"pending": 0, "logged": 3, "dropped": 0, "flushes": 2, "flushed_events": 3, "errors": 0}
+
+    def test_drop_newest(self):
+        """Test a full queue drops new events by default"""
+        experiment = make_experiment()
+        logger = ExposureLogger(MockExposureSink(), flush_size=2, max_size=2)
+        for user_id in ("user_1", "user_2", "user_3"):
+            logger.log(experiment, user_id, 0)
+        assert [entry[0] for entry in logger._queue] == ["user_1", "user_2"]
+        assert logger.dropped == 1
+        assert logger.logged == 2
+
+    def test_drop_oldest(self):
+        """Test a full queue can drop its oldest event instead"""
+        experiment = make_experiment()
+        logger = ExposureLogger(MockExposureSink(), flush_size=2, max_size=2, overflow="drop_oldest")
+        for user_id in ("user_1", "user_2", "user_3"):
+            logger.log(experiment, user_id, 0)
+        assert [entry[0] for entry in logger._queue] == ["user_2", "user_3"]
+        assert logger.dropped == 1
+
+    def test_invalid_arguments(self):
+        """Test sizes and the overflow policy are validated"""
+        sink = MockExposureSink()
+        with pytest.raises(ValueError, match="flush_size must be at least 1"):
+            ExposureLogger(sink, flush_size=0)
+        with pytest.raises(ValueError, match="max_size must be at least flush_size"):
+            ExposureLogger(sink, flush_size=10, max_size=5)
+        with pytest.raises(ValueError, match="overflow must be one of"):
+            ExposureLogger(sink, overflow="block")
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_events(self):
+        """Test events that failed to write stay queued, in order"""
+        experiment = make_experiment()
+        sink = MockExposureSink(error=RuntimeError("sink down"))
+        logger = ExposureLogger(sink, flush_size=10)
+        logger.log(experiment, "user_1", 0)
+        logger.log(experiment, "user_2", 1)
+        with pytest.raises(RuntimeError):
+            await logger.flush()
+        assert logger.errors == 1
+        logger.log(experiment, "user_3", 0)
+        sink.error = None
+        assert await logger.flush() == 3
+        assert [event.user_id for event in sink.events] == ["user_1", "user_2", "user_3"]
+
+    @pytest.mark.asyncio
+    async def test_background_flush_when_batch_full(self):
+        """Test the background task writes as soon as a batch is full"""
+        experiment = make_experiment()
+        sink = MockExposureSink()
+        async with ExposureLogger(sink, flush_size=2, flush_interval=60) as logger:
+            logger.log(experiment, "user_1", 0)
+            await asyncio.sleep(0)
+            assert sink.batches == []
+            logger.log(experiment, "user_2", 0)
+            for _ in range(3):
+                await asyncio.sleep(0)
+            assert len(sink.events) == 2
+            logger.log(experiment, "user_3", 0)
+        assert len(sink.events) == 3
+
+    @pytest.mark.asyncio
+    async def test_background_flush_every_interval(self):
+        """Test the background task writes every flush_interval seconds"""
+        experiment = make_experiment()
+        sink = MockExposureSink()
+        logger = ExposureLogger(sink, flush_size=100, flush_interval=0.01)
+        logger.start()
+        logger.log(experiment, "user_1", 0)
+        await asyncio.sleep(0.05)
+        assert len(sink.events) == 1
+        await logger.close()
+
+    @pytest.mark.asyncio
+    async def test_start_requires_flush_interval(self):
+        """Test background flushing needs a flush_interval"""
+        with pytest.raises(ValueError, match="flush_interval is not set"):
+            ExposureLogger(MockExposureSink(), flush_interval=None).start()
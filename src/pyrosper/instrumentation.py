@@ -0,0 +1,174 @@
+import functools
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Storage and algorithm methods of BaseExperiment that are measured when instrumentation is set
+INSTRUMENTED_METHODS = (
+    "get_experiment",
+    "upsert_experiment",
+    "delete_experiment",
+    "get_user_variant",
+    "get_user_variants_for_user",
+    "get_user_variants_for_users",
+    "upsert_user_variant",
+    "upsert_user_variants",
+    "delete_user_variant",
+    "delete_user_variants_for_users",
+    "delete_user_variants",
+    "get_algorithm",
+    "get_algorithm_version",
+    "get_variant_index",
+    "get_variant_indexes",
+    "reward_algorithm",
+    "reward_algorithm_batch",
+    "upsert_algorithm",
+    "delete_algorithm",
+)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The (experiment, method) being measured, so a super() call into another instrumented override isn't counted twice
+_measuring: ContextVar[Optional[Tuple[int, str]]] = ContextVar("pyrosper_measuring", default=None)
+
+
+class MethodStats:
+    """Call count, error count and latency histogram of one adapter method of one experiment."""
+    __slots__ = ("calls", "errors", "seconds", "bucket_counts")
+
+    calls: int
+    errors: int
+    seconds: float
+    bucket_counts: List[int]
+
+    def __init__(self, bucket_count: int):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        # One count per bucket, plus one for slower calls
+        self.bucket_counts = [0] * (bucket_count + 1)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+class Instrumentation:
+    """
+    Call counts, error counts and latency histograms of BaseExperiment's storage and algorithm methods, per
+    experiment and method.
+
+    Each measured call costs two perf_counter() reads and a bisect into fixed buckets. Export with to_dict()
+    or to_prometheus().
+
+    Usage:
+        BaseExperiment.instrumentation = Instrumentation()
+        ...
+        print(BaseExperiment.instrumentation.to_prometheus())
+    """
+    buckets: Tuple[float, ...]
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        if not buckets:
+            raise ValueError("buckets must not be empty")
+        if any(lower >= upper for lower, upper in zip(buckets, buckets[1:])):
+            raise ValueError("buckets must be increasing")
+        self.buckets = tuple(buckets)
+        self._stats: Dict[Tuple[str, str], MethodStats] = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(methods={len(self._stats)})"
+
+    def record(self, experiment_name: str, method: str, seconds: float, error: bool = False) -> None:
+        key = (experiment_name, method)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = MethodStats(len(self.buckets))
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+        if error:
+            stats.errors += 1
+
+    def get(self, experiment_name: str, method: str) -> Optional[MethodStats]:
+        return self._stats.get((experiment_name, method))
+
+    def reset(self) -> None:
+        self._stats = {}
+
+    def to_dict(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return {experiment: {method: {calls, errors, seconds, buckets}}}, buckets mapping each upper bound to its cumulative count."""
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (experiment_name, method), stats in sorted(self._stats.items()):
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip((*self.buckets, float("inf")), stats.bucket_counts):
+                cumulative += count
+                buckets[bound] = cumulative
+            result.setdefault(experiment_name, {})[method] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "seconds": stats.seconds,
+                "buckets": buckets,
+            }
+        return result
+
+    def to_prometheus(self, prefix: str = "pyrosper") -> str:
+        """Return the stats in the Prometheus text exposition format."""
+        histogram = f"{prefix}_adapter_call_duration_seconds"
+        errors = f"{prefix}_adapter_call_errors_total"
+        histogram_lines = [
+            f"# HELP {histogram} Latency of experiment storage and algorithm methods.",
+            f"# TYPE {histogram} histogram",
+        ]
+        error_lines = [
+            f"# HELP {errors} Experiment storage and algorithm method calls that raised.",
+            f"# TYPE {errors} counter",
+        ]
+        for (experiment_name, method), stats in sorted(self._stats.items()):
+            labels = f'experiment="{_escape(experiment_name)}",method="{_escape(method)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, stats.bucket_counts):
+                cumulative += count
+                histogram_lines.append(f'{histogram}_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulative}')
+            histogram_lines.append(f'{histogram}_bucket{{{labels},le="+Inf"}} {stats.calls}')
+            histogram_lines.append(f"{histogram}_sum{{{labels}}} {stats.seconds!r}")
+            histogram_lines.append(f"{histogram}_count{{{labels}}} {stats.calls}")
+            error_lines.append(f"{errors}{{{labels}}} {stats.errors}")
+        return "\n".join(histogram_lines + error_lines) + "\n"
+
+
+def instrument_method(method: str, call: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """
+    Wrap an async experiment method so it is measured whenever the experiment's instrumentation is set.
+    Without instrumentation the wrapper returns the method's own coroutine, so it adds no coroutine frame.
+    """
+    async def measured(self: Any, instrumentation: Instrumentation, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        key = (id(self), method)
+        if _measuring.get() == key:
+            return await call(self, *args, **kwargs)
+        token = _measuring.set(key)
+        start = time.perf_counter()
+        error = False
+        try:
+            return await call(self, *args, **kwargs)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            instrumentation.record(self.name, method, time.perf_counter() - start, error)
+            _measuring.reset(token)
+
+    @functools.wraps(call)
+    def instrumented(self: Any, *args: Any, **kwargs: Any) -> Awaitable[Any]:
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return call(self, *args, **kwargs)
+        return measured(self, instrumentation, args, kwargs)
+    setattr(instrumented, "__pyrosper_instrumented__", True)
+    return instrumented
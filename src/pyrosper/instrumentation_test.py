@@ -0,0 +1,114 @@
+import pytest
+
+from .base_experiment import BaseExperiment
+from .instrumentation import Instrumentation
+from .mock.mock_experiment import MockExperiment
+from .mock.mock_variant import MockVariant
+from .symbol import Symbol
+
+
+class FailingExperiment(MockExperiment):
+    async def get_algorithm(self):
+        raise RuntimeError("storage is down")
+
+
+class OverridingExperiment(MockExperiment):
+    async def get_experiment(self):
+        return await super().get_experiment()
+
+
+def new_experiment(experiment_class=MockExperiment):
+    return experiment_class(
+        id="experiment_1",
+        name="greeting",
+        variants=[MockVariant("a", {Symbol("greeting"): "a"})],
+        is_enabled=True,
+    )
+
+
+class TestInstrumentation:
+    """Tests for the Instrumentation class"""
+
+    def test_invalid_buckets(self):
+        """Test buckets must be given in increasing order"""
+        with pytest.raises(ValueError, match="buckets must not be empty"):
+            Instrumentation(buckets=[])
+        with pytest.raises(ValueError, match="buckets must be increasing"):
+            Instrumentation(buckets=[0.1, 0.1])
+
+    def test_to_dict(self):
+        """Test recorded calls are exported with cumulative buckets"""
+        instrumentation = Instrumentation(buckets=[0.01, 0.1])
+        instrumentation.record("greeting", "get_experiment", 0.005)
+        instrumentation.record("greeting", "get_experiment", 0.05)
+        instrumentation.record("greeting", "get_experiment", 1.0, error=True)
+        assert instrumentation.to_dict() == {
+            "greeting": {
+                "get_experiment": {
+                    "calls": 3,
+                    "errors": 1,
+                    "seconds": pytest.approx(1.055),
+                    "buckets": {0.01: 1, 0.1: 2, float("inf"): 3},
+                },
+            },
+        }
+
+    def test_to_prometheus(self):
+        """Test the Prometheus text format"""
+        instrumentation = Instrumentation(buckets=[0.01, 0.1])
+        instrumentation.record('say "hi"', "get_algorithm", 0.05)
+        lines = instrumentation.to_prometheus().splitlines()
+        labels = 'experiment="say \\"hi\\"",method="get_algorithm"'
+        assert "# TYPE pyrosper_adapter_call_duration_seconds histogram" in lines
+        assert f'pyrosper_adapter_call_duration_seconds_bucket{{{labels},le="0.01"}} 0' in lines
+        assert f'pyrosper_adapter_call_duration_seconds_bucket{{{labels},le="0.1"}} 1' in lines
+        assert f'pyrosper_adapter_call_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in lines
+        assert f"pyrosper_adapter_call_duration_seconds_count{{{labels}}} 1" in lines
+        assert f"pyrosper_adapter_call_errors_total{{{labels}}} 0" in lines
+
+    @pytest.mark.asyncio
+    async def test_experiment_methods_are_measured(self, mocker):
+        """Test storage and algorithm methods are counted per experiment when instrumentation is set"""
+        instrumentation = Instrumentation()
+        mocker.patch.object(BaseExperiment, 'instrumentation', instrumentation)
+        experiment = new_experiment()
+        await experiment.set_for_user("user_1")
+        for method in ("get_experiment", "get_user_variant", "get_variant_index", "get_algorithm"):
+            stats = instrumentation.get("greeting", method)
+            assert stats is not None and stats.calls == 1
+        assert instrumentation.get("greeting", "delete_experiment") is None
+
+    @pytest.mark.asyncio
+    async def test_errors_are_counted(self, mocker):
+        """Test calls that raise are counted as errors"""
+        instrumentation = Instrumentation()
+        mocker.patch.object(BaseExperiment, 'instrumentation', instrumentation)
+        with pytest.raises(RuntimeError):
+            await new_experiment(FailingExperiment).get_algorithm()
+        stats = instrumentation.get("greeting", "get_algorithm")
+        assert stats is not None and stats.errors == 1
+
+    @pytest.mark.asyncio
+    async def test_super_calls_are_counted_once(self, mocker):
+        """Test an override calling super() is measured once"""
+        instrumentation = Instrumentation()
+        mocker.patch.object(BaseExperiment, 'instrumentation', instrumentation)
+        await new_experiment(OverridingExperiment).get_experiment()
+        stats = instrumentation.get("greeting", "get_experiment")
+        assert stats is not None and stats.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        """Test nothing is recorded without instrumentation, and calls get the method's own coroutine"""
+        assert BaseExperiment.instrumentation is None
+        coroutine = new_experiment().get_experiment()
+        assert coroutine.cr_code.co_name == "get_experiment"
+        assert await coroutine is not None
+
+    def test_abstract_methods_stay_abstract(self):
+        """Test subclasses that don't implement the storage methods still can't be created"""
+        class IncompleteExperiment(BaseExperiment):
+            pass
+
+        with pytest.raises(TypeError, match="abstract"):
+            IncompleteExperiment(name="incomplete", variants=[])  # pyright: ignore[reportAbstractUsage]
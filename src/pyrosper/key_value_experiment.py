@@ -0,0 +1,250 @@
+import asyncio
+import copy
+import json
+from abc import ABC, abstractmethod
+from typing import Any, ClassVar, Dict, List, Optional, Self, Sequence, Set, Tuple
+
+from .base_experiment import BaseExperiment, VariantType
+from .serializable_algorithm import SerializableAlgorithmType
+from .user_variant import UserVariant
+
+Command = Tuple[Any, ...]
+
+
+class KeyValueClient(ABC):
+    """
+    Connection to a Redis-like key-value store, used by KeyValuePipeline.
+
+    execute() sends every command in one round trip and returns their results in order, like a
+    non-transactional Redis pipeline. The commands used are GET, SET, DEL, INCR, HGET, HMGET, HSET and HDEL.
+
+    Usage with redis-py:
+        class RedisClient(KeyValueClient):
+            async def execute(self, commands):
+                pipeline = self.redis.pipeline(transaction=False)
+                for command in commands:
+                    pipeline.execute_command(*command)
+                return await pipeline.execute()
+    """
+
+    @abstractmethod
+    async def execute(self, commands: Sequence[Command]) -> List[Any]:
+        pass
+
+
+class KeyValuePipeline:
+    """
+    Batches commands into round trips.
+
+    Commands issued in the same event loop tick, e.g. by experiments resolved concurrently, are sent together
+    in one KeyValueClient.execute() call on the next tick. Share one pipeline between every
+    KeyValueExperiment of a process, and resolve with a concurrency to batch across experiments.
+    """
+    client: KeyValueClient
+    round_trips: int
+    commands: int
+
+    def __init__(self, client: KeyValueClient):
+        self.client = client
+        self.round_trips = 0
+        self.commands = 0
+        self._pending: List[Tuple[Command, asyncio.Future]] = []
+        self._flushes: Set[asyncio.Task] = set()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(round_trips={self.round_trips}, commands={self.commands})"
+
+    async def execute(self, *command: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((command, future))
+        if len(self._pending) == 1:
+            loop.call_soon(self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        pending, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._flush(pending))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, pending: List[Tuple[Command, asyncio.Future]]) -> None:
+        self.round_trips += 1
+        self.commands += len(pending)
+        try:
+            results = await self.client.execute([command for command, _ in pending])
+        except Exception as error:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        except BaseException:
+            for _, future in pending:
+                future.cancel()
+            raise
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        return {"round_trips": self.round_trips, "commands": self.commands}
+
+
+class KeyValueExperiment(BaseExperiment[SerializableAlgorithmType, VariantType, UserVariant, str, str, None]):
+    """
+    BaseExperiment backed by a Redis-like key-value store through a KeyValuePipeline.
+
+    The experiment id is its name. Each experiment's user variants live in one hash keyed by user id, and its
+    algorithm is stored as JSON of its to_dict() under a key with a version counter, so algorithm_cache can
+    tell when it changes. The counter is never deleted, so a version never repeats. Override
+    serialize_algorithm and deserialize_algorithm to store another format.
+    Subclasses still choose variants: implement new_algorithm, get_variant_index and reward_algorithm, or use
+    BanditExperimentMixin.
+
+    Usage:
+        pipeline = KeyValuePipeline(RedisClient(redis))
+        experiment = GreetingExperiment("greeting", variants, pipeline=pipeline)
+        await Pyrosper().with_experiment(experiment).set_for_user(user_id, concurrency=8)
+    """
+    pipeline: KeyValuePipeline
+    key_prefix: ClassVar[str] = "pyrosper"
+    store_new_user_variants: ClassVar[bool] = True
+
+    def __init__(self, name: str, variants: List[VariantType], pipeline: KeyValuePipeline, id: Optional[str] = None, *args: Any, is_enabled: bool = False, **kwargs: Any):
+        super().__init__(name, variants, id, *args, **kwargs)
+        self.pipeline = pipeline
+        self.is_enabled = is_enabled
+
+    @property
+    def is_enabled(self) -> bool:
+        return self._is_enabled
+
+    @is_enabled.setter
+    def is_enabled(self, value: bool) -> None:
+        self._is_enabled = value
+
+    def storage_key(self) -> KeyValuePipeline:
+        return self.pipeline
+
+    def _key(self, kind: str, name: str) -> str:
+        return f"{self.key_prefix}:{kind}:{name}"
+
+    def _copy(self, is_enabled: bool) -> Self:
+        experiment = copy.copy(self)
+        experiment.id = self.name
+        experiment.is_enabled = is_enabled
+        return experiment
+
+    async def get_experiment(self) -> Optional[Self]:
+        value = await self.pipeline.execute("GET", self._key("experiment", self.name))
+        if value is None:
+            return None
+        # Clients return bytes unless they decode responses
+        return self._copy(value in (b"1", "1"))
+
+    async def upsert_experiment(self, experiment: Self) -> Self:
+        is_enabled = bool(experiment.is_enabled)
+        await self.pipeline.execute("SET", self._key("experiment", experiment.name), "1" if is_enabled else "0")
+        return experiment._copy(is_enabled)
+
+    async def delete_experiment(self, experiment: Self) -> None:
+        await self.pipeline.execute("DEL", self._key("experiment", experiment.name))
+
+    async def get_user_variant(self, user_id: str, experiment_id: str) -> Optional[UserVariant]:
+        value = await self.pipeline.execute("HGET", self._key("user_variants", experiment_id), str(user_id))
+        if value is None:
+            return None
+        return self.new_user_variant(user_id, experiment_id, int(value))
+
+    async def get_user_variants_for_user(self, user_id: str, experiment_ids: List[str]) -> Dict[str, UserVariant]:
+        values = await asyncio.gather(*(
+            self.pipeline.execute("HGET", self._key("user_variants", experiment_id), str(user_id))
+            for experiment_id in experiment_ids
+        ))
+        return {
+            experiment_id: self.new_user_variant(user_id, experiment_id, int(value))
+            for experiment_id, value in zip(experiment_ids, values)
+            if value is not None
+        }
+
+    async def get_user_variants_for_users(self, user_ids: List[str], experiment_id: str) -> Dict[str, UserVariant]:
+        if not user_ids:
+            return {}
+        values = await self.pipeline.execute(
+            "HMGET", self._key("user_variants", experiment_id), *(str(user_id) for user_id in user_ids)
+        )
+        return {
+            user_id: self.new_user_variant(user_id, experiment_id, int(value))
+            for user_id, value in zip(user_ids, values)
+            if value is not None
+        }
+
+    def new_user_variant(self, user_id: str, experiment_id: str, index: int) -> UserVariant:
+        return UserVariant(experiment_id=experiment_id, index=index, user_id=user_id)
+
+    async def upsert_user_variant(self, user_variant: UserVariant) -> None:
+        await self.pipeline.execute(
+            "HSET", self._key("user_variants", user_variant.experiment_id), str(user_variant.user_id), user_variant.index
+        )
+
+    async def upsert_user_variants(self, user_variants: List[UserVariant]) -> None:
+        fields: Dict[str, List[Any]] = {}
+        for user_variant in user_variants:
+            fields.setdefault(user_variant.experiment_id, []).extend((str(user_variant.user_id), user_variant.index))
+        await asyncio.gather(*(
+            self.pipeline.execute("HSET", self._key("user_variants", experiment_id), *values)
+            for experiment_id, values in fields.items()
+        ))
+
+    async def delete_user_variant(self, user_variant: UserVariant) -> None:
+        await self.pipeline.execute(
+            "HDEL", self._key("user_variants", user_variant.experiment_id), str(user_variant.user_id)
+        )
+
+    async def delete_user_variants_for_users(self, user_variants: List[UserVariant]) -> None:
+        fields: Dict[str, List[str]] = {}
+        for user_variant in user_variants:
+            fields.setdefault(user_variant.experiment_id, []).append(str(user_variant.user_id))
+        await asyncio.gather(*(
+            self.pipeline.execute("HDEL", self._key("user_variants", experiment_id), *user_ids)
+            for experiment_id, user_ids in fields.items()
+        ))
+
+    async def delete_user_variants(self) -> None:
+        await self.pipeline.execute("DEL", self._key("user_variants", self.name))
+
+    @abstractmethod
+    def new_algorithm(self) -> SerializableAlgorithmType:
+        """Create the algorithm used until one is stored."""
+        pass
+
+    def serialize_algorithm(self, algorithm: SerializableAlgorithmType) -> bytes:
+        return json.dumps(algorithm.to_dict()).encode()
+
+    def deserialize_algorithm(self, data: bytes) -> SerializableAlgorithmType:
+        return type(self.new_algorithm()).from_dict(json.loads(data))
+
+    async def get_algorithm(self) -> SerializableAlgorithmType:
+        data = await self.pipeline.execute("GET", self._key("algorithm", self.name))
+        if data is None:
+            return self.new_algorithm()
+        return self.deserialize_algorithm(data)
+
+    async def get_algorithm_version(self) -> Optional[int]:
+        version = await self.pipeline.execute("GET", self._key("algorithm_version", self.name))
+        return None if version is None else int(version)
+
+    async def upsert_algorithm(self, algorithm: SerializableAlgorithmType) -> None:
+        await asyncio.gather(
+            self.pipeline.execute("SET", self._key("algorithm", self.name), self.serialize_algorithm(algorithm)),
+            self.pipeline.execute("INCR", self._key("algorithm_version", self.name)),
+        )
+
+    async def delete_algorithm(self) -> None:
+        await asyncio.gather(
+            self.pipeline.execute("DEL", self._key("algorithm", self.name)),
+            self.pipeline.execute("INCR", self._key("algorithm_version", self.name)),
+        )
@@ -0,0 +1,163 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+from .key_value_experiment import KeyValueExperiment, KeyValuePipeline
+from .mock.mock_key_value_server import MockKeyValueServer
+from .pyrosper import Pyrosper
+from .symbol import Symbol
+from .user_variant import UserVariant
+from .variant import Variant
+
+
+class ScoreAlgorithm:
+    def __init__(self, variant_count: int):
+        self.scores: List[float] = [0.0] * variant_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"scores": self.scores}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScoreAlgorithm":
+        algorithm = cls(0)
+        algorithm.scores = data["scores"]
+        return algorithm
+
+
+class GreetingExperiment(KeyValueExperiment[ScoreAlgorithm, Variant]):
+    def new_algorithm(self) -> ScoreAlgorithm:
+        return ScoreAlgorithm(len(self.variants))
+
+    async def get_variant_index(self, algorithm: ScoreAlgorithm) -> int:
+        return 1
+
+    async def reward_algorithm(self, algorithm: ScoreAlgorithm, user_variant_index: int, score: float) -> ScoreAlgorithm:
+        algorithm.scores[user_variant_index] += score
+        return algorithm
+
+
+def new_experiment(name: str, pipeline: KeyValuePipeline) -> GreetingExperiment:
+    symbol = Symbol(name)
+    return GreetingExperiment(name, [Variant("a", {symbol: "a"}), Variant("b", {symbol: "b"})], pipeline=pipeline)
+
+
+class TestKeyValuePipeline:
+    """Tests for the KeyValuePipeline class"""
+
+    @pytest.mark.asyncio
+    async def test_batches_commands_issued_together(self):
+        """Test commands issued in the same tick share one round trip"""
+        server = MockKeyValueServer()
+        pipeline = KeyValuePipeline(server)
+        await asyncio.gather(*(pipeline.execute("SET", f"key_{i}", i) for i in range(10)))
+        assert server.round_trips == 1
+        assert await asyncio.gather(pipeline.execute("GET", "key_1"), pipeline.execute("GET", "key_2")) == [b"1", b"2"]
+        assert await pipeline.execute("GET", "missing") is None
+        assert pipeline.stats() == {"round_trips": 3, "commands": 13}
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self):
+        """Test a failed round trip fails every command in it"""
+        pipeline = KeyValuePipeline(MockKeyValueServer())
+        results = await asyncio.gather(
+            pipeline.execute("GET", "key"),
+            pipeline.execute("UNKNOWN"),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+
+class TestKeyValueExperiment:
+    """Tests for the key-value storage adapter"""
+
+    @pytest.fixture
+    def server(self):
+        return MockKeyValueServer()
+
+    @pytest.fixture
+    def pipeline(self, server):
+        return KeyValuePipeline(server)
+
+    @pytest.mark.asyncio
+    async def test_storage_round_trip(self, pipeline):
+        """Test an experiment is stored, assigns users and rewards completions"""
+        experiment = new_experiment("greeting", pipeline)
+        await experiment.enable()
+        stored = await experiment.get_experiment()
+        assert stored is not None and stored.is_enabled is True
+        await experiment.set_for_user("user_1")
+        assert experiment.variant_index == 1
+        user_variant = await experiment.get_user_variant("user_1", "greeting")
+        assert user_variant is not None and user_variant.index == 1
+        await experiment.complete_for_user("user_1", 2.0)
+        assert await experiment.get_user_variant("user_1", "greeting") is None
+        assert (await experiment.get_algorithm()).scores == [0.0, 2.0]
+        assert await experiment.get_algorithm_version() == 2
+
+    @pytest.mark.asyncio
+    async def test_algorithm_storage(self, server, pipeline):
+        """Test algorithms are stored as JSON, with a version that keeps counting once deleted"""
+        experiment = new_experiment("greeting", pipeline)
+        algorithm = experiment.new_algorithm()
+        algorithm.scores[1] = 1.5
+        await experiment.upsert_algorithm(algorithm)
+        assert json.loads(server.data["pyrosper:algorithm:greeting"]) == {"scores": [0.0, 1.5]}
+        assert (await experiment.get_algorithm()).scores == [0.0, 1.5]
+        await experiment.delete_algorithm()
+        assert await experiment.get_algorithm_version() == 2
+        assert (await experiment.get_algorithm()).scores == [0.0, 0.0]
+        await experiment.upsert_algorithm(experiment.new_algorithm())
+        assert await experiment.get_algorithm_version() == 3
+
+    @pytest.mark.asyncio
+    async def test_reads_bytes_and_decoded_replies(self, server, pipeline):
+        """Test the enabled flag is read from bytes replies, as redis-py returns them, and from decoded ones"""
+        experiment = new_experiment("greeting", pipeline)
+        await experiment.upsert_experiment(experiment._copy(True))
+        assert server.data["pyrosper:experiment:greeting"] == b"1"
+        for data, is_enabled in ((b"1", True), ("1", True), (b"0", False)):
+            server.data["pyrosper:experiment:greeting"] = data
+            stored = await experiment.get_experiment()
+            assert stored is not None and stored.is_enabled is is_enabled
+
+    @pytest.mark.asyncio
+    async def test_bulk_operations(self, pipeline):
+        """Test the bulk hooks and disable"""
+        experiment = new_experiment("greeting", pipeline)
+        await experiment.enable()
+        await experiment.upsert_user_variants([
+            UserVariant(experiment_id="greeting", index=i % 2, user_id=f"user_{i}") for i in range(4)
+        ])
+        user_variants = await experiment.get_user_variants_for_users(["user_0", "user_1", "missing"], "greeting")
+        assert {user_id: user_variant.index for user_id, user_variant in user_variants.items()} == {"user_0": 0, "user_1": 1}
+        await experiment.delete_user_variants_for_users(list(user_variants.values()))
+        assert list(await experiment.get_user_variants_for_users(["user_0", "user_2"], "greeting")) == ["user_2"]
+        await experiment.disable()
+        assert await experiment.get_experiment() is None
+        assert await experiment.get_user_variants_for_users(["user_2"], "greeting") == {}
+
+    @pytest.mark.asyncio
+    async def test_set_for_user_round_trips(self, server, pipeline):
+        """Test concurrent resolution takes one round trip per dependent phase, however many experiments"""
+        pyrosper = Pyrosper[GreetingExperiment, str]()
+        for i in range(5):
+            experiment = new_experiment(f"experiment_{i}", pipeline)
+            await experiment.enable()
+            pyrosper.with_experiment(experiment)
+
+        server.round_trips = 0
+        await pyrosper.set_for_user("user_1", concurrency=5)
+        # experiment records, user variants, algorithms, user variant writes
+        assert server.round_trips == 4
+        assert [experiment.variant_index for experiment in pyrosper.experiments] == [1] * 5
+
+        server.round_trips = 0
+        await pyrosper.set_for_user("user_1", concurrency=5)
+        # experiment records, user variants
+        assert server.round_trips == 2
+
+        server.round_trips = 0
+        await pyrosper.set_for_user("user_1")
+        assert server.round_trips == 6
@@ -0,0 +1,68 @@
+import pytest
+
+from .lru_cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache:
+    """Tests for the LRUCache class"""
+
+    def test_get_and_set(self):
+        """Test values are returned and hits and misses counted"""
+        cache = LRUCache(max_size=2)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "evictions": 0}
+
+    def test_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted when full"""
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+    def test_ttl(self):
+        """Test entries expire after the ttl"""
+        clock = FakeClock()
+        cache = LRUCache(max_size=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        """Test single, matching and full invalidation"""
+        cache = LRUCache(max_size=10)
+        for key in [("x", 1), ("x", 2), ("y", 1)]:
+            cache.set(key, True)
+        cache.invalidate(("x", 1))
+        cache.invalidate("missing")
+        assert cache.get(("x", 1)) is None
+        cache.invalidate_where(lambda key: key[0] == "x")
+        assert cache.get(("x", 2)) is None
+        assert cache.get(("y", 1)) is True
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_invalid_arguments(self):
+        """Test max_size and ttl are validated"""
+        with pytest.raises(ValueError, match="max_size must be at least 1"):
+            LRUCache(max_size=0)
+        with pytest.raises(ValueError, match="ttl must be positive"):
+            LRUCache(ttl=0)
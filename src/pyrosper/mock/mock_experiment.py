@@ -44,6 +44,9 @@ class MockExperiment(BaseExperiment[MockAlgorithm, MockVariant, MockUserVariant,
     async def get_user_variant(self, user_id: str, experiment_id: str) -> Optional[MockUserVariant]:
         pass
 
+    def new_user_variant(self, user_id: str, experiment_id: str, index: int) -> MockUserVariant:
+        return MockUserVariant(experiment_id=experiment_id, index=index, user_id=user_id)
+
     async def upsert_user_variant(self, user_variant: MockUserVariant) -> None:
         pass
 
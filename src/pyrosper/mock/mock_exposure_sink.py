@@ -0,0 +1,22 @@
+from typing import List, Optional, Sequence
+
+from ..exposure_logger import ExposureEvent, ExposureSink
+
+
+class MockExposureSink(ExposureSink):
+    """Collects written batches in memory, optionally raising `error` instead."""
+    batches: List[List[ExposureEvent]]
+    error: Optional[Exception]
+
+    def __init__(self, error: Optional[Exception] = None):
+        self.batches = []
+        self.error = error
+
+    @property
+    def events(self) -> List[ExposureEvent]:
+        return [event for batch in self.batches for event in batch]
+
+    async def write(self, events: Sequence[ExposureEvent]) -> None:
+        if self.error is not None:
+            raise self.error
+        self.batches.append(list(events))
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Dict, List, Sequence
+
+from ..key_value_experiment import Command, KeyValueClient
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class MockKeyValueServer(KeyValueClient):
+    """
+    In-process stand-in for a Redis-like server that counts round trips. Like redis-py without
+    decode_responses, values are stored and returned as bytes.
+    """
+    data: Dict[str, Any]
+    round_trips: int
+    commands: List[Command]
+
+    def __init__(self, latency: float = 0.0):
+        self.data = {}
+        self.latency = latency
+        self.round_trips = 0
+        self.commands = []
+
+    async def execute(self, commands: Sequence[Command]) -> List[Any]:
+        self.round_trips += 1
+        self.commands.extend(commands)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._run(*command) for command in commands]
+
+    def _run(self, name: str, *args: Any) -> Any:
+        data = self.data
+        if name == "GET":
+            return data.get(args[0])
+        if name == "SET":
+            data[args[0]] = _encode(args[1])
+            return True
+        if name == "DEL":
+            return sum(data.pop(key, None) is not None for key in args)
+        if name == "INCR":
+            value = int(data.get(args[0], 0)) + 1
+            data[args[0]] = _encode(value)
+            return value
+        if name == "HGET":
+            return data.get(args[0], {}).get(args[1])
+        if name == "HMGET":
+            fields = data.get(args[0], {})
+            return [fields.get(field) for field in args[1:]]
+        if name == "HSET":
+            fields = data.setdefault(args[0], {})
+            added = 0
+            for field, value in zip(args[1::2], args[2::2]):
+                added += field not in fields
+                fields[field] = _encode(value)
+            return added
+        if name == "HDEL":
+            fields = data.get(args[0], {})
+            removed = sum(fields.pop(field, None) is not None for field in args[1:])
+            if not fields:
+                data.pop(args[0], None)
+            return removed
+        raise ValueError(f"Unknown command {name}")
@@ -1,4 +1,4 @@
 from ..user_variant import UserVariant
 
 class MockUserVariant(UserVariant):
-    pass
\ No newline at end of file
+    __slots__ = ()
\ No newline at end of file
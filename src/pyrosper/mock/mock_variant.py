@@ -1,4 +1,4 @@
 from ..variant import Variant
 
 class MockVariant(Variant):
-    pass
\ No newline at end of file
+    __slots__ = ()
\ No newline at end of file
@@ -1,18 +1,40 @@
-from typing import TypeVar, Generic, Type, overload, Any, Callable
+from contextvars import ContextVar
+from typing import TypeVar, Generic, Type, overload, Any, Callable, ClassVar, Dict, Optional
 
-from pyrosper import Symbol
+from .symbol import Symbol
 
 T = TypeVar("T")
 
 class Pick(Generic[T]):
+    """
+    Descriptor that resolves a pick on attribute access.
+
+    A cached pick resolves once per active cache scope (entered by BaseContext) and then returns the stored
+    value. The scope's cache is cleared whenever variants are reassigned, see Pick.clear_cache().
+    Set check_type to False when the getter already checks the type, e.g. Pyrosper.pick.
+    """
+    __slots__ = ("typ", "symbol", "getter", "cached", "check_type")
+
+    cache_storage: ClassVar[ContextVar[Optional[Dict["Pick", Any]]]] = ContextVar("pyrosper_pick_cache", default=None)
     typ: Type[T]
     symbol: Symbol
     getter: Callable[[], T]
+    cached: bool
+    check_type: bool
 
-    def __init__(self, typ: Type[T], symbol: Symbol, getter: Callable[[], T]):
+    def __init__(self, typ: Type[T], symbol: Symbol, getter: Callable[[], T], cached: bool = False, check_type: bool = True):
         self.typ = typ
         self.symbol = symbol
         self.getter = getter
+        self.cached = cached
+        self.check_type = check_type
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forget every value resolved in the active cache scope."""
+        cache = cls.cache_storage.get()
+        if cache is not None:
+            cache.clear()
 
     def __set_name__(self, owner, name):
         pass
@@ -28,9 +50,14 @@ class Pick(Generic[T]):
     def __get__(self, instance, owner):
         if instance is None:
             return self
+        cache = self.cache_storage.get() if self.cached else None
+        if cache is not None and self in cache:
+            return cache[self]
         result = self.getter()
-        if not isinstance(result, self.typ):
+        if self.check_type and not isinstance(result, self.typ):
             raise TypeError(f"Expected {self.typ}, got {type(result)}")
+        if cache is not None:
+            cache[self] = result
         return result
 
 
@@ -1,4 +1,7 @@
-from pyrosper import BaseContext, Symbol
+import pytest
+from unittest.mock import AsyncMock
+
+from pyrosper import BaseContext, Pick, Symbol
 from pyrosper.mock.mock_experiment import MockExperiment
 from pyrosper.mock.mock_pyrosper import MockPyrosper
 from pyrosper.mock.mock_variant import MockVariant
@@ -26,4 +29,96 @@ class TestInjection:
         with MockContext() as pyrosper:
             my_class = MyClass()
             assert my_class.value == "expected_result"
-            assert my_class.do_something() == "expected_result"
\ No newline at end of file
+            assert my_class.do_something() == "expected_result"
+
+    def test_pick_resolves_once_per_scope(self):
+        """Test a context pick is resolved once per context scope and re-resolved in the next one"""
+        my_symbol = Symbol("my_symbol")
+        calls = []
+
+        class CountingPyrosper(MockPyrosper):
+            def pick(self, symbol, type_of_pick=None):
+                calls.append(symbol)
+                return super().pick(symbol, type_of_pick)
+
+        class MockContext(BaseContext[CountingPyrosper]):
+            def setup(self) -> CountingPyrosper:
+                variant = MockVariant(name="test variant", picks={my_symbol: "expected_result"})
+                experiment = MockExperiment(name="test experiment", variants=[variant], is_enabled=True)
+                return CountingPyrosper().with_experiment(experiment)
+
+        class MyClass:
+            value = MockContext.pick(str, my_symbol)
+
+        with MockContext():
+            my_class = MyClass()
+            assert [my_class.value for _ in range(5)] == ["expected_result"] * 5
+            assert MyClass().value == "expected_result"
+        assert len(calls) == 1
+        assert Pick.cache_storage.get() is None
+
+        with MockContext():
+            assert MyClass().value == "expected_result"
+        assert len(calls) == 2
+
+    def test_pick_cache_cleared_on_reassignment(self):
+        """Test reassigning variants inside a scope clears the resolved picks"""
+        my_symbol = Symbol("my_symbol")
+
+        class MockContext(BaseContext[MockPyrosper]):
+            def setup(self) -> MockPyrosper:
+                variants = [
+                    MockVariant(name="a", picks={my_symbol: "a"}),
+                    MockVariant(name="b", picks={my_symbol: "b"}),
+                ]
+                experiment = MockExperiment(name="test experiment", variants=variants, is_enabled=True)
+                return MockPyrosper().with_experiment(experiment)
+
+        class MyClass:
+            value = MockContext.pick(str, my_symbol)
+
+        with MockContext() as pyrosper:
+            assert MyClass().value == "a"
+            pyrosper.experiments[0].use_variant("b")
+            assert MyClass().value == "b"
+
+    @pytest.mark.asyncio
+    async def test_pick_cache_cleared_by_get_variant_and_reset(self):
+        """Test get_variant and reset, which also change the variant index, clear the resolved picks"""
+        my_symbol = Symbol("my_symbol")
+
+        class MockContext(BaseContext[MockPyrosper]):
+            def setup(self) -> MockPyrosper:
+                variants = [
+                    MockVariant(name="a", picks={my_symbol: "a"}),
+                    MockVariant(name="b", picks={my_symbol: "b"}),
+                ]
+                experiment = MockExperiment(name="test experiment", variants=variants, is_enabled=True)
+                return MockPyrosper().with_experiment(experiment)
+
+        class MyClass:
+            value = MockContext.pick(str, my_symbol)
+
+        with MockContext() as pyrosper:
+            experiment = pyrosper.experiments[0]
+            assert MyClass().value == "a"
+            experiment.get_variant_index = AsyncMock(return_value=1)
+            variant = await experiment.get_variant("user_1")
+            assert variant is not None
+            assert variant.name == "b"
+            assert MyClass().value == "b"
+            experiment.reset()
+            assert MyClass().value == "a"
+
+    def test_uncached_pick(self):
+        """Test a pick without caching calls its getter on every access"""
+        my_symbol = Symbol("my_symbol")
+        calls = []
+
+        class MyClass:
+            value = Pick(str, my_symbol, lambda: calls.append(1) or "value")
+
+        my_class = MyClass()
+        assert my_class.value == "value"
+        assert my_class.value == "value"
+        assert len(calls) == 2
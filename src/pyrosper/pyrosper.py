@@ -1,32 +1,115 @@
-from typing import Generic, List, Optional, Set, TypeVar, Any, Type, Union, Self
+from typing import AsyncIterator, Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar, Any, Type, Union, Self
 
 from .base_experiment import BaseExperiment
+from .experiment_registry import ExperimentRegistry
+from .resolution import ExperimentResolutionError, for_each_experiment, prefetch_user_variants, supports_prefetch
+from .resolution_memo import ResolutionMemo
 from .symbol import Symbol
 
 ExperimentType = TypeVar('ExperimentType', bound='BaseExperiment')
 UserIdType = TypeVar('UserIdType', bound='str | int')
 PickType = TypeVar("PickType")
 
+
 class Pyrosper(Generic[ExperimentType, UserIdType]):
     def __init__(self):
-        self.experiments: List[ExperimentType] = []
+        self._experiments: List[ExperimentType] = []
+        self._experiments_by_symbol: Dict[object, ExperimentType] = {}
+        self._experiments_by_name: Dict[str, ExperimentType] = {}
+        # Whether any experiment implements the bulk user variant hook, so set_for_user has something to prefetch
+        self._prefetches = False
         self.used_symbols: Set[object] = set()
 
-    async def set_for_user(self, user_id: Optional[UserIdType] = None) -> None:
-        for experiment in self.experiments:
+    @property
+    def experiments(self) -> List[ExperimentType]:
+        return self._experiments
+
+    @experiments.setter
+    def experiments(self, experiments: List[ExperimentType]) -> None:
+        self._experiments = experiments
+        self._experiments_by_symbol = {}
+        self._experiments_by_name = {}
+        self._prefetches = False
+        for experiment in experiments:
+            self._index_experiment(experiment)
+
+    def _index_experiment(self, experiment: ExperimentType) -> None:
+        self._experiments_by_name.setdefault(experiment.name, experiment)
+        self._prefetches = self._prefetches or supports_prefetch(experiment)
+        if not experiment.variants:
+            return
+        for symbol in experiment.variants[0].picks:
+            self._experiments_by_symbol.setdefault(symbol, experiment)
+
+    async def set_for_user(self, user_id: Optional[UserIdType] = None, concurrency: Optional[int] = None) -> None:
+        """
+        Resolve every experiment for a user.
+
+        By default experiments are resolved one after another. When `concurrency` is given, they are resolved
+        together with at most `concurrency` in flight. If any experiment fails, the others are cancelled and
+        awaited, and an ExceptionGroup of ExperimentResolutionError is raised, one per failed experiment.
+
+        When a user id is given, each experiment class's get_user_variants_for_user bulk hook is called once
+        and its results are shared with the experiments of that class.
+        """
+        if concurrency is None and not (user_id and self._prefetches):
+            for experiment in self.experiments:
+                await experiment.set_for_user(user_id)
+            return
+
+        async def resolve(experiment: ExperimentType) -> None:
             await experiment.set_for_user(user_id)
 
+        with ResolutionMemo.scope():
+            if user_id:
+                await prefetch_user_variants(self.experiments, user_id, concurrency)
+            await for_each_experiment(self.experiments, resolve, concurrency)
+
+    async def assign_users(self, user_ids: Iterable[UserIdType], chunk_size: int = 1000) -> AsyncIterator[Tuple[str, int]]:
+        """
+        Pre-assign a cohort of users in every experiment, yielding (experiment name, users assigned so far)
+        after each chunk. See BaseExperiment.assign_users.
+        """
+        user_ids = list(user_ids)
+        for experiment in self.experiments:
+            async for assigned in experiment.assign_users(user_ids, chunk_size):
+                yield experiment.name, assigned
+
+    async def complete_for_users(
+        self,
+        completions: Iterable[Tuple[UserIdType, float]],
+        concurrency: Optional[int] = None,
+    ) -> None:
+        """Reward a batch of (user id, score) completions in every experiment. See BaseExperiment.complete_for_users."""
+        completions = list(completions)
+
+        async def complete(experiment: ExperimentType) -> None:
+            await experiment.complete_for_users(completions)
+
+        await for_each_experiment(self.experiments, complete, concurrency)
+
     def has_pick(self, symbol: object) -> bool:
-        return any(experiment.has_pick(symbol) for experiment in self.experiments)
+        return symbol in self._experiments_by_symbol
 
     def pick(self, symbol: object, type_of_pick: Optional[Type[PickType]]) -> PickType:
-        for experiment in self.experiments:
-            if experiment.has_pick(symbol):
-                return experiment.pick(symbol, type_of_pick)
-        raise ValueError(f"Unable to find {symbol}")
+        experiment = self._experiments_by_symbol.get(symbol)
+        if experiment is None:
+            raise ValueError(f"Unable to find {symbol}")
+        return experiment.pick(symbol, type_of_pick)
+
+    def pick_many(self, symbols: Iterable[object], type_of_pick: Optional[Type[PickType]] = None) -> List[PickType]:
+        """Resolve several symbols in one pass, returning their picks in the same order."""
+        experiments_by_symbol = self._experiments_by_symbol
+        picks: List[PickType] = []
+        for symbol in symbols:
+            experiment = experiments_by_symbol.get(symbol)
+            if experiment is None:
+                raise ValueError(f"Unable to find {symbol}")
+            picks.append(experiment.pick(symbol, type_of_pick))
+        return picks
 
     def validate(self, experiment: ExperimentType) -> Set[object]:
-        if any(existing_experiment.name == experiment.name for existing_experiment in self.experiments):
+        if experiment.name in self._experiments_by_name:
             raise ValueError(f'Experiment name "{experiment.name}" already used')
 
         pick_symbols = set(experiment.variants[0].picks.keys())
@@ -41,31 +124,32 @@ class Pyrosper(Generic[ExperimentType, UserIdType]):
             if symbol in self.used_symbols:
                 raise ValueError(f'Variant pick name {symbol} already used')
 
+        experiment.check_pick_types()
         return pick_symbols
 
     def with_experiment(self, experiment: ExperimentType) -> 'Self':
         new_symbols = self.validate(experiment)
-        self.experiments.append(experiment)
+        self._experiments.append(experiment)
+        self._index_experiment(experiment)
         self.used_symbols.update(new_symbols)
         return self
 
+    def compile(self) -> ExperimentRegistry[ExperimentType]:
+        """Build a read-only ExperimentRegistry of the registered experiments, to share across requests."""
+        return ExperimentRegistry(self.experiments)
+
     def get_experiment(self, experiment_name: str) -> ExperimentType:
-        for experiment in self.experiments:
-            if experiment.name == experiment_name:
-                return experiment
-        raise ValueError(f'Experiment "{experiment_name}" not found')
+        experiment = self._experiments_by_name.get(experiment_name)
+        if experiment is None:
+            raise ValueError(f'Experiment "{experiment_name}" not found')
+        return experiment
 
     def experiment_exists(self, experiment_name: str) -> bool:
-        try:
-            self.get_experiment(experiment_name)
-            return True
-        except ValueError:
-            return False
+        return experiment_name in self._experiments_by_name
 
     def check_experiment_has_variant(self, experiment_name: str, variant_name: str) -> None:
         experiment = self.get_experiment(experiment_name)
-        variant_names = {variant.name for variant in experiment.variants}
-        if variant_name not in variant_names:
+        if not experiment.has_variant(variant_name):
             raise ValueError(f'Variant "{variant_name}" does not exist in Experiment "{experiment_name}".')
 
 
@@ -85,8 +169,4 @@ def _pick(service_identifier: object):
 
 
 def pick(pyrosper: 'Pyrosper', symbol: Union[object, Symbol], type_of_pick: Type[PickType]) -> PickType:
-    value = None
-    for experiment in pyrosper.experiments:
-        if experiment.has_pick(symbol):
-            return experiment.pick(symbol, type_of_pick)
-    raise ValueError(f"Unable to find {symbol}")
+    return pyrosper.pick(symbol, type_of_pick)
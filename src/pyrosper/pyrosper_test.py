@@ -1,10 +1,15 @@
+import asyncio
+
 import pytest
 
+from .bucketing import Bucketing
 from .mock.mock_experiment import MockExperiment
 from .mock.mock_pyrosper import MockPyrosper
-from .pyrosper import Pyrosper, pick
+from .pyrosper import Pyrosper, ExperimentResolutionError, pick
+from .resolution_memo import ResolutionMemo
 from .symbol import Symbol
 from .mock.mock_variant import MockVariant
+from .mock.mock_user_variant import MockUserVariant
 
 
 class TestPyrosper:
@@ -50,6 +55,194 @@ class TestPyrosper:
         # Should not raise any exceptions
         await pyrosper.set_for_user("user123")
     
+    @pytest.mark.asyncio
+    async def test_set_for_user_concurrently(self, pyrosper):
+        """Test set_for_user resolves experiments concurrently within the concurrency limit"""
+        in_flight = 0
+        max_in_flight = 0
+
+        class SlowExperiment(MockExperiment):
+            async def get_experiment(self):
+                nonlocal in_flight, max_in_flight
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return self
+
+        for i in range(6):
+            pyrosper.with_experiment(SlowExperiment(
+                name=f"experiment_{i}",
+                variants=[MockVariant("control", {Symbol(f"symbol_{i}"): i})],
+                is_enabled=True,
+            ))
+        await pyrosper.set_for_user("user123", concurrency=2)
+        assert max_in_flight == 2
+        assert all(experiment.user_id == "user123" for experiment in pyrosper.experiments)
+
+    @pytest.mark.asyncio
+    async def test_set_for_user_concurrently_reports_errors_and_cancels_others(self, pyrosper):
+        """Test a failing experiment cancels its siblings and is reported by name"""
+        cancelled = []
+
+        class FailingExperiment(MockExperiment):
+            async def get_experiment(self):
+                raise RuntimeError("storage down")
+
+        class SlowExperiment(MockExperiment):
+            async def get_experiment(self):
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(self.name)
+                    raise
+                return self
+
+        pyrosper.with_experiment(SlowExperiment(name="slow", variants=[MockVariant("control", {Symbol("a"): 1})]))
+        pyrosper.with_experiment(FailingExperiment(name="failing", variants=[MockVariant("control", {Symbol("b"): 2})]))
+        with pytest.raises(ExceptionGroup) as exc_info:
+            await pyrosper.set_for_user("user123", concurrency=5)
+        errors = exc_info.value.exceptions
+        assert len(errors) == 1
+        assert isinstance(errors[0], ExperimentResolutionError)
+        assert errors[0].experiment_name == "failing"
+        assert isinstance(errors[0].error, RuntimeError)
+        assert cancelled == ["slow"]
+
+    @pytest.mark.asyncio
+    async def test_set_for_user_uses_bulk_user_variant_hook(self, pyrosper):
+        """Test set_for_user looks up user variants once through the bulk hook"""
+        bulk_calls = []
+        single_calls = []
+
+        class BulkExperiment(MockExperiment):
+            async def get_user_variants_for_user(self, user_id, experiment_ids):
+                bulk_calls.append((user_id, experiment_ids))
+                return {"id_0": MockUserVariant(experiment_id="id_0", user_id=user_id, index=1)}
+
+            async def get_user_variant(self, user_id, experiment_id):
+                single_calls.append(experiment_id)
+
+        for i in range(3):
+            symbol = Symbol(f"symbol_{i}")
+            pyrosper.with_experiment(BulkExperiment(
+                id=f"id_{i}",
+                name=f"experiment_{i}",
+                variants=[
+                    MockVariant("control", {symbol: "control"}),
+                    MockVariant("variant_a", {symbol: "variant_a"}),
+                ],
+                is_enabled=True,
+            ))
+        await pyrosper.set_for_user("user123")
+        assert bulk_calls == [("user123", ["id_0", "id_1", "id_2"])]
+        assert single_calls == []
+        assert [experiment.variant_index for experiment in pyrosper.experiments] == [1, 0, 0]
+
+    @pytest.mark.asyncio
+    async def test_set_for_user_skips_bucketing_in_bulk_hook(self, pyrosper):
+        """Test set_for_user does not look up stored variants for experiments with bucketing"""
+        bulk_calls = []
+
+        class BulkExperiment(MockExperiment):
+            async def get_user_variants_for_user(self, user_id, experiment_ids):
+                bulk_calls.append((user_id, experiment_ids))
+                return {}
+
+        for i in range(3):
+            symbol = Symbol(f"symbol_{i}")
+            pyrosper.with_experiment(BulkExperiment(
+                id=f"id_{i}",
+                name=f"experiment_{i}",
+                variants=[
+                    MockVariant("control", {symbol: "control"}),
+                    MockVariant("variant_a", {symbol: "variant_a"}),
+                ],
+                is_enabled=True,
+            ))
+        pyrosper.experiments[1].bucketing = Bucketing(weights=[0, 1])
+        await pyrosper.set_for_user("user123")
+        assert bulk_calls == [("user123", ["id_0", "id_2"])]
+        assert pyrosper.experiments[1].variant_index == 1
+
+    @pytest.mark.asyncio
+    async def test_set_for_user_falls_back_without_bulk_hook(self, pyrosper):
+        """Test set_for_user calls get_user_variant per experiment when the bulk hook is not implemented"""
+        single_calls = []
+
+        class SingleExperiment(MockExperiment):
+            async def get_user_variant(self, user_id, experiment_id):
+                single_calls.append(experiment_id)
+
+        for i in range(3):
+            pyrosper.with_experiment(SingleExperiment(
+                id=f"id_{i}",
+                name=f"experiment_{i}",
+                variants=[MockVariant("control", {Symbol(f"symbol_{i}"): "control"})],
+                is_enabled=True,
+            ))
+        await pyrosper.set_for_user("user123")
+        assert single_calls == ["id_0", "id_1", "id_2"]
+
+    @pytest.mark.parametrize("concurrency, shared", [(None, False), (2, True)])
+    @pytest.mark.asyncio
+    async def test_set_for_user_shares_memo_only_when_needed(self, pyrosper, concurrency, shared):
+        """Test set_for_user only opens a request-wide memo scope for concurrent or bulk resolution"""
+        memos = []
+
+        class RecordingExperiment(MockExperiment):
+            async def get_experiment(self):
+                memos.append(ResolutionMemo.current())
+                return self
+
+        for i in range(2):
+            pyrosper.with_experiment(RecordingExperiment(
+                id=f"id_{i}",
+                name=f"experiment_{i}",
+                variants=[MockVariant("control", {Symbol(f"symbol_{i}"): "control"})],
+                is_enabled=True,
+            ))
+        await pyrosper.set_for_user("user123", concurrency=concurrency)
+        assert (memos[0] is memos[-1]) is shared
+
+    @pytest.mark.asyncio
+    async def test_assign_users(self, pyrosper):
+        """Test assign_users reports progress per experiment"""
+        for i in range(2):
+            pyrosper.with_experiment(MockExperiment(
+                id=f"id_{i}",
+                name=f"experiment_{i}",
+                variants=[MockVariant("control", {Symbol(f"symbol_{i}"): i})],
+                is_enabled=True,
+            ))
+        user_ids = iter(["user_1", "user_2", "user_3"])
+        progress = [step async for step in pyrosper.assign_users(user_ids, chunk_size=2)]
+        assert progress == [("experiment_0", 2), ("experiment_0", 3), ("experiment_1", 2), ("experiment_1", 3)]
+
+    @pytest.mark.asyncio
+    async def test_complete_for_users(self, pyrosper, mocker):
+        """Test complete_for_users hands the whole batch to every experiment"""
+        experiments = []
+        for i in range(2):
+            experiment = MockExperiment(
+                id=f"id_{i}",
+                name=f"experiment_{i}",
+                variants=[MockVariant("control", {Symbol(f"symbol_{i}"): i})],
+                is_enabled=True,
+            )
+            experiments.append(mocker.patch.object(experiment, 'complete_for_users', mocker.AsyncMock()))
+            pyrosper.with_experiment(experiment)
+        await pyrosper.complete_for_users(iter([("user_1", 1.0), ("user_2", 0.0)]), concurrency=2)
+        for complete_for_users in experiments:
+            complete_for_users.assert_called_once_with([("user_1", 1.0), ("user_2", 0.0)])
+
+    @pytest.mark.asyncio
+    async def test_set_for_user_invalid_concurrency(self, pyrosper, mock_experiment):
+        """Test set_for_user rejects a concurrency limit below one"""
+        pyrosper.experiments = [mock_experiment]
+        with pytest.raises(ValueError, match="concurrency must be at least 1"):
+            await pyrosper.set_for_user("user123", concurrency=0)
+    
     def test_has_pick_true(self, pyrosper, mock_experiment, test_symbol):
         """Test has_pick returns True when symbol exists"""
         pyrosper.experiments = [mock_experiment]
@@ -83,6 +276,42 @@ class TestPyrosper:
         with pytest.raises(ValueError, match="Unable to find"):
             pyrosper.pick(test_symbol, str)
     
+    def test_pick_after_with_experiment(self, pyrosper, mock_experiment, test_symbol):
+        """Test pick and has_pick use experiments registered through with_experiment"""
+        other_symbol = Symbol("other_symbol")
+        other_experiment = MockExperiment(
+            name="other_experiment",
+            variants=[MockVariant("control", {other_symbol: 42})],
+            is_enabled=True
+        )
+        pyrosper.with_experiment(mock_experiment).with_experiment(other_experiment)
+        assert pyrosper.has_pick(other_symbol) is True
+        assert pyrosper.pick(test_symbol, str) == "control_value"
+        assert pyrosper.pick(other_symbol, int) == 42
+
+    def test_pick_uses_variant_index(self, pyrosper, mock_experiment, test_symbol):
+        """Test pick reads from the experiment's current variant"""
+        pyrosper.with_experiment(mock_experiment)
+        mock_experiment.variant_index = 1
+        assert pyrosper.pick(test_symbol, str) == "variant_a_value"
+
+    def test_pick_many(self, pyrosper, mock_experiment, test_symbol):
+        """Test pick_many resolves symbols across experiments in order"""
+        other_symbol = Symbol("other_symbol")
+        other_experiment = MockExperiment(
+            name="other_experiment",
+            variants=[MockVariant("control", {other_symbol: "other_value"})],
+            is_enabled=True
+        )
+        pyrosper.with_experiment(mock_experiment).with_experiment(other_experiment)
+        assert pyrosper.pick_many([other_symbol, test_symbol], str) == ["other_value", "control_value"]
+
+    def test_pick_many_not_found(self, pyrosper, mock_experiment, test_symbol):
+        """Test pick_many raises ValueError when any symbol is missing"""
+        pyrosper.with_experiment(mock_experiment)
+        with pytest.raises(ValueError, match="Unable to find"):
+            pyrosper.pick_many([test_symbol, Symbol("non_existent")])
+
     def test_validate_success(self, pyrosper, mock_experiment):
         """Test validate with valid experiment"""
         result = pyrosper.validate(mock_experiment)
@@ -122,6 +351,24 @@ class TestPyrosper:
         with pytest.raises(ValueError, match="Variant pick name Symbol\\(test_symbol\\) already used"):
             pyrosper.validate(mock_experiment)
     
+    def test_validate_pick_types(self, pyrosper):
+        """Test validate checks every variant against the declared pick types"""
+        symbol = Symbol("count")
+        experiment = MockExperiment(
+            name="typed",
+            variants=[MockVariant("control", {symbol: 1}), MockVariant("variant", {symbol: "2"})],
+            is_enabled=True,
+        )
+        experiment.pick_types = {symbol: int}
+        with pytest.raises(TypeError, match='Expected type <class \'int\'>, but got 2 for symbol Symbol\\(count\\) in variant "variant"'):
+            pyrosper.validate(experiment)
+
+    def test_validate_pick_types_unknown_symbol(self, pyrosper, mock_experiment):
+        """Test validate rejects pick types declared for symbols the variants don't have"""
+        mock_experiment.pick_types = {Symbol("missing"): str}
+        with pytest.raises(ValueError, match="Pick type declared for unknown symbol"):
+            pyrosper.validate(mock_experiment)
+
     def test_with_experiment_success(self, pyrosper, mock_experiment):
         """Test with_experiment adds experiment successfully"""
         result = pyrosper.with_experiment(mock_experiment)
@@ -148,6 +395,24 @@ class TestPyrosper:
         pyrosper.experiments = [mock_experiment]
         assert pyrosper.experiment_exists("test_experiment") is True
     
+    def test_experiment_exists_after_with_experiment(self, pyrosper, mock_experiment):
+        """Test experiment_exists and get_experiment see experiments registered through with_experiment"""
+        pyrosper.with_experiment(mock_experiment)
+        assert pyrosper.experiment_exists("test_experiment") is True
+        assert pyrosper.get_experiment("test_experiment") is mock_experiment
+
+    def test_with_experiment_duplicate_name(self, pyrosper, mock_experiment):
+        """Test with_experiment rejects a name registered earlier"""
+        pyrosper.with_experiment(mock_experiment)
+        duplicate_experiment = MockExperiment(
+            name="test_experiment",
+            variants=[MockVariant("control", {Symbol("other_symbol"): "value"})],
+            is_enabled=True
+        )
+        with pytest.raises(ValueError, match='Experiment name "test_experiment" already used'):
+            pyrosper.with_experiment(duplicate_experiment)
+        assert pyrosper.experiments == [mock_experiment]
+
     def test_experiment_exists_false(self, pyrosper):
         """Test experiment_exists returns False when experiment doesn't exist"""
         assert pyrosper.experiment_exists("nonexistent") is False
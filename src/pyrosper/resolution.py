@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from .base_experiment import BaseExperiment
+
+ExperimentType = TypeVar('ExperimentType', bound='BaseExperiment')
+
+
+class ExperimentResolutionError(Exception):
+    """Raised, grouped in an ExceptionGroup, when an experiment fails during concurrent resolution."""
+    experiment_name: str
+    error: Exception
+
+    def __init__(self, experiment_name: str, error: Exception):
+        super().__init__(f'Experiment "{experiment_name}" failed: {error!r}')
+        self.experiment_name = experiment_name
+        self.error = error
+
+
+async def for_each_experiment(
+    experiments: Sequence[ExperimentType],
+    action: Callable[[ExperimentType], Awaitable[None]],
+    concurrency: Optional[int] = None,
+) -> None:
+    """
+    Run `action` for every experiment, one after another, or with at most `concurrency` in flight.
+
+    Concurrent runs use a TaskGroup: when one experiment fails the others are cancelled and awaited, and an
+    ExceptionGroup of ExperimentResolutionError is raised, one per failed experiment.
+    """
+    if concurrency is None:
+        for experiment in experiments:
+            await action(experiment)
+        return
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(experiment: ExperimentType) -> None:
+        async with semaphore:
+            try:
+                await action(experiment)
+            except Exception as error:
+                raise ExperimentResolutionError(experiment.name, error) from error
+
+    async with asyncio.TaskGroup() as group:
+        for experiment in experiments:
+            group.create_task(run(experiment))
+
+
+def supports_prefetch(experiment: BaseExperiment) -> bool:
+    """Whether the experiment's class implements the get_user_variants_for_user bulk hook."""
+    hook = type(experiment).get_user_variants_for_user
+    return getattr(hook, "__wrapped__", hook) is not BaseExperiment.get_user_variants_for_user
+
+
+async def prefetch_user_variants(
+    experiments: Sequence[ExperimentType],
+    user_id: Any,
+    concurrency: Optional[int] = None,
+) -> None:
+    """
+    Prime the active ResolutionMemo with a user's variants, calling each experiment class's
+    get_user_variants_for_user bulk hook once. Experiments with bucketing store no user variants and are skipped.
+    """
+    records: Dict[ExperimentType, Any] = {}
+
+    async def fetch_record(experiment: ExperimentType) -> None:
+        records[experiment] = await experiment._fetch_experiment()
+
+    await for_each_experiment(experiments, fetch_record, concurrency)
+
+    groups: Dict[type, List[ExperimentType]] = {}
+    for experiment in experiments:
+        record = records.get(experiment)
+        if record and record.id and experiment.bucketing is None and supports_prefetch(experiment):
+            groups.setdefault(type(experiment), []).append(experiment)
+
+    for group in groups.values():
+        experiment_ids = [records[experiment].id for experiment in group]
+        user_variants = await group[0].get_user_variants_for_user(user_id, experiment_ids)
+        if user_variants is None:
+            continue
+        for experiment, experiment_id in zip(group, experiment_ids):
+            experiment._prime_user_variant(user_id, experiment_id, user_variants.get(experiment_id))
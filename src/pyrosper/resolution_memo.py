@@ -0,0 +1,75 @@
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class ResolutionMemo:
+    """
+    Request-scoped memo of adapter reads.
+
+    While a scope is active, BaseExperiment fetches each experiment record, algorithm and user variant once
+    and shares the result between its internal helpers. Keys are tuples whose first item is the owning
+    experiment, so one memo can serve every experiment resolved during a request.
+
+    Usage:
+        with ResolutionMemo.scope() as memo:
+            await pyrosper.set_for_user(user_id)
+        print(memo.saved_calls)
+    """
+    storage: ContextVar[Optional["ResolutionMemo"]] = ContextVar("pyrosper_resolution_memo", default=None)
+
+    def __init__(self):
+        self.values: Dict[Tuple[Any, ...], Any] = {}
+        self.storage_calls = 0
+        self.saved_calls = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(storage_calls={self.storage_calls}, saved_calls={self.saved_calls})"
+
+    async def fetch(self, key: Tuple[Any, ...], loader: Callable[[], Awaitable[T]]) -> T:
+        if key in self.values:
+            self.saved_calls += 1
+            return self.values[key]
+        self.storage_calls += 1
+        value = await loader()
+        self.values[key] = value
+        return value
+
+    def prime(self, key: Tuple[Any, ...], value: Any) -> None:
+        self.values[key] = value
+
+    def forget(self, owner: Any) -> None:
+        for key in [key for key in self.values if key[0] is owner]:
+            del self.values[key]
+
+    @classmethod
+    def current(cls) -> Optional["ResolutionMemo"]:
+        return cls.storage.get()
+
+    @classmethod
+    def scope(cls) -> "_MemoScope":
+        """Enter a memo scope, reusing the active one when scopes are nested."""
+        return _MemoScope(cls)
+
+
+class _MemoScope:
+    """Context manager of ResolutionMemo.scope(). A plain class, as scopes are entered on every resolution."""
+    __slots__ = ("memo_class", "token")
+
+    def __init__(self, memo_class: Type[ResolutionMemo]):
+        self.memo_class = memo_class
+        self.token: Optional[Token] = None
+
+    def __enter__(self) -> ResolutionMemo:
+        storage = self.memo_class.storage
+        memo = storage.get()
+        if memo is None:
+            memo = self.memo_class()
+            self.token = storage.set(memo)
+        return memo
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self.token is not None:
+            self.memo_class.storage.reset(self.token)
+            self.token = None
@@ -0,0 +1,52 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from .resolution_memo import ResolutionMemo
+
+
+class TestResolutionMemo:
+    """Tests for the ResolutionMemo class"""
+
+    @pytest.mark.asyncio
+    async def test_fetch_loads_once_and_counts_saved_calls(self):
+        """Test fetch only calls the loader once per key"""
+        memo = ResolutionMemo()
+        loader = AsyncMock(return_value="value")
+        assert await memo.fetch(("owner", "key"), loader) == "value"
+        assert await memo.fetch(("owner", "key"), loader) == "value"
+        loader.assert_called_once()
+        assert memo.storage_calls == 1
+        assert memo.saved_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_fetch_memoizes_none(self):
+        """Test a missing record is remembered as well"""
+        memo = ResolutionMemo()
+        loader = AsyncMock(return_value=None)
+        await memo.fetch(("owner", "key"), loader)
+        assert await memo.fetch(("owner", "key"), loader) is None
+        loader.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_prime_and_forget(self):
+        """Test primed values are served and forget drops an owner's values"""
+        owner = object()
+        other = object()
+        memo = ResolutionMemo()
+        memo.prime((owner, "key"), "primed")
+        memo.prime((other, "key"), "other")
+        loader = AsyncMock(return_value="loaded")
+        assert await memo.fetch((owner, "key"), loader) == "primed"
+        memo.forget(owner)
+        assert await memo.fetch((owner, "key"), loader) == "loaded"
+        assert memo.values[(other, "key")] == "other"
+
+    def test_scope(self):
+        """Test scope sets the current memo, reuses it when nested and resets on exit"""
+        assert ResolutionMemo.current() is None
+        with ResolutionMemo.scope() as outer:
+            assert ResolutionMemo.current() is outer
+            with ResolutionMemo.scope() as inner:
+                assert inner is outer
+            assert ResolutionMemo.current() is outer
+        assert ResolutionMemo.current() is None
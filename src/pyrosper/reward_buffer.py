@@ -0,0 +1,175 @@
+import asyncio
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .base_experiment import BaseExperiment
+
+
+class RewardBuffer:
+    """
+    Write-behind buffer for complete_for_user rewards.
+
+    Instead of a read-modify-write of the algorithm for every conversion, rewards are grouped per experiment
+    and variant index and applied with one BaseExperiment.apply_rewards() call per experiment. A flush
+    happens when `flush_size` rewards are pending, every `flush_interval` seconds once started, and on close.
+    At most `max_size` rewards are held, counting those being applied and those reserved. Adding to a full
+    buffer flushes it first, and raises BufferError if that doesn't make room. complete_for_user reserves
+    room with reserve() before it deletes the user variant, so a full buffer never loses a completion.
+
+    Usage:
+        buffer = RewardBuffer(flush_size=500, flush_interval=2.0)
+        MyExperiment.reward_buffer = buffer
+        buffer.start()
+        ...
+        await buffer.close()  # on shutdown
+    """
+    flush_size: int
+    flush_interval: Optional[float]
+    max_size: int
+    flushes: int
+    flushed_rewards: int
+    errors: int
+
+    def __init__(self, flush_size: int = 100, flush_interval: Optional[float] = 1.0, max_size: Optional[int] = None):
+        if flush_size < 1:
+            raise ValueError("flush_size must be at least 1")
+        if max_size is None:
+            max_size = flush_size * 10
+        if max_size < flush_size:
+            raise ValueError("max_size must be at least flush_size")
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.flushes = 0
+        self.flushed_rewards = 0
+        self.errors = 0
+        self._pending: Dict[str, Tuple["BaseExperiment", Dict[int, List[float]]]] = {}
+        self._size = 0
+        # Rewards taken by a running flush, and room promised by reserve() to rewards not added yet
+        self._in_flight = 0
+        self._reserved = 0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(flush_size={self.flush_size}, pending={self._size})"
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _has_room(self, count: int) -> bool:
+        return self._size + self._in_flight + self._reserved + count <= self.max_size
+
+    async def _make_room(self, count: int) -> None:
+        if self._has_room(count):
+            return
+        try:
+            await self.flush()
+        except Exception as error:
+            raise BufferError("Reward buffer is full") from error
+        if not self._has_room(count):
+            raise BufferError("Reward buffer is full")
+
+    async def reserve(self, count: int = 1) -> None:
+        """Hold room for `count` rewards added later with add(..., reserved=True), flushing if needed."""
+        await self._make_room(count)
+        self._reserved += count
+
+    def release(self, count: int = 1) -> None:
+        """Give back room held by reserve() for rewards that won't be added."""
+        self._reserved = max(0, self._reserved - count)
+
+    async def add(self, experiment: "BaseExperiment", variant_index: int, score: float, reserved: bool = False) -> None:
+        if reserved:
+            self.release()
+        else:
+            await self._make_room(1)
+        self._add(experiment, {variant_index: [score]})
+        if self._size >= self.flush_size:
+            await self.flush()
+
+    async def add_many(self, experiment: "BaseExperiment", rewards: List[Tuple[int, float]], reserved: bool = False) -> None:
+        """Add (variant index, score) rewards of one experiment together, so a flush can't interrupt them."""
+        if reserved:
+            self.release(len(rewards))
+        else:
+            await self._make_room(len(rewards))
+        scores: Dict[int, List[float]] = {}
+        for variant_index, score in rewards:
+            scores.setdefault(variant_index, []).append(score)
+        self._add(experiment, scores)
+        if self._size >= self.flush_size:
+            await self.flush()
+
+    def _add(self, experiment: "BaseExperiment", scores: Dict[int, List[float]]) -> None:
+        entry = self._pending.get(experiment.name)
+        if entry is None:
+            entry = self._pending[experiment.name] = (experiment, {})
+        for variant_index, values in scores.items():
+            entry[1].setdefault(variant_index, []).extend(values)
+            self._size += len(values)
+
+    async def flush(self) -> int:
+        """Apply every pending reward, returning how many were applied. Failed rewards stay pending."""
+        async with self._lock:
+            pending = list(self._pending.values())
+            self._pending = {}
+            self._in_flight = self._size
+            self._size = 0
+            applied = 0
+            position = 0
+            try:
+                for position, (experiment, scores) in enumerate(pending):
+                    rewards = [(variant_index, score) for variant_index, values in scores.items() for score in values]
+                    await experiment.apply_rewards(rewards)
+                    applied += len(rewards)
+                    self._in_flight -= len(rewards)
+            except BaseException:
+                self.errors += 1
+                # In-flight rewards kept their room in the buffer, so putting them back stays within max_size
+                self._in_flight = 0
+                for failed_experiment, failed_scores in pending[position:]:
+                    self._add(failed_experiment, failed_scores)
+                raise
+            finally:
+                if applied:
+                    self.flushes += 1
+                    self.flushed_rewards += applied
+            return applied
+
+    def start(self) -> None:
+        """Start flushing every flush_interval seconds on the running event loop."""
+        flush_interval = self.flush_interval
+        if flush_interval is None:
+            raise ValueError("flush_interval is not set")
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically(flush_interval))
+
+    async def _flush_periodically(self, flush_interval: float) -> None:
+        while True:
+            await asyncio.sleep(flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # Rewards stay pending and are retried on the next flush; failures are counted in `errors`.
+                pass
+
+    async def close(self) -> None:
+        """Stop periodic flushing and flush what is pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def __aenter__(self) -> "RewardBuffer":
+        if self.flush_interval is not None:
+            self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
+        await self.close()
+        return False
@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from .mock.mock_algorithm import MockAlgorithm
+from .mock.mock_experiment import MockExperiment
+from .mock.mock_user_variant import MockUserVariant
+from .mock.mock_variant import MockVariant
+from .reward_buffer import RewardBuffer
+
+
+def make_experiment(name="experiment"):
+    return MockExperiment(id=f"{name}_id", name=name, variants=[MockVariant("a", {}), MockVariant("b", {})], is_enabled=True)
+
+
+class TestRewardBuffer:
+    """Tests for the RewardBuffer class"""
+
+    @pytest.mark.asyncio
+    async def test_flush_applies_grouped_rewards(self, mocker):
+        """Test flush applies each experiment's rewards in one call"""
+        first = make_experiment("first")
+        second = make_experiment("second")
+        first_apply = mocker.patch.object(first, 'apply_rewards', AsyncMock())
+        second_apply = mocker.patch.object(second, 'apply_rewards', AsyncMock())
+        buffer = RewardBuffer(flush_size=10)
+        await buffer.add(first, 0, 1.0)
+        await buffer.add(second, 1, 0.5)
+        await buffer.add(first, 1, 0.0)
+        await buffer.add(first, 0, 2.0)
+        assert len(buffer) == 4
+        assert await buffer.flush() == 4
+        first_apply.assert_called_once_with([(0, 1.0), (0, 2.0), (1, 0.0)])
+        second_apply.assert_called_once_with([(1, 0.5)])
+        assert len(buffer) == 0
+        assert buffer.flushes == 1
+        assert buffer.flushed_rewards == 4
+
+    @pytest.mark.asyncio
+    async def test_add_flushes_at_flush_size(self, mocker):
+        """Test reaching flush_size flushes"""
+        experiment = make_experiment()
+        apply_rewards = mocker.patch.object(experiment, 'apply_rewards', AsyncMock())
+        buffer = RewardBuffer(flush_size=2)
+        await buffer.add(experiment, 0, 1.0)
+        apply_rewards.assert_not_called()
+        await buffer.add(experiment, 0, 1.0)
+        apply_rewards.assert_called_once_with([(0, 1.0), (0, 1.0)])
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_rewards(self, mocker):
+        """Test rewards that failed to apply stay pending"""
+        experiment = make_experiment()
+        mocker.patch.object(experiment, 'apply_rewards', AsyncMock(side_effect=RuntimeError("storage down")))
+        buffer = RewardBuffer(flush_size=10)
+        await buffer.add(experiment, 1, 1.0)
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+        assert len(buffer) == 1
+        assert buffer.errors == 1
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_raises(self, mocker):
+        """Test the buffer is bounded"""
+        experiment = make_experiment()
+        mocker.patch.object(experiment, 'apply_rewards', AsyncMock(side_effect=RuntimeError("storage down")))
+        buffer = RewardBuffer(flush_size=1, max_size=1)
+        with pytest.raises(RuntimeError):
+            await buffer.add(experiment, 0, 1.0)
+        with pytest.raises(BufferError, match="Reward buffer is full"):
+            await buffer.add(experiment, 0, 1.0)
+
+    @pytest.mark.asyncio
+    async def test_periodic_flush_and_close(self, mocker):
+        """Test started buffers flush on their interval and on close"""
+        experiment = make_experiment()
+        apply_rewards = mocker.patch.object(experiment, 'apply_rewards', AsyncMock())
+        async with RewardBuffer(flush_size=100, flush_interval=0.01) as buffer:
+            await buffer.add(experiment, 0, 1.0)
+            await asyncio.sleep(0.05)
+            apply_rewards.assert_called_once_with([(0, 1.0)])
+            await buffer.add(experiment, 1, 1.0)
+        assert apply_rewards.call_count == 2
+        assert len(buffer) == 0
+
+    def test_invalid_arguments(self):
+        """Test sizes are validated"""
+        with pytest.raises(ValueError, match="flush_size must be at least 1"):
+            RewardBuffer(flush_size=0)
+        with pytest.raises(ValueError, match="max_size must be at least flush_size"):
+            RewardBuffer(flush_size=10, max_size=5)
+
+    @pytest.mark.asyncio
+    async def test_complete_for_user_uses_buffer(self, mocker):
+        """Test complete_for_user buffers rewards and applies them in one algorithm write"""
+        experiment = make_experiment()
+        buffer = RewardBuffer(flush_size=10)
+        mocker.patch.object(experiment, 'reward_buffer', buffer)
+        mocker.patch.object(experiment, 'get_user_variant', AsyncMock(
+            side_effect=lambda user_id, experiment_id: MockUserVariant(experiment_id=experiment_id, user_id=user_id, index=1)
+        ))
+        get_algorithm = mocker.patch.object(experiment, 'get_algorithm', AsyncMock(return_value=MockAlgorithm()))
+        reward_algorithm = mocker.patch.object(experiment, 'reward_algorithm', AsyncMock(return_value=MockAlgorithm()))
+        upsert_algorithm = mocker.patch.object(experiment, 'upsert_algorithm', AsyncMock())
+        await experiment.complete_for_user("user_1", 1.0)
+        await experiment.complete_for_user("user_2", 0.0)
+        get_algorithm.assert_not_called()
+        await buffer.close()
+        get_algorithm.assert_called_once()
+        assert reward_algorithm.call_count == 2
+        upsert_algorithm.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_loses_no_completion(self, mocker):
+        """Test completions that don't fit in a full buffer keep their user variants and can be retried"""
+        experiment = make_experiment()
+        buffer = RewardBuffer(flush_size=2, max_size=2)
+        mocker.patch.object(experiment, 'reward_buffer', buffer)
+        stored = {
+            user_id: MockUserVariant(experiment_id=experiment.id, user_id=user_id, index=1)
+            for user_id in ("user_1", "user_2", "user_3", "user_4")
+        }
+        mocker.patch.object(experiment, 'get_user_variant', AsyncMock(
+            side_effect=lambda user_id, experiment_id: stored.get(user_id)
+        ))
+        mocker.patch.object(experiment, 'delete_user_variant', AsyncMock(
+            side_effect=lambda user_variant: stored.pop(user_variant.user_id)
+        ))
+        mocker.patch.object(experiment, 'get_user_variants_for_users', AsyncMock(
+            side_effect=lambda user_ids, experiment_id: {user_id: stored[user_id] for user_id in user_ids if user_id in stored}
+        ))
+        mocker.patch.object(experiment, 'delete_user_variants_for_users', AsyncMock(
+            side_effect=lambda user_variants: [stored.pop(user_variant.user_id) for user_variant in user_variants]
+        ))
+        apply_rewards = mocker.patch.object(experiment, 'apply_rewards', AsyncMock(side_effect=RuntimeError("storage down")))
+        await experiment.complete_for_user("user_1", 1.0)
+        with pytest.raises(RuntimeError):
+            await experiment.complete_for_user("user_2", 1.0)
+        with pytest.raises(BufferError):
+            await experiment.complete_for_user("user_3", 1.0)
+        with pytest.raises(BufferError):
+            await experiment.complete_for_users([("user_3", 1.0), ("user_4", 0.5)])
+        assert set(stored) == {"user_3", "user_4"}
+        assert len(buffer) == 2
+
+        apply_rewards.reset_mock(side_effect=True)
+        await experiment.complete_for_user("user_3", 1.0)
+        await experiment.complete_for_users([("user_4", 0.5)])
+        await buffer.close()
+        assert stored == {}
+        applied = [reward for call in apply_rewards.call_args_list for reward in call.args[0]]
+        assert sorted(applied) == [(1, 0.5), (1, 1.0), (1, 1.0), (1, 1.0)]
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_stays_within_max_size(self, mocker):
+        """Test rewards added while a flush runs can't push the buffer past max_size when the flush fails"""
+        experiment = make_experiment()
+        buffer = RewardBuffer(flush_size=2, max_size=3)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def apply_rewards(rewards):
+            started.set()
+            await release.wait()
+            raise RuntimeError("storage down")
+
+        mocker.patch.object(experiment, 'apply_rewards', apply_rewards)
+        await buffer.add(experiment, 0, 1.0)
+        flush = asyncio.create_task(buffer.add(experiment, 0, 1.0))
+        await started.wait()
+        await buffer.add(experiment, 1, 1.0)
+        # The buffer is full, so this add waits for the running flush and then tries one of its own
+        overflowing = asyncio.create_task(buffer.add(experiment, 1, 1.0))
+        release.set()
+        with pytest.raises(RuntimeError):
+            await flush
+        with pytest.raises(BufferError):
+            await overflowing
+        assert len(buffer) == 3
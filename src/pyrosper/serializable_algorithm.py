@@ -0,0 +1,16 @@
+from typing import Any, Dict, Protocol, Self, TypeVar
+
+
+class SerializableAlgorithm(Protocol):
+    """
+    An algorithm that can be stored as JSON, like Bandit. SQLiteExperiment and KeyValueExperiment store
+    algorithms this way, so no code is ever loaded from shared storage.
+    """
+
+    def to_dict(self) -> Dict[str, Any]: ...
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Self: ...
+
+
+SerializableAlgorithmType = TypeVar('SerializableAlgorithmType', bound=SerializableAlgorithm)
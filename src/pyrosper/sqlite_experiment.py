@@ -0,0 +1,331 @@
+import asyncio
+import copy
+import json
+import queue
+import sqlite3
+import threading
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, ClassVar, Dict, Iterator, List, Optional, Self, Sequence, TypeVar
+
+from .base_experiment import BaseExperiment, VariantType
+from .serializable_algorithm import SerializableAlgorithmType
+from .user_variant import UserVariant
+
+T = TypeVar("T")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS pyrosper_experiments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        is_enabled INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pyrosper_algorithms (
+        experiment_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pyrosper_user_variants (
+        experiment_id INTEGER NOT NULL,
+        user_id TEXT NOT NULL,
+        variant_index INTEGER NOT NULL,
+        PRIMARY KEY (experiment_id, user_id)
+    ) WITHOUT ROWID
+    """,
+)
+
+# Keeps IN (...) lists under SQLite's bound parameter limit
+_MAX_PARAMETERS = 500
+
+
+def _chunks(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SQLiteStorage:
+    """
+    Pool of SQLite connections to one database file, used from async code through a thread pool.
+
+    Every connection runs in WAL mode, so readers don't block the writer, and keeps a cache of prepared
+    statements, which the adapter reuses by always running the same SQL text. Share one storage between
+    every SQLiteExperiment of a process.
+
+    Usage:
+        storage = SQLiteStorage("pyrosper.db", pool_size=4)
+        ...
+        storage.close()  # on shutdown
+    """
+    path: str
+    pool_size: int
+
+    def __init__(self, path: str, pool_size: int = 4, timeout: float = 5.0, cached_statements: int = 256):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        if path == ":memory:":
+            raise ValueError("In-memory databases can't be shared by a pool, use a file path")
+        self.path = path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._connections: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="pyrosper-sqlite")
+        with self._lock:
+            connection = self._connect()
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            self._connections.put(connection)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.path!r}, pool_size={self.pool_size})"
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self._all_connections.append(connection)
+        return connection
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all_connections) < self.pool_size:
+                return self._connect()
+        return self._connections.get()
+
+    def _call(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        connection = self._acquire()
+        try:
+            return operation(connection)
+        finally:
+            self._connections.put(connection)
+
+    async def run(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        """Run operation with a pooled connection on the storage's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, operation)
+
+    async def execute(self, sql: str, parameters: Sequence[Any] = ()) -> List[Any]:
+        return await self.run(lambda connection: connection.execute(sql, parameters).fetchall())
+
+    async def executemany(self, sql: str, rows: Sequence[Sequence[Any]]) -> None:
+        """Run sql for every row in one transaction."""
+        def execute(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.executemany(sql, rows)
+        if rows:
+            await self.run(execute)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for connection in self._all_connections:
+                connection.close()
+            self._all_connections.clear()
+
+
+class SQLiteExperiment(BaseExperiment[SerializableAlgorithmType, VariantType, UserVariant, int, str, None]):
+    """
+    BaseExperiment backed by SQLiteStorage.
+
+    Experiments are stored by name, user variants by (experiment id, user id), and algorithms are stored as
+    JSON of their to_dict() in a versioned row, so algorithm_cache can tell when they change. The version
+    is kept when the algorithm is deleted, so it never repeats. Override serialize_algorithm and
+    deserialize_algorithm to store another format. Subclasses still choose variants: implement
+    new_algorithm, get_variant_index and reward_algorithm, or use BanditExperimentMixin.
+
+    Usage:
+        class GreetingExperiment(BanditExperimentMixin[ThompsonSampling], SQLiteExperiment[ThompsonSampling, Variant]):
+            def new_algorithm(self) -> ThompsonSampling:
+                return ThompsonSampling(len(self.variants))
+
+        experiment = GreetingExperiment("greeting", variants, storage=SQLiteStorage("pyrosper.db"))
+    """
+    storage: SQLiteStorage
+    # Users removed per statement by delete_user_variants, so other writers get a turn between chunks
+    delete_chunk_size: ClassVar[int] = 10000
+    store_new_user_variants: ClassVar[bool] = True
+
+    def __init__(self, name: str, variants: List[VariantType], storage: SQLiteStorage, id: Optional[int] = None, *args: Any, is_enabled: bool = False, **kwargs: Any):
+        super().__init__(name, variants, id, *args, **kwargs)
+        self.storage = storage
+        self.is_enabled = is_enabled
+
+    @property
+    def is_enabled(self) -> bool:
+        return self._is_enabled
+
+    @is_enabled.setter
+    def is_enabled(self, value: bool) -> None:
+        self._is_enabled = value
+
+    def storage_key(self) -> SQLiteStorage:
+        return self.storage
+
+    def _copy(self, id: Optional[int], is_enabled: bool) -> Self:
+        experiment = copy.copy(self)
+        experiment.id = id
+        experiment.is_enabled = is_enabled
+        return experiment
+
+    async def get_experiment(self) -> Optional[Self]:
+        rows = await self.storage.execute(
+            "SELECT id, is_enabled FROM pyrosper_experiments WHERE name = ?", (self.name,)
+        )
+        if not rows:
+            return None
+        id, is_enabled = rows[0]
+        return self._copy(id, bool(is_enabled))
+
+    async def upsert_experiment(self, experiment: Self) -> Self:
+        def upsert(connection: sqlite3.Connection) -> int:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute(
+                    "INSERT INTO pyrosper_experiments (name, is_enabled) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET is_enabled = excluded.is_enabled",
+                    (experiment.name, int(bool(experiment.is_enabled))),
+                )
+                return connection.execute(
+                    "SELECT id FROM pyrosper_experiments WHERE name = ?", (experiment.name,)
+                ).fetchone()[0]
+        id = await self.storage.run(upsert)
+        return experiment._copy(id, bool(experiment.is_enabled))
+
+    async def delete_experiment(self, experiment: Self) -> None:
+        await self.storage.execute("DELETE FROM pyrosper_experiments WHERE name = ?", (experiment.name,))
+
+    async def get_user_variant(self, user_id: str, experiment_id: int) -> Optional[UserVariant]:
+        rows = await self.storage.execute(
+            "SELECT variant_index FROM pyrosper_user_variants WHERE experiment_id = ? AND user_id = ?",
+            (experiment_id, user_id),
+        )
+        if not rows:
+            return None
+        return self.new_user_variant(user_id, experiment_id, rows[0][0])
+
+    async def get_user_variants_for_user(self, user_id: str, experiment_ids: List[int]) -> Dict[int, UserVariant]:
+        def select(connection: sqlite3.Connection) -> List[Any]:
+            rows = []
+            for chunk in _chunks(experiment_ids, _MAX_PARAMETERS):
+                rows.extend(connection.execute(
+                    "SELECT experiment_id, variant_index FROM pyrosper_user_variants "
+                    f"WHERE user_id = ? AND experiment_id IN ({', '.join('?' * len(chunk))})",
+                    (user_id, *chunk),
+                ))
+            return rows
+        rows = await self.storage.run(select)
+        return {experiment_id: self.new_user_variant(user_id, experiment_id, index) for experiment_id, index in rows}
+
+    async def get_user_variants_for_users(self, user_ids: List[str], experiment_id: int) -> Dict[str, UserVariant]:
+        def select(connection: sqlite3.Connection) -> List[Any]:
+            rows = []
+            for chunk in _chunks(user_ids, _MAX_PARAMETERS):
+                rows.extend(connection.execute(
+                    "SELECT user_id, variant_index FROM pyrosper_user_variants "
+                    f"WHERE experiment_id = ? AND user_id IN ({', '.join('?' * len(chunk))})",
+                    (experiment_id, *chunk),
+                ))
+            return rows
+        rows = await self.storage.run(select)
+        # user ids are stored as text, so map them back to the ids the caller asked for
+        requested = {str(user_id): user_id for user_id in user_ids}
+        return {
+            requested[user_id]: self.new_user_variant(requested[user_id], experiment_id, index)
+            for user_id, index in rows
+        }
+
+    def new_user_variant(self, user_id: str, experiment_id: int, index: int) -> UserVariant:
+        return UserVariant(experiment_id=experiment_id, index=index, user_id=user_id)
+
+    async def upsert_user_variant(self, user_variant: UserVariant) -> None:
+        await self.storage.execute(
+            "INSERT OR REPLACE INTO pyrosper_user_variants (experiment_id, user_id, variant_index) VALUES (?, ?, ?)",
+            (user_variant.experiment_id, user_variant.user_id, user_variant.index),
+        )
+
+    async def upsert_user_variants(self, user_variants: List[UserVariant]) -> None:
+        await self.storage.executemany(
+            "INSERT OR REPLACE INTO pyrosper_user_variants (experiment_id, user_id, variant_index) VALUES (?, ?, ?)",
+            [(user_variant.experiment_id, user_variant.user_id, user_variant.index) for user_variant in user_variants],
+        )
+
+    async def delete_user_variant(self, user_variant: UserVariant) -> None:
+        await self.storage.execute(
+            "DELETE FROM pyrosper_user_variants WHERE experiment_id = ? AND user_id = ?",
+            (user_variant.experiment_id, user_variant.user_id),
+        )
+
+    async def delete_user_variants_for_users(self, user_variants: List[UserVariant]) -> None:
+        await self.storage.executemany(
+            "DELETE FROM pyrosper_user_variants WHERE experiment_id = ? AND user_id = ?",
+            [(user_variant.experiment_id, user_variant.user_id) for user_variant in user_variants],
+        )
+
+    async def delete_user_variants(self) -> None:
+        """Delete every user variant of this experiment, delete_chunk_size rows per transaction."""
+        def delete_chunk(connection: sqlite3.Connection) -> int:
+            return connection.execute(
+                "DELETE FROM pyrosper_user_variants WHERE experiment_id = "
+                "(SELECT id FROM pyrosper_experiments WHERE name = ?) AND user_id IN ("
+                "SELECT user_id FROM pyrosper_user_variants WHERE experiment_id = "
+                "(SELECT id FROM pyrosper_experiments WHERE name = ?) LIMIT ?)",
+                (self.name, self.name, self.delete_chunk_size),
+            ).rowcount
+        while await self.storage.run(delete_chunk) >= self.delete_chunk_size:
+            pass
+
+    @abstractmethod
+    def new_algorithm(self) -> SerializableAlgorithmType:
+        """Create the algorithm used until one is stored."""
+        pass
+
+    def serialize_algorithm(self, algorithm: SerializableAlgorithmType) -> bytes:
+        return json.dumps(algorithm.to_dict()).encode()
+
+    def deserialize_algorithm(self, data: bytes) -> SerializableAlgorithmType:
+        return type(self.new_algorithm()).from_dict(json.loads(data))
+
+    async def get_algorithm(self) -> SerializableAlgorithmType:
+        rows = await self.storage.execute(
+            "SELECT data FROM pyrosper_algorithms WHERE experiment_name = ?", (self.name,)
+        )
+        # A deleted algorithm leaves its row, with empty data, to keep the version
+        if not rows or not rows[0][0]:
+            return self.new_algorithm()
+        return self.deserialize_algorithm(rows[0][0])
+
+    async def get_algorithm_version(self) -> Optional[int]:
+        rows = await self.storage.execute(
+            "SELECT version FROM pyrosper_algorithms WHERE experiment_name = ?", (self.name,)
+        )
+        return rows[0][0] if rows else None
+
+    async def upsert_algorithm(self, algorithm: SerializableAlgorithmType) -> None:
+        await self.storage.execute(
+            "INSERT INTO pyrosper_algorithms (experiment_name, version, data) VALUES (?, 1, ?) "
+            "ON CONFLICT (experiment_name) DO UPDATE SET version = version + 1, data = excluded.data",
+            (self.name, self.serialize_algorithm(algorithm)),
+        )
+
+    async def delete_algorithm(self) -> None:
+        await self.storage.execute(
+            "UPDATE pyrosper_algorithms SET version = version + 1, data = X'' WHERE experiment_name = ?", (self.name,)
+        )
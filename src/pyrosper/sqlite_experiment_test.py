@@ -0,0 +1,184 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+from .base_experiment import BaseExperiment
+from .lru_cache import LRUCache
+from .sqlite_experiment import SQLiteExperiment, SQLiteStorage
+from .symbol import Symbol
+from .user_variant import UserVariant
+from .variant import Variant
+
+greeting = Symbol("greeting")
+
+
+class ScoreAlgorithm:
+    def __init__(self, variant_count: int):
+        self.scores: List[float] = [0.0] * variant_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"scores": self.scores}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScoreAlgorithm":
+        algorithm = cls(0)
+        algorithm.scores = data["scores"]
+        return algorithm
+
+
+class GreetingExperiment(SQLiteExperiment[ScoreAlgorithm, Variant]):
+    def new_algorithm(self) -> ScoreAlgorithm:
+        return ScoreAlgorithm(len(self.variants))
+
+    async def get_variant_index(self, algorithm: ScoreAlgorithm) -> int:
+        return 1
+
+    async def reward_algorithm(self, algorithm: ScoreAlgorithm, user_variant_index: int, score: float) -> ScoreAlgorithm:
+        algorithm.scores[user_variant_index] += score
+        return algorithm
+
+
+class TestSQLiteExperiment:
+    """Tests for the SQLite storage adapter"""
+
+    @pytest.fixture
+    def storage(self, tmp_path):
+        storage = SQLiteStorage(str(tmp_path / "pyrosper.db"), pool_size=2)
+        yield storage
+        storage.close()
+
+    @pytest.fixture
+    def experiment(self, storage):
+        return GreetingExperiment(
+            "greeting",
+            [Variant("hello", {greeting: "Hello!"}), Variant("hi", {greeting: "Hi there!"})],
+            storage=storage,
+        )
+
+    def test_invalid_storage(self):
+        """Test storage arguments are validated"""
+        with pytest.raises(ValueError, match="pool_size must be at least 1"):
+            SQLiteStorage("pyrosper.db", pool_size=0)
+        with pytest.raises(ValueError, match="In-memory databases"):
+            SQLiteStorage(":memory:")
+
+    @pytest.mark.asyncio
+    async def test_wal_mode(self, storage):
+        """Test connections use write-ahead logging"""
+        assert await storage.execute("PRAGMA journal_mode") == [("wal",)]
+
+    @pytest.mark.asyncio
+    async def test_experiment_cache_keeps_storages_apart(self, experiment, tmp_path, mocker):
+        """Test experiments of the same name in different databases don't share cached records"""
+        mocker.patch.object(BaseExperiment, 'experiment_cache', LRUCache(max_size=10, ttl=60))
+        other_storage = SQLiteStorage(str(tmp_path / "other.db"))
+        try:
+            other = GreetingExperiment("greeting", experiment.variants, storage=other_storage)
+            await experiment.enable()
+            await experiment.set_for_user("user_1")
+            await other.set_for_user("user_1")
+            assert experiment.is_enabled is True
+            assert other.is_enabled is False
+        finally:
+            other_storage.close()
+
+    @pytest.mark.asyncio
+    async def test_complete_for_user_after_external_delete(self, experiment, storage, mocker):
+        """Test a user whose variant was deleted outside this process is not rewarded from the assignment cache"""
+        mocker.patch.object(BaseExperiment, 'assignment_cache', LRUCache(max_size=10))
+        await experiment.enable()
+        await experiment.set_for_user("user_1")
+        await storage.execute("DELETE FROM pyrosper_user_variants")
+        await experiment.complete_for_user("user_1", 1.0)
+        assert (await experiment.get_algorithm()).scores == [0.0, 0.0]
+
+    @pytest.mark.asyncio
+    async def test_enable_set_for_user_and_complete(self, experiment):
+        """Test an experiment is stored, assigns users and rewards completions"""
+        assert await experiment.get_experiment() is None
+        await experiment.enable()
+        stored = await experiment.get_experiment()
+        assert stored.is_enabled is True
+        assert isinstance(stored.id, int)
+
+        await experiment.set_for_user("user_1")
+        assert experiment.pick(greeting, str) == "Hi there!"
+        user_variant = await experiment.get_user_variant("user_1", stored.id)
+        assert isinstance(user_variant, UserVariant)
+        assert user_variant.index == 1
+
+        await experiment.complete_for_user("user_1", 2.0)
+        assert await experiment.get_user_variant("user_1", stored.id) is None
+        assert (await experiment.get_algorithm()).scores == [0.0, 2.0]
+
+    @pytest.mark.asyncio
+    async def test_algorithm_version(self, experiment):
+        """Test every algorithm upsert and delete bumps its version, which doesn't restart once deleted"""
+        assert await experiment.get_algorithm_version() is None
+        await experiment.upsert_algorithm(experiment.new_algorithm())
+        await experiment.upsert_algorithm(experiment.new_algorithm())
+        assert await experiment.get_algorithm_version() == 2
+        await experiment.delete_algorithm()
+        assert await experiment.get_algorithm_version() == 3
+        assert (await experiment.get_algorithm()).scores == [0.0, 0.0]
+        await experiment.upsert_algorithm(experiment.new_algorithm())
+        assert await experiment.get_algorithm_version() == 4
+
+    @pytest.mark.asyncio
+    async def test_algorithm_stored_as_json(self, experiment, storage):
+        """Test algorithms are stored as JSON of their to_dict()"""
+        algorithm = experiment.new_algorithm()
+        algorithm.scores[1] = 1.5
+        await experiment.upsert_algorithm(algorithm)
+        rows = await storage.execute("SELECT data FROM pyrosper_algorithms WHERE experiment_name = ?", (experiment.name,))
+        assert json.loads(rows[0][0]) == {"scores": [0.0, 1.5]}
+        assert (await experiment.get_algorithm()).scores == [0.0, 1.5]
+
+    @pytest.mark.asyncio
+    async def test_bulk_operations(self, experiment):
+        """Test cohort assignment, bulk lookups and batch completion"""
+        await experiment.enable()
+        experiment_id = (await experiment.get_experiment()).id
+        user_ids = [f"user_{i}" for i in range(1200)]
+        async for _ in experiment.assign_users(user_ids, chunk_size=500):
+            pass
+        user_variants = await experiment.get_user_variants_for_users(user_ids + ["missing"], experiment_id)
+        assert len(user_variants) == 1200
+        by_experiment = await experiment.get_user_variants_for_user("user_1", [experiment_id, experiment_id + 1])
+        assert list(by_experiment) == [experiment_id]
+
+        await experiment.set_for_user("user_0")
+        await experiment.complete_for_users([(user_id, 1.0) for user_id in user_ids[:1000]])
+        assert len(await experiment.get_user_variants_for_users(user_ids, experiment_id)) == 200
+        assert (await experiment.get_algorithm()).scores == [0.0, 1000.0]
+
+    @pytest.mark.asyncio
+    async def test_disable_deletes_in_chunks(self, experiment, mocker):
+        """Test disable removes every user variant, a chunk at a time"""
+        mocker.patch.object(GreetingExperiment, 'delete_chunk_size', 3)
+        await experiment.enable()
+        experiment_id = (await experiment.get_experiment()).id
+        await experiment.upsert_user_variants([
+            UserVariant(experiment_id=experiment_id, index=0, user_id=f"user_{i}") for i in range(10)
+        ])
+        run = mocker.spy(experiment.storage, 'run')
+        await experiment.delete_user_variants()
+        assert run.call_count == 4
+        assert await experiment.get_user_variants_for_users([f"user_{i}" for i in range(10)], experiment_id) == {}
+        await experiment.disable()
+        assert await experiment.get_experiment() is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests(self, experiment):
+        """Test concurrent requests share the connection pool"""
+        await experiment.enable()
+
+        async def request(user_id: str) -> int:
+            copy = GreetingExperiment(experiment.name, experiment.variants, storage=experiment.storage)
+            await copy.set_for_user(user_id)
+            return copy.variant_index
+
+        assert await asyncio.gather(*(request(f"user_{i}") for i in range(20))) == [1] * 20
+        assert len(experiment.storage._all_connections) <= 2
@@ -1,7 +1,12 @@
 class Symbol:
+    __slots__ = ("description",)
+
     def __init__(self, description: str):
         self.description = description
-        self.unique_id = id(self)
+
+    @property
+    def unique_id(self) -> int:
+        return id(self)
 
     def __repr__(self):
         return f"Symbol({self.description})"
\ No newline at end of file
@@ -53,4 +53,10 @@ class TestSymbol:
         
         # Should be able to add to set
         symbol_set = {symbol}
-        assert symbol in symbol_set 
\ No newline at end of file
+        assert symbol in symbol_set 
+    
+    def test_symbol_is_slotted(self):
+        """Test that Symbol stores no per-instance dict and derives unique_id from its identity"""
+        symbol = Symbol("test")
+        assert not hasattr(symbol, '__dict__')
+        assert symbol.unique_id == id(symbol)
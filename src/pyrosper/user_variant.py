@@ -6,6 +6,8 @@ UserIdType = TypeVar('UserIdType')
 UserVariantIdType = TypeVar('UserVariantIdType')
 
 class UserVariant(ABC, Generic[ExperimentIdType, UserIdType, UserVariantIdType]):
+  __slots__ = ("id", "experiment_id", "user_id", "index")
+
   id: Optional["UserVariantIdType"]
   experiment_id: "ExperimentIdType"
   user_id: "UserIdType"
@@ -1,6 +1,8 @@
 from typing import Any, Dict, Union
 
 class Variant:
+    __slots__ = ("name", "picks")
+
     # also allow picks to be a class
     def __init__(self, name: str, picks: Union[Dict[object, Any], Any]):
         self.name = name
@@ -55,4 +55,15 @@ class TestVariant:
         
         assert variant.get_pick("obj1") == obj1
         assert variant.get_pick("obj2") == obj2
-        assert variant.get_pick("obj1").value == "value1" 
\ No newline at end of file
+        assert variant.get_pick("obj1").value == "value1" 
+    
+    def test_variant_is_slotted(self):
+        """Test that Variant and UserVariant store no per-instance dict"""
+        from .mock.mock_user_variant import MockUserVariant
+        from .mock.mock_variant import MockVariant
+
+        assert not hasattr(Variant("test_variant", {}), '__dict__')
+        assert not hasattr(MockVariant("test_variant", {}), '__dict__')
+        assert not hasattr(MockUserVariant(experiment_id="1", index=0, user_id="2"), '__dict__')
+        with pytest.raises(AttributeError):
+            Variant("test_variant", {}).other = 1  # pyright: ignore[reportAttributeAccessIssue]